@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class CountylimitsConfig(AppConfig):
+    name = "countylimits"
+    default_auto_field = "django.db.models.AutoField"
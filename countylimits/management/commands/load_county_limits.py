@@ -4,7 +4,7 @@ import sys
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
-from countylimits.models import County, CountyLimit, State
+from countylimits.models import County, CountyLimit, CountyLimitLoad, State
 
 
 DEFAULT_COUNTYLIMIT_FIXTURE = "countylimit_data.json"
@@ -18,7 +18,11 @@ def dump_countylimit_fixture(to_filename=None):
 
     sysout = sys.stdout
     with open(filename, "w") as sys.stdout:
-        call_command("dumpdata", "countylimits")
+        call_command(
+            "dumpdata",
+            "countylimits",
+            exclude=["countylimits.countylimitload"],
+        )
         sys.stdout = sysout
 
 
@@ -140,6 +144,7 @@ class Command(BaseCommand):
                             county_id=counties[complete_fips],
                         )
                         cl.save()
+                CountyLimitLoad.objects.create()
                 self.stdout.write(
                     "\nSuccessfully loaded data for {} counties from "
                     "{}\n\n".format(CountyLimit.objects.count(), csv_file)
@@ -157,6 +162,7 @@ class Command(BaseCommand):
                 DEFAULT_COUNTYLIMIT_FIXTURE,
                 app_label="countylimits",
             )
+            CountyLimitLoad.objects.create()
             self.stdout.write(
                 "\nSuccessfully loaded data for {} counties from {}".format(
                     CountyLimit.objects.count(), DEFAULT_COUNTYLIMIT_FIXTURE
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("countylimits", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountyLimitLoad",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("loaded", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-pk"],
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from localflavor.us.models import USStateField
 from localflavor.us.us_states import STATE_CHOICES
 
+from oahapi import timing
+
 
 abbr_to_name = dict(STATE_CHOICES)
 
@@ -72,26 +74,82 @@ class CountyLimit(models.Model):
     def __str__(self):
         return "CountyLimit %s" % self.id
 
+    @staticmethod
+    def dataset_version():
+        """
+        Identify the loaded county limits, as (loaded, pk) of the last
+        CountyLimitLoad, or (None, None) if no load was recorded.
+        """
+        version = CountyLimitLoad.objects.values_list("loaded", "pk").first()
+        return version or (None, None)
+
     @staticmethod
     def county_limits_by_state(state):
         """Get a list of state counties with limits."""
         data = []
         # state value can be a State FIPS or a state abbr.
-        state_obj = State.objects.filter(
-            models.Q(state_fips=state) | models.Q(state_abbr=state)
-        ).first()
-        limits = CountyLimit.objects.filter(county__state=state_obj)
-        for countylimit in limits:
-            data.append(
+        with timing.phase("state-lookup"):
+            state_obj = State.objects.filter(
+                models.Q(state_fips=state) | models.Q(state_abbr=state)
+            ).first()
+        with timing.phase("county-limits") as phase:
+            limits = CountyLimit.objects.filter(county__state=state_obj)
+            for countylimit in limits:
+                data.append(
+                    {
+                        "state": str(abbr_to_name[state_obj.state_abbr]),
+                        "county": countylimit.county.county_name,
+                        "complete_fips": "{}{}".format(
+                            state_obj.state_fips,
+                            countylimit.county.county_fips,
+                        ),
+                        "gse_limit": str(countylimit.gse_limit),
+                        "fha_limit": str(countylimit.fha_limit),
+                        "va_limit": str(countylimit.va_limit),
+                    }
+                )
+            phase.rows = len(data)
+        return data
+
+    @staticmethod
+    async def acounty_limits_by_state(state):
+        """Async version of county_limits_by_state."""
+        with timing.phase("state-lookup"):
+            state_obj = await State.objects.filter(
+                models.Q(state_fips=state) | models.Q(state_abbr=state)
+            ).afirst()
+        with timing.phase("county-limits") as phase:
+            limits = (
+                CountyLimit.objects.filter(county__state=state_obj)
+                .select_related("county")
+                .order_by("pk")
+            )
+            data = [
                 {
                     "state": str(abbr_to_name[state_obj.state_abbr]),
                     "county": countylimit.county.county_name,
                     "complete_fips": "{}{}".format(
-                        state_obj.state_fips, countylimit.county.county_fips
+                        state_obj.state_fips,
+                        countylimit.county.county_fips,
                     ),
                     "gse_limit": str(countylimit.gse_limit),
                     "fha_limit": str(countylimit.fha_limit),
                     "va_limit": str(countylimit.va_limit),
                 }
-            )
+                async for countylimit in limits
+            ]
+            phase.rows = len(data)
+
         return data
+
+
+class CountyLimitLoad(models.Model):
+    """A run of load_county_limits, recorded once it has loaded the limits."""
+
+    loaded = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-pk"]
+
+    def __str__(self):
+        return "CountyLimitLoad %s" % self.loaded
@@ -4,12 +4,13 @@ import tempfile
 import unittest
 from decimal import Decimal
 from io import StringIO
+from unittest import mock
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from django.test import TestCase
+from django.test import AsyncRequestFactory, TestCase
+from django.utils.http import http_date
 
-from unittest import mock
 from model_bakery import baker
 from rest_framework import status
 
@@ -29,7 +30,8 @@ from countylimits.data_collection.gather_county_data import (
     translate_data,
 )
 from countylimits.management.commands import load_county_limits
-from countylimits.models import County, CountyLimit, State
+from countylimits.models import County, CountyLimit, CountyLimitLoad, State
+from countylimits.views import county_limits_async
 
 
 BASE_PATH = os.path.dirname(os.path.abspath(__file__)) + "/"
@@ -358,6 +360,58 @@ class CountyLimitTest(TestCase):
             "Accomack County", response_VA.data["data"][0]["county"]
         )
 
+    def test_county_limits_by_state__server_timing(self):
+        response = self.client.get(self.url, {"state": "AL"})
+        self.assertIn("state-lookup;", response["Server-Timing"])
+        self.assertIn("county-limits;", response["Server-Timing"])
+        self.assertIn("rows=1", response["Server-Timing"])
+
+    def test_county_limits_by_state__not_modified(self):
+        etag = self.client.get(self.url, {"state": "AL"})["ETag"]
+        response = self.client.get(
+            self.url, {"state": "AL"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # As by load_county_limits.
+        CountyLimitLoad.objects.create()
+        response = self.client.get(
+            self.url, {"state": "AL"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_county_limits_by_state__last_modified(self):
+        response = self.client.get(self.url, {"state": "AL"})
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        load = CountyLimitLoad.objects.create()
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url,
+                {"state": "AL"},
+                HTTP_IF_MODIFIED_SINCE=http_date(load.loaded.timestamp()),
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            response["Last-Modified"], http_date(load.loaded.timestamp())
+        )
+
+    def test_county_limits_by_state__cache_control(self):
+        response = self.client.get(self.url, {"state": "AL"})
+        self.assertFalse(response.has_header("Cache-Control"))
+        with self.settings(COUNTYLIMITS_MAX_AGE=86400):
+            response = self.client.get(self.url, {"state": "AL"})
+        self.assertEqual(response["Cache-Control"], "public, max-age=86400")
+
+    async def test_county_limits_async(self):
+        for params in ({"state": "01"}, {"state": "VA"}, {"state": "XX"}, {}):
+            expected = await self.async_client.get(self.url, params)
+            response = await county_limits_async(
+                AsyncRequestFactory().get(self.url, params)
+            )
+            self.assertEqual(response.status_code, expected.status_code)
+            self.assertEqual(response.content, expected.content)
+
     def test_unicode(self):
         state = State.objects.get(state_fips="01")
         county = County.objects.get(county_name="Autauga County")
@@ -419,12 +473,14 @@ class LoadCountyLimitsTestCase(TestCase):
         self.c.handle(csv=self.test_csv, confirmed="y")
         self.assertIn("Successfully loaded data", self.c.stdout.getvalue())
         self.assertEqual(CountyLimit.objects.count(), 3233)
+        self.assertEqual(CountyLimitLoad.objects.count(), 1)
 
     def test_handle__fixture_success(self):
         """.. check that all countylimits are loaded from fixture."""
         self.c.handle(confirmed="y")
         self.assertIn("Successfully loaded data", self.c.stdout.getvalue())
         self.assertEqual(CountyLimit.objects.count(), 3233)
+        self.assertEqual(CountyLimitLoad.objects.count(), 1)
 
 
 class LoadAndDumpCountyLimitsTestCase(TestCase):
@@ -1,4 +1,6 @@
-from countylimits.views import county_limits
+from django.conf import settings
+
+from countylimits.views import county_limits, county_limits_async
 
 
 try:
@@ -8,5 +10,13 @@ except ImportError:
 
 
 urlpatterns = [
-    re_path(r"^$", county_limits, name="county_limits"),
+    re_path(
+        r"^$",
+        (
+            county_limits_async
+            if getattr(settings, "OAHAPI_ASYNC_VIEWS", False)
+            else county_limits
+        ),
+        name="county_limits",
+    ),
 ]
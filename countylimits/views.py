@@ -1,8 +1,14 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_GET
+
 from rest_framework import status
 from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from countylimits.models import CountyLimit
+from oahapi.conditional import async_condition, cache_for, dataset_etag
 
 
 # A static allowlist of abbreviations and FIPS codes
@@ -122,6 +128,31 @@ SAFE_STATE_LIST = [
 ]
 
 
+def county_limits_version(request):
+    """The loaded county limits version, looked up once per request."""
+    if not hasattr(request, "_county_limits_version"):
+        request._county_limits_version = CountyLimit.dataset_version()
+    return request._county_limits_version
+
+
+def county_limits_etag(request):
+    return dataset_etag(request, county_limits_version(request))
+
+
+def county_limits_last_modified(request):
+    # When load_county_limits last ran.
+    return county_limits_version(request)[0]
+
+
+def county_limits_max_age():
+    return getattr(settings, "COUNTYLIMITS_MAX_AGE", None)
+
+
+@cache_for(county_limits_max_age)
+@condition(
+    etag_func=county_limits_etag,
+    last_modified_func=county_limits_last_modified,
+)
 @api_view(["GET"])
 def county_limits(request):
     """Return all counties with their limits per state."""
@@ -144,3 +175,35 @@ def county_limits(request):
                 {"detail": "Required parameter state is missing"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+
+
+@cache_for(county_limits_max_age)
+@async_condition(
+    etag_func=county_limits_etag,
+    last_modified_func=county_limits_last_modified,
+)
+@require_GET
+async def county_limits_async(request):
+    """
+    Async version of county_limits, for ASGI deployments, with the same
+    responses.
+    """
+    if "state" not in request.GET:
+        package = {"detail": "Required parameter state is missing"}
+        response_status = status.HTTP_400_BAD_REQUEST
+    elif request.GET["state"] not in SAFE_STATE_LIST:
+        package = {"state": "Invalid state"}
+        response_status = status.HTTP_400_BAD_REQUEST
+    else:
+        state = request.GET["state"]
+        package = {
+            "request": {"state": state},
+            "data": await CountyLimit.acounty_limits_by_state(state),
+        }
+        response_status = status.HTTP_200_OK
+
+    return HttpResponse(
+        JSONRenderer().render(package),
+        content_type="application/json",
+        status=response_status,
+    )
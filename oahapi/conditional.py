@@ -0,0 +1,131 @@
+"""
+Helpers for conditional GET support on views whose responses only change
+when a new dataset is loaded.
+"""
+
+import datetime
+import hashlib
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from asgiref.sync import sync_to_async
+
+
+def dataset_etag(request, version):
+    """
+    An ETag for the response to request while version is loaded.
+
+    The full path is included so that different queries never share an ETag.
+    """
+    key = repr((request.get_full_path(), version)).encode("utf-8")
+    return '"%s"' % hashlib.md5(key, usedforsecurity=False).hexdigest()
+
+
+def seconds_until(load_time, now=None):
+    """
+    Seconds from now until the next time the local time of day is load_time.
+    """
+    now = timezone.localtime(now)
+    next_load = now.replace(
+        hour=load_time.hour,
+        minute=load_time.minute,
+        second=load_time.second,
+        microsecond=0,
+    )
+    if next_load <= now:
+        next_load += datetime.timedelta(days=1)
+
+    return int((next_load - now).total_seconds())
+
+
+def cache_for(max_age_func):
+    """
+    View decorator that lets successful and not modified responses be cached
+    publicly for max_age_func() seconds, unless it returns None.
+
+    Works on both sync and async views.
+    """
+
+    def patch_response(response):
+        if response.status_code in (200, 304):
+            max_age = max_age_func()
+            if max_age is not None:
+                patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+
+            @wraps(view_func)
+            async def wrapped_view(request, *args, **kwargs):
+                return patch_response(
+                    await view_func(request, *args, **kwargs)
+                )
+
+        else:
+
+            @wraps(view_func)
+            def wrapped_view(request, *args, **kwargs):
+                return patch_response(view_func(request, *args, **kwargs))
+
+        return wrapped_view
+
+    return decorator
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    Django's condition decorator for async views.
+
+    etag_func and last_modified_func are synchronous functions taking the
+    view's arguments, as for condition. They may query the database, so they
+    are run in a worker thread.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapped_view(request, *args, **kwargs):
+            @sync_to_async
+            def validators():
+                etag = last_modified = None
+                if etag_func:
+                    etag = etag_func(request, *args, **kwargs)
+                if last_modified_func:
+                    last_modified = last_modified_func(
+                        request, *args, **kwargs
+                    )
+                return etag, last_modified
+
+            etag, last_modified = await validators()
+            if etag is not None:
+                etag = quote_etag(etag)
+            if last_modified is not None:
+                if not timezone.is_aware(last_modified):
+                    last_modified = timezone.make_aware(
+                        last_modified, datetime.timezone.utc
+                    )
+                last_modified = int(last_modified.timestamp())
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+
+            if request.method in ("GET", "HEAD"):
+                if last_modified and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(
+                        last_modified
+                    )
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+
+            return response
+
+        return wrapped_view
+
+    return decorator
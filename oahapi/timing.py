@@ -0,0 +1,274 @@
+"""
+Per-request performance instrumentation.
+
+ServerTimingMiddleware records, for each request, the number and duration
+of database queries, the time spent rendering the response, and the time,
+queries and row counts of each phase marked in the code with phase(). The
+results are returned in a Server-Timing response header and, when the
+OAHAPI_TIMING_LOG setting is enabled, logged as JSON to the oahapi.timing
+logger.
+
+Outside of a request handled by the middleware, phase() and record() do
+nothing.
+"""
+
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+logger = logging.getLogger(__name__)
+
+_timings = contextvars.ContextVar("oahapi_timings", default=None)
+
+
+class Phase(object):
+    """Measurements of one phase of a request."""
+
+    def __init__(self, name):
+        self.name = name
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.rows = None
+
+    @property
+    def python_time(self):
+        return self.duration - self.sql_time
+
+    def as_dict(self):
+        phase = {
+            "ms": round(1000 * self.duration, 3),
+            "python_ms": round(1000 * self.python_time, 3),
+            "sql_ms": round(1000 * self.sql_time, 3),
+            "queries": self.queries,
+        }
+        if self.rows is not None:
+            phase["rows"] = self.rows
+        return phase
+
+
+class _NullPhase(object):
+    """Stands in for a Phase when no request is being timed."""
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_null_phase = _NullPhase()
+
+
+class Timings(object):
+    """Measurements of one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = None
+        self.phases = []
+        self.metrics = {}
+        self._active = []
+
+    @contextmanager
+    def phase(self, name):
+        phase = Phase(name)
+        self.phases.append(phase)
+        self._active.append(phase)
+        start = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            phase.duration += time.perf_counter() - start
+            self._active.pop()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.sql_time += elapsed
+            for phase in self._active:
+                phase.queries += 1
+                phase.sql_time += elapsed
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    def header(self):
+        """The Server-Timing header value."""
+        entries = []
+        for phase in self.phases:
+            desc = "queries=%d sql=%.2fms" % (
+                phase.queries,
+                1000 * phase.sql_time,
+            )
+            if phase.rows is not None:
+                desc += " rows=%d" % phase.rows
+            entries.append(
+                '%s;dur=%.2f;desc="%s"'
+                % (phase.name, 1000 * phase.duration, desc)
+            )
+
+        if self.render_time is not None:
+            entries.append("render;dur=%.2f" % (1000 * self.render_time))
+
+        entries.append(
+            'db;dur=%.2f;desc="queries=%d"'
+            % (1000 * self.sql_time, self.queries)
+        )
+
+        for name, value in self.metrics.items():
+            entries.append('%s;desc="%s"' % (name, value))
+
+        entries.append("total;dur=%.2f" % (1000 * self.duration))
+        return ", ".join(entries)
+
+    def as_dict(self):
+        return {
+            "ms": round(1000 * self.duration, 3),
+            "queries": self.queries,
+            "sql_ms": round(1000 * self.sql_time, 3),
+            "render_ms": (
+                None
+                if self.render_time is None
+                else round(1000 * self.render_time, 3)
+            ),
+            "phases": {phase.name: phase.as_dict() for phase in self.phases},
+            "metrics": self.metrics,
+        }
+
+
+def phase(name):
+    """
+    Time a phase of the current request.
+
+    Used as a context manager, which yields the Phase so that the code can
+    set its row count.
+    """
+    timings = _timings.get()
+    if timings is None:
+        return _null_context()
+
+    return timings.phase(name)
+
+
+@contextmanager
+def _null_context():
+    yield _null_phase
+
+
+def record(**metrics):
+    """Record metrics, such as cache status, for the current request."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.metrics.update(metrics)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.execute_wrapper(execute, sql, params, many, context)
+
+
+def time_queries(connection, **kwargs):
+    """
+    Count and time the queries of a database connection in the requests
+    handled by the middleware.
+
+    Connections belong to a thread, and the ORM queries of async views run
+    in other threads than the view, so the queries of every connection are
+    wrapped, once, and counted for the request set in its context, if any.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class ServerTimingMiddleware(object):
+    """
+    Add a Server-Timing header with the measurements of each request.
+
+    Like Django's MiddlewareMixin, the middleware runs in the mode of the
+    rest of the chain, so that async views are not adapted to sync under
+    ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        connection_created.connect(time_queries)
+        for connection in connections.all(initialized_only=True):
+            time_queries(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with self.timed() as timings:
+            response = self.get_response(request)
+        return self.add_timings(request, response, timings)
+
+    async def __acall__(self, request):
+        with self.timed() as timings:
+            response = await self.get_response(request)
+        return self.add_timings(request, response, timings)
+
+    @contextmanager
+    def timed(self):
+        timings = Timings()
+        token = _timings.set(timings)
+        try:
+            yield timings
+        finally:
+            _timings.reset(token)
+
+        timings.finish()
+
+    def add_timings(self, request, response, timings):
+        response["Server-Timing"] = timings.header()
+
+        if getattr(settings, "OAHAPI_TIMING_LOG", False):
+            logger.info(
+                json.dumps(
+                    dict(
+                        timings.as_dict(),
+                        method=request.method,
+                        path=request.path,
+                        status=response.status_code,
+                    )
+                )
+            )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook, so time the rendering
+        # from here to a post-render callback.
+        timings = _timings.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.render_time = time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+
+        return response
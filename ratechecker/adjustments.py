@@ -0,0 +1,236 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+
+from ratechecker.caches import DatasetCache
+from ratechecker.models import Adjustment
+
+
+ADJUSTMENT_FIELDS = (
+    "product_id",
+    "affect_rate_type",
+    "adj_value",
+    "min_loan_amt",
+    "max_loan_amt",
+    "prop_type",
+    "min_fico",
+    "max_fico",
+    "min_ltv",
+    "max_ltv",
+    "state",
+)
+
+
+def adjustment_applies(adjustment, params_data):
+    """
+    Whether an adjustment rule applies to the requested loan.
+
+    Empty criteria match any loan, as in the Adjustment query in get_rates.
+    """
+    loan_amount = params_data.get("loan_amount")
+
+    return (
+        (
+            adjustment.max_loan_amt is None
+            or adjustment.max_loan_amt >= loan_amount
+        )
+        and (
+            adjustment.min_loan_amt is None
+            or adjustment.min_loan_amt <= loan_amount
+        )
+        and adjustment.prop_type
+        in ("", None, params_data.get("property_type"))
+        and adjustment.state in ("", None, params_data.get("state"))
+        and (
+            adjustment.max_fico is None
+            or adjustment.max_fico >= params_data.get("maxfico")
+        )
+        and (
+            adjustment.min_fico is None
+            or adjustment.min_fico <= params_data.get("minfico")
+        )
+        and (
+            adjustment.min_ltv is None
+            or adjustment.min_ltv <= params_data.get("min_ltv")
+        )
+        and (
+            adjustment.max_ltv is None
+            or adjustment.max_ltv >= params_data.get("max_ltv")
+        )
+    )
+
+
+class LowerBounds(object):
+    """
+    Rules with a "bound <= value" criterion, compiled into a breakpoint table.
+
+    masks[i] is the bitmask of the rules satisfied by any value with i bounds
+    at or below it, so a lookup is a single bisection. Rules without a bound
+    always match.
+    """
+
+    def __init__(self, bounds, unbounded):
+        bounds.sort(key=lambda bound: bound[0])
+        self.breakpoints = [value for value, _ in bounds]
+        self.masks = [unbounded]
+        for _, bit in bounds:
+            self.masks.append(self.masks[-1] | bit)
+
+    def match(self, value):
+        return self.masks[bisect_right(self.breakpoints, value)]
+
+
+class UpperBounds(object):
+    """Rules with a "bound >= value" criterion; see LowerBounds."""
+
+    def __init__(self, bounds, unbounded):
+        bounds.sort(key=lambda bound: bound[0])
+        self.breakpoints = [value for value, _ in bounds]
+        self.masks = [unbounded]
+        for _, bit in reversed(bounds):
+            self.masks.append(self.masks[-1] | bit)
+        self.masks.reverse()
+
+    def match(self, value):
+        return self.masks[bisect_left(self.breakpoints, value)]
+
+
+class Choices(object):
+    """Rules matching a single value, or any value if left empty."""
+
+    def __init__(self, values, unbounded):
+        self.masks = dict(values)
+        self.unbounded = unbounded
+
+    def match(self, value):
+        return self.unbounded | self.masks.get(value, 0)
+
+
+class AdjustmentIndex(object):
+    """
+    The adjustment rules of one product, compiled for lookup.
+
+    Each criterion of the Adjustment query in get_rates is compiled into a
+    table of rule bitmasks, so finding the rules that apply to a loan takes
+    one lookup per criterion and an intersection of the results, instead of
+    a scan over every rule. Sums are computed once per set of matching rules.
+    """
+
+    # (criterion, rule field, request parameter)
+    CRITERIA = (
+        (UpperBounds, "max_loan_amt", "loan_amount"),
+        (LowerBounds, "min_loan_amt", "loan_amount"),
+        (Choices, "prop_type", "property_type"),
+        (Choices, "state", "state"),
+        (UpperBounds, "max_fico", "maxfico"),
+        (LowerBounds, "min_fico", "minfico"),
+        (LowerBounds, "min_ltv", "min_ltv"),
+        (UpperBounds, "max_ltv", "max_ltv"),
+    )
+
+    def __init__(self, adjustments):
+        self.values = []
+        for adjustment in adjustments:
+            if adjustment.adj_value is not None:
+                self.values.append((adjustment, adjustment.affect_rate_type))
+
+        self.criteria = []
+        for criterion_cls, field, param in self.CRITERIA:
+            bounds = []
+            unbounded = 0
+            for i, (adjustment, _) in enumerate(self.values):
+                value = getattr(adjustment, field)
+                if value is None or value == "":
+                    unbounded |= 1 << i
+                else:
+                    bounds.append((value, 1 << i))
+
+            if criterion_cls is Choices:
+                choices = defaultdict(int)
+                for value, bit in bounds:
+                    choices[value] |= bit
+                bounds = choices.items()
+
+            self.criteria.append((param, criterion_cls(bounds, unbounded)))
+
+        self.values = [
+            (rate_type, adjustment.adj_value)
+            for adjustment, rate_type in self.values
+        ]
+        self.all_rules = (1 << len(self.values)) - 1
+        self.sums = {}
+
+    def lookup(self, params_data):
+        """Summed adjustments by affect_rate_type for the requested loan."""
+        mask = self.all_rules
+        for param, criterion in self.criteria:
+            if not mask:
+                break
+            mask &= criterion.match(params_data.get(param))
+
+        sums = self.sums.get(mask)
+        if sums is None:
+            sums = self.sums[mask] = self.sum(mask)
+
+        return sums
+
+    def sum(self, mask):
+        sums = {}
+        while mask:
+            bit = mask & -mask
+            rate_type, value = self.values[bit.bit_length() - 1]
+            sums[rate_type] = sums.get(rate_type, 0) + value
+            mask ^= bit
+
+        return sums
+
+
+def build_adjustment_indexes(adjustments):
+    """Compile adjustment rules into an AdjustmentIndex per product."""
+    by_product = defaultdict(list)
+    for adjustment in adjustments:
+        by_product[adjustment.product_id].append(adjustment)
+
+    return {
+        product_id: AdjustmentIndex(rules)
+        for product_id, rules in by_product.items()
+    }
+
+
+def sum_adjustments(indexes, product_ids, params_data):
+    """
+    Summed adjustments for each product, like the Adjustment query.
+
+    Products without any applicable adjustments are left out.
+    """
+    summed = {}
+    for product_id in product_ids:
+        index = indexes.get(product_id)
+        if index is not None:
+            sums = index.lookup(params_data)
+            if sums:
+                summed[product_id] = sums
+
+    return summed
+
+
+def load_adjustment_indexes():
+    return build_adjustment_indexes(
+        Adjustment.objects.order_by("pk").values_list(
+            *ADJUSTMENT_FIELDS, named=True
+        )
+    )
+
+
+_adjustment_indexes = DatasetCache(load_adjustment_indexes)
+
+
+def use_adjustment_index():
+    """Whether get_rates should sum adjustments using compiled indexes."""
+    return getattr(settings, "RATECHECKER_ADJUSTMENT_INDEX", False)
+
+
+def get_adjustment_indexes():
+    """Compiled adjustment indexes for the currently loaded dataset."""
+    return _adjustment_indexes.get()
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RatecheckerConfig(AppConfig):
+    name = "ratechecker"
+    default_auto_field = "django.db.models.AutoField"
+
+    def ready(self):
+        # Connect signal receivers.
+        from ratechecker import caches  # noqa: F401
@@ -0,0 +1,327 @@
+from collections import defaultdict
+from functools import cache
+from itertools import groupby
+
+from django.db.models import Case, IntegerField, Value, When
+
+from ratechecker.adjustments import (
+    ADJUSTMENT_FIELDS,
+    build_adjustment_indexes,
+    get_adjustment_indexes,
+    sum_adjustments,
+    use_adjustment_index,
+)
+from ratechecker.models import Adjustment, Rate
+from ratechecker.products import get_product_table
+from ratechecker.regions import dataset_timestamp, regions_by_state
+from ratechecker.selection import (
+    rates_histogram,
+    select_rates,
+    to_scaled,
+    use_integer_rates,
+)
+from ratechecker.snapshot import get_snapshot, use_snapshot
+
+
+# The request parameters set by each sweep dimension.
+SWEEP_PARAMS = {
+    "points": ("points",),
+    "loan_amount": ("loan_amount",),
+    "fico": ("minfico", "maxfico"),
+}
+
+
+def sweep_params(params, dimension, value):
+    """
+    Request parameters with the swept dimension set to value.
+
+    FICO values are either a single score or a "min-max" range.
+    """
+    params = dict(params)
+    names = SWEEP_PARAMS[dimension]
+    values = value.split("-", 1) if len(names) > 1 else [value]
+    for name, value in zip(names, values * len(names)):
+        params[name] = value
+
+    return params
+
+
+def rate_rows(rates):
+    """
+    Iterate over rates as (rate_id, product_id, region_id, lock, base_rate,
+    total_points) tuples, with rates and points in thousandths.
+    """
+    if use_integer_rates():
+        return rates.values_list(
+            "rate_id",
+            "product_id",
+            "region_id",
+            "lock",
+            "base_rate_scaled",
+            "total_points_scaled",
+        ).iterator()
+
+    return (
+        (
+            rate_id,
+            product_id,
+            region_id,
+            lock,
+            to_scaled(base_rate),
+            to_scaled(total_points),
+        )
+        for (
+            rate_id,
+            product_id,
+            region_id,
+            lock,
+            base_rate,
+            total_points,
+        ) in rates.values_list(
+            "rate_id",
+            "product_id",
+            "region_id",
+            "lock",
+            "base_rate",
+            "total_points",
+        ).iterator()
+    )
+
+
+def filter_rates(product_ids, region_ids, lock_range):
+    min_lock, max_lock = lock_range
+    return Rate.objects.filter(
+        product_id__in=product_ids,
+        region_id__in=region_ids,
+        lock__gt=min_lock,
+        lock__lte=max_lock,
+    )
+
+
+def fetch_rates(product_ids, region_ids, lock_range):
+    """
+    Fetch rates as (rate_id, product_id, region_id, lock, base_rate,
+    total_points) tuples ordered by rate id, with rates and points in
+    thousandths.
+    """
+    return list(
+        rate_rows(
+            filter_rates(product_ids, region_ids, lock_range).order_by(
+                "rate_id"
+            )
+        )
+    )
+
+
+def fetch_adjustment_indexes(product_ids):
+    """Adjustment indexes for the given products."""
+    if use_adjustment_index():
+        return get_adjustment_indexes()
+
+    return build_adjustment_indexes(
+        Adjustment.objects.filter(
+            product_id__in=product_ids, adj_value__isnull=False
+        )
+        .order_by("pk")
+        .values_list(*ADJUSTMENT_FIELDS, named=True)
+    )
+
+
+def scaled_adjustments(indexes, product_ids, params_data):
+    """Summed adjustments for each product, in thousandths."""
+    return {
+        product_id: {
+            rate_type: to_scaled(value) for rate_type, value in sums.items()
+        }
+        for product_id, sums in sum_adjustments(
+            indexes, product_ids, params_data
+        ).items()
+    }
+
+
+def get_rates_batch(scenarios):
+    """
+    Answer get_rates for each of a list of validated parameters.
+
+    The scenarios are answered together. Regions for all requested states
+    are fetched in one query, the rates of each state in one query covering
+    the products and lock periods of all of its scenarios, and the
+    adjustments of all matched products in one more. Each scenario is then
+    answered from the fetched rows, with the same results as get_rates.
+
+    Returns a list of results, in the order of scenarios.
+    """
+    if use_snapshot():
+        snapshot = get_snapshot()
+        return [snapshot.get_rates(params) for params in scenarios]
+
+    regions = regions_by_state({params.get("state") for params in scenarios})
+
+    product_table = get_product_table()
+    product_ids = [set(product_table.match(params)) for params in scenarios]
+
+    # Scenarios in the same state share one rate query.
+    states = defaultdict(list)
+    for i, params in enumerate(scenarios):
+        if regions.get(params.get("state")) and product_ids[i]:
+            states[params.get("state")].append(i)
+
+    rates = {}
+    for state, indexes in states.items():
+        rates[state] = fetch_rates(
+            set().union(*(product_ids[i] for i in indexes)),
+            regions[state],
+            (
+                min(scenarios[i].get("min_lock", 0) for i in indexes),
+                max(scenarios[i].get("max_lock", 0) for i in indexes),
+            ),
+        )
+
+    adjustment_indexes = fetch_adjustment_indexes(
+        set().union(
+            *(product_ids[i] for indexes in states.values() for i in indexes)
+        )
+    )
+
+    timestamp = cache(dataset_timestamp)
+    results = []
+    for i, params in enumerate(scenarios):
+        if not regions.get(params.get("state")):
+            results.append({"data": {}, "timestamp": None})
+            continue
+
+        min_lock = params.get("min_lock", 0)
+        max_lock = params.get("max_lock", 0)
+        rows = [
+            row
+            for row in rates.get(params.get("state"), ())
+            if row[1] in product_ids[i] and min_lock < row[3] <= max_lock
+        ]
+
+        data = rates_histogram(
+            select_rates(
+                ((row[1], row[4], row[5]) for row in rows),
+                scaled_adjustments(
+                    adjustment_indexes, {row[1] for row in rows}, params
+                ),
+                params.get("points"),
+            )
+        )
+
+        results.append({"data": data, "timestamp": timestamp() or ""})
+
+    return results
+
+
+def get_rates_by_state(params_data, states=None):
+    """
+    Answer get_rates for the same parameters in several states.
+
+    states is a list of state abbreviations, or None for every state with
+    regions. Products are matched and their adjustments fetched once, when
+    called, then the rates of all states are fetched in one query, ordered
+    by state, and read as each state is reached. Returns an iterator of
+    (state, result) pairs in the order of states, each computed only when
+    it is needed, so that the rates of one state at a time are held in
+    memory.
+    """
+    if use_snapshot():
+        snapshot = get_snapshot()
+        return (
+            (state, snapshot.get_rates(dict(params_data, state=state)))
+            for state in states or sorted(snapshot.regions)
+        )
+
+    state_regions = regions_by_state(states)
+    if states is None:
+        states = sorted(state_regions)
+
+    product_ids = get_product_table().match(params_data)
+    return iter_rates_by_state(
+        params_data,
+        states,
+        state_regions,
+        product_ids,
+        fetch_adjustment_indexes(product_ids),
+        dataset_timestamp() or "",
+    )
+
+
+def iter_rates_by_state(
+    params_data,
+    states,
+    state_regions,
+    product_ids,
+    adjustment_indexes,
+    timestamp,
+):
+    # Each region's rates are read with the first state it belongs to, and
+    # those of regions in several states kept for the later ones.
+    positions = {}
+    shared = set()
+    for position, state in enumerate(states):
+        for region_id in state_regions.get(state, ()):
+            if region_id in positions:
+                shared.add(region_id)
+            else:
+                positions[region_id] = position
+
+    region_ids = defaultdict(list)
+    for region_id, position in positions.items():
+        region_ids[position].append(region_id)
+
+    rates = filter_rates(
+        product_ids,
+        list(positions),
+        (params_data.get("min_lock", 0), params_data.get("max_lock", 0)),
+    ).annotate(
+        position=Case(
+            *(
+                When(region_id__in=ids, then=Value(position))
+                for position, ids in region_ids.items()
+            ),
+            output_field=IntegerField(),
+        )
+    )
+    groups = groupby(
+        rate_rows(rates.order_by("position", "rate_id")),
+        key=lambda row: positions[row[2]],
+    )
+    group = next(groups, None)
+
+    shared_rows = defaultdict(list)
+    for position, state in enumerate(states):
+        if state not in state_regions:
+            yield state, {"data": {}, "timestamp": None}
+            continue
+
+        rows = []
+        if group is not None and group[0] == position:
+            rows = list(group[1])
+            group = next(groups, None)
+
+        for row in rows:
+            if row[2] in shared:
+                shared_rows[row[2]].append(row)
+
+        earlier = [
+            row
+            for region_id in state_regions[state]
+            if positions[region_id] < position
+            for row in shared_rows[region_id]
+        ]
+        if earlier:
+            rows = sorted(rows + earlier)
+
+        params = dict(params_data, state=state)
+        data = rates_histogram(
+            select_rates(
+                ((row[1], row[4], row[5]) for row in rows),
+                scaled_adjustments(
+                    adjustment_indexes, {row[1] for row in rows}, params
+                ),
+                params.get("points"),
+            )
+        )
+
+        yield state, {"data": data, "timestamp": timestamp}
@@ -0,0 +1,316 @@
+"""
+Synthetic datasets and timing helpers for benchmarking the rate checker.
+
+The daily rate data is not public, so benchmarks run against generated data
+of the same shape and roughly the same size: a few thousand products, each
+offered in a handful of regions with a ladder of rates for every lock
+period, and a set of adjustment rules per product.
+"""
+
+import random
+import statistics
+import time
+from datetime import date
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from localflavor.us.us_states import STATE_CHOICES
+
+from ratechecker.models import Product
+from ratechecker.ratechecker_parameters import ParamsSerializer
+
+
+COLUMNS = {
+    "adjustment": (
+        "planid",
+        "ruleid",
+        "affectratetype",
+        "adjvalue",
+        "minloanamt",
+        "maxloanamt",
+        "proptype",
+        "minfico",
+        "maxfico",
+        "minltv",
+        "maxltv",
+        "state",
+    ),
+    "product": (
+        "planid",
+        "institution",
+        "loanpurpose",
+        "pmttype",
+        "loantype",
+        "loanterm",
+        "intadjterm",
+        "adjperiod",
+        "i/o",
+        "armindex",
+        "initialadjcap",
+        "annualcap",
+        "loancap",
+        "armmargin",
+        "aivalue",
+        "minltv",
+        "maxltv",
+        "minfico",
+        "maxfico",
+        "minloanamt",
+        "maxloanamt",
+        "singlefamily",
+        "condo",
+        "coop",
+    ),
+    "rate": (
+        "ratesid",
+        "planid",
+        "regionid",
+        "lock",
+        "baserate",
+        "totalpoints",
+    ),
+    "region": ("RegionID", "StateID"),
+}
+
+LOCKS = (30, 45, 60)
+LOAN_TYPES = [choice for choice, _ in Product.LOAN_TYPE_CHOICES]
+ARM_TERMS = (3, 5, 7, 10)
+
+
+class SyntheticDataset(object):
+    """
+    A generated daily dataset, written as the archive load_daily_data reads.
+
+    products is the number of products, each of which has rates in
+    regions_per_product regions, with rates_per_lock rates for each lock
+    period and adjustments_per_product adjustment rules.
+    """
+
+    def __init__(
+        self,
+        products=4000,
+        regions_per_state=4,
+        regions_per_product=8,
+        rates_per_lock=8,
+        adjustments_per_product=10,
+        seed=0,
+        day=None,
+    ):
+        self.products = products
+        self.regions_per_state = regions_per_state
+        self.regions_per_product = regions_per_product
+        self.rates_per_lock = rates_per_lock
+        self.adjustments_per_product = adjustments_per_product
+        self.seed = seed
+        self.day = day or date.today()
+
+    @property
+    def states(self):
+        return [state for state, _ in STATE_CHOICES]
+
+    @property
+    def rate_count(self):
+        return (
+            self.products
+            * self.regions_per_product
+            * len(LOCKS)
+            * self.rates_per_lock
+        )
+
+    def rows(self, name):
+        """Generate the rows of one data file, in COLUMNS order."""
+        rng = random.Random("{}-{}".format(self.seed, name))
+        return getattr(self, "{}_rows".format(name))(rng)
+
+    def region_rows(self, rng):
+        region_id = 0
+        for state in self.states:
+            for _ in range(self.regions_per_state):
+                region_id += 1
+                yield (region_id, state)
+
+    def product_rows(self, rng):
+        for plan_id in range(1, self.products + 1):
+            loan_type = rng.choice(LOAN_TYPES)
+            arm = rng.random() < 0.4
+            jumbo = loan_type == Product.JUMBO
+            yield (
+                plan_id,
+                "BANK{:03d}".format(rng.randrange(150)),
+                rng.choice((Product.PURCH, Product.REFI)),
+                Product.ARM if arm else Product.FIXED,
+                loan_type,
+                30 if arm else rng.choice((15, 30)),
+                rng.choice(ARM_TERMS) if arm else "",
+                1 if arm else "",
+                int(arm and rng.random() < 0.1),
+                "LIBOR" if arm else "",
+                2 if arm else "",
+                2 if arm else "",
+                5 if arm else "",
+                "2.2500" if arm else "",
+                "",
+                "1.0000",
+                "{:.4f}".format(rng.choice((80, 90, 95, 97, 100))),
+                rng.choice((580, 620, 640, 680, 700)),
+                850,
+                "453101.0000" if jumbo else "1.0000",
+                "2000000.0000" if jumbo else "453100.0000",
+                1,
+                1,
+                0,
+            )
+
+    def rate_rows(self, rng):
+        region_count = len(self.states) * self.regions_per_state
+        rate_id = 0
+        for plan_id in range(1, self.products + 1):
+            regions = rng.sample(
+                range(1, region_count + 1), self.regions_per_product
+            )
+            par_rate = rng.randrange(2750, 5250, 125)
+            for region_id in regions:
+                for lock in LOCKS:
+                    for step in range(self.rates_per_lock):
+                        rate_id += 1
+                        offset = step - self.rates_per_lock // 2
+                        yield (
+                            rate_id,
+                            plan_id,
+                            region_id,
+                            lock,
+                            "{:.3f}".format((par_rate + 125 * offset) / 1000),
+                            "{:.3f}".format(-0.375 * offset + lock / 400),
+                        )
+
+    def adjustment_rows(self, rng):
+        rule_id = 0
+        for plan_id in range(1, self.products + 1):
+            for _ in range(self.adjustments_per_product):
+                rule_id += 1
+                kind = rng.randrange(5)
+                yield (
+                    plan_id,
+                    rule_id,
+                    rng.choice(("P", "R")),
+                    "{:.3f}".format(rng.randrange(-500, 1000, 125) / 1000),
+                    "200000.00" if kind == 0 else "",
+                    "",
+                    rng.choice(("CONDO", "COOP")) if kind == 1 else "",
+                    rng.choice((620, 680)) if kind == 2 else "",
+                    rng.choice((679, 739)) if kind == 2 else "",
+                    "80.000" if kind == 3 else "",
+                    "95.000" if kind == 3 else "",
+                    rng.choice(self.states) if kind == 4 else "",
+                )
+
+    def cover_sheet(self):
+        # There are no expected results for generated data, but the cover
+        # sheet must list at least one scenario.
+        return (
+            "<data>"
+            "<ProcessDate><Date>{}</Date></ProcessDate>"
+            "<Scenarios>"
+            "<Scenario>"
+            "<ScenarioNo>0</ScenarioNo>"
+            "<AdjustedRates></AdjustedRates>"
+            "<AdjustedPoints></AdjustedPoints>"
+            "</Scenario>"
+            "</Scenarios>"
+            "</data>"
+        ).format(self.day.strftime("%Y%m%d"))
+
+    def write_archive(self, f):
+        """Write the dataset to f as a daily data zip archive."""
+        prefix = self.day.strftime("%Y%m%d")
+        with ZipFile(f, "w", ZIP_DEFLATED) as zf:
+            zf.writestr("CoverSheet.xml", self.cover_sheet())
+            for name, columns in COLUMNS.items():
+                filename = "{}_{}.txt".format(prefix, name)
+                with zf.open(filename, "w") as data:
+                    for line in self.lines(name):
+                        data.write(line.encode("utf-8"))
+
+    def lines(self, name):
+        """Generate the lines of one data file, starting with its header."""
+        yield self._line(COLUMNS[name])
+        for row in self.rows(name):
+            yield self._line(row)
+
+    @staticmethod
+    def _line(values):
+        return "\t".join(map(str, values)) + "\n"
+
+    def scenarios(self, count):
+        """Generate validated get_rates parameters for random requests."""
+        rng = random.Random("{}-scenarios".format(self.seed))
+        scenarios = []
+        while len(scenarios) < count:
+            arm = rng.random() < 0.4
+            loan_amount = rng.randrange(100000, 800000, 5000)
+            lock = rng.choice(LOCKS)
+            params = {
+                "state": rng.choice(self.states),
+                "loan_purpose": rng.choice((Product.PURCH, Product.REFI)),
+                "rate_structure": Product.ARM if arm else Product.FIXED,
+                "loan_type": rng.choice(LOAN_TYPES),
+                "loan_term": 30 if arm else rng.choice((15, 30)),
+                "loan_amount": loan_amount,
+                "price": int(loan_amount / rng.uniform(0.6, 0.97)),
+                "minfico": rng.randrange(620, 800, 20),
+                "maxfico": rng.randrange(620, 800, 20) + 19,
+                "lock": lock,
+                "min_lock": {30: 0, 45: 31, 60: 46}[lock],
+                "max_lock": lock,
+                "property_type": rng.choice(("SF", "CONDO", "COOP")),
+            }
+            if arm:
+                params["arm_type"] = "{}-1".format(rng.choice(ARM_TERMS))
+
+            serializer = ParamsSerializer(data=params)
+            if serializer.is_valid():
+                scenarios.append(serializer.validated_data)
+
+        return scenarios
+
+
+def time_calls(func, args_list, repeat=1):
+    """Call func once per item of args_list, repeat times; return seconds."""
+    timings = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def summarize(timings):
+    """Summarize call timings, in milliseconds."""
+    timings = sorted(timings)
+    return {
+        "calls": len(timings),
+        "mean": 1000 * statistics.mean(timings),
+        "median": 1000 * statistics.median(timings),
+        "p95": 1000 * timings[int(0.95 * (len(timings) - 1))],
+        "max": 1000 * timings[-1],
+    }
+
+
+def time_parsing(loader, compiled=True):
+    """
+    Parse every row of a loader's file without loading it; return seconds.
+    Rows are converted by the compiled positional converter, or read by
+    DictReader and converted by header name if compiled is False.
+    """
+    start = time.perf_counter()
+    for _ in loader.generate_field_values(compiled=compiled):
+        pass
+    return time.perf_counter() - start
+
+
+def format_summary(summary):
+    return (
+        "{calls} calls: mean {mean:.2f} ms, median {median:.2f} ms, "
+        "p95 {p95:.2f} ms, max {max:.2f} ms"
+    ).format(**summary)
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.dispatch import receiver
+
+from oahapi import timing
+from ratechecker.models import queried_version
+from ratechecker.regions import clear_region_map, dataset_version
+from ratechecker.signals import data_loaded
+
+
+class DatasetCache(object):
+    """
+    A value built from the loaded dataset, rebuilt when the data changes.
+
+    While one thread rebuilds the value, other threads keep getting the
+    previous one instead of waiting for the rebuild to finish. While an
+    inactive dataset version is queried, the value built for it is kept
+    apart, for as many versions as RATECHECKER_DATASET_VERSIONS keeps, the
+    least recently used being dropped first.
+    """
+
+    instances = weakref.WeakSet()
+
+    def __init__(self, build):
+        self.build = build
+        self._lock = threading.Lock()
+        self._entry = None
+        self._versions = OrderedDict()
+        self.instances.add(self)
+
+    def get(self):
+        queried = queried_version.get()
+        if queried is not None:
+            return self.get_version(queried)
+
+        version = dataset_version()
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        if not self._lock.acquire(blocking=entry is None):
+            return entry[1]
+
+        try:
+            entry = self._entry
+            if entry is None or entry[0] != version:
+                entry = self._entry = (version, self.build())
+            return entry[1]
+        finally:
+            self._lock.release()
+
+    def get_version(self, version):
+        """The value built for an inactive dataset version."""
+        # The tables of an inactive version only change while it is active
+        # again, which changes its activation time.
+        key = (version.pk, version.activated)
+        with self._lock:
+            value = self._versions.get(key)
+            if value is not None:
+                self._versions.move_to_end(key)
+                return value
+
+        value = self.build()
+        with self._lock:
+            self._versions[key] = value
+            max_size = getattr(settings, "RATECHECKER_DATASET_VERSIONS", 1)
+            while len(self._versions) > max(1, max_size):
+                self._versions.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+            self._versions.clear()
+
+
+class RateCache(object):
+    """
+    Bounded LRU cache of rate_checker results.
+
+    Results are keyed on the validated request parameters and the loaded
+    dataset version, so they are never served once a new dataset has been
+    loaded. The in-process cache can be backed by one of Django's caches,
+    shared between processes, by setting RATECHECKER_CACHE_BACKEND.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, "RATECHECKER_CACHE_SIZE", 0)
+
+    @property
+    def backend(self):
+        alias = getattr(settings, "RATECHECKER_CACHE_BACKEND", None)
+        if alias:
+            return caches[alias]
+
+    @staticmethod
+    def key(params_data, version=None):
+        """A canonical key for validated parameters and the loaded data."""
+        if version is None:
+            version = dataset_version()
+
+        canonical = json.dumps(
+            [
+                [str(value) for value in version],
+                sorted((k, str(v)) for k, v in params_data.items()),
+            ]
+        )
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return "ratechecker:rates:" + digest
+
+    def get(self, params_data, compute, version=None):
+        """Return cached results for params_data, or compute and cache them."""
+        return self.get_many(
+            [params_data], lambda missing: [compute(missing[0])], version
+        )[0]
+
+    def get_many(self, params_list, compute_many, version=None):
+        """
+        Return cached results for each of params_list.
+
+        compute_many is called once, with the list of parameters that are not
+        cached, and must return their results in the same order. version is
+        the loaded dataset version, if the caller has already looked it up.
+        """
+        max_size = self.max_size
+        if not max_size:
+            timing.record(cache="off")
+            return compute_many(params_list)
+
+        if version is None:
+            version = dataset_version()
+        keys = [self.key(params_data, version) for params_data in params_list]
+        results = [None] * len(keys)
+
+        hits = 0
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = cached
+                    hits += 1
+            self.hits += hits
+
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        backend = self.backend
+        if missing and backend is not None:
+            found = backend.get_many([keys[i] for i in missing])
+            for i in missing:
+                results[i] = found.get(keys[i])
+            missing = [i for i in missing if results[i] is None]
+
+        if missing:
+            computed = compute_many([params_list[i] for i in missing])
+            for i, value in zip(missing, computed):
+                results[i] = value
+
+            if backend is not None:
+                backend.set_many(
+                    {keys[i]: results[i] for i in missing},
+                    getattr(
+                        settings, "RATECHECKER_CACHE_TIMEOUT", DEFAULT_TIMEOUT
+                    ),
+                )
+
+        with self._lock:
+            self.hits += len(keys) - hits - len(missing)
+            self.misses += len(missing)
+            for key, value in zip(keys, results):
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+        timing.record(
+            cache="hits=%d misses=%d"
+            % (len(keys) - len(missing), len(missing))
+        )
+        return [dict(value) for value in results]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+rate_cache = RateCache()
+
+
+@receiver(data_loaded)
+def clear_rate_cache(sender, **kwargs):
+    rate_cache.clear()
+
+
+def clear_dataset_caches():
+    """Clear every cache of values built from the loaded dataset."""
+    for cache in list(DatasetCache.instances):
+        cache.clear()
+    rate_cache.clear()
+    clear_region_map(sender=None)
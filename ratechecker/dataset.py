@@ -1,9 +1,15 @@
 import io
+import time
 from collections import OrderedDict
-from datetime import datetime, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import time as datetime_time
+from itertools import groupby
 from xml.etree import cElementTree as ET
 from zipfile import ZipFile
 
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.utils import timezone
 from django.utils.functional import cached_property
 
@@ -15,6 +21,11 @@ from ratechecker.loader import (
 )
 
 
+def load_order(key):
+    """The stage in which the data file key is loaded by Dataset.load."""
+    return {"product": 0, "region": 2}.get(key, 1)
+
+
 class Dataset(object):
     loaders = {
         "adjustment": AdjustmentLoader,
@@ -33,32 +44,89 @@ class Dataset(object):
 
     @cached_property
     def timestamp(self):
-        ts = datetime.combine(self.cover_sheet.date, time.min)
+        ts = datetime.combine(self.cover_sheet.date, datetime_time.min)
         return timezone.make_aware(ts, timezone.get_current_timezone())
 
     @cached_property
     def filename_prefix(self):
         return self.cover_sheet.date.strftime("%Y%m%d")
 
-    def load(self):
-        # Sort the list of loaders so that Region loads last, as a bellwether
-        for key, loader_cls in sorted(self.loaders.items()):
-            try:
-                f = self.datafile(key)
-            except KeyError:
-                # The fees data is expected to be temporarily unavailable,
-                # so if the fees file is not found, we skip it and
-                # continue loading the other data types.
-                if key == "fee":
-                    continue
-                raise
-
-            # The zip file may be opened as binary, but we want to process the
-            # files that it contains as text.
-            f_text = io.TextIOWrapper(f)
-            loader = loader_cls(f_text, data_timestamp=self.timestamp)
+    def load(self, workers=None, delta=False):
+        """
+        Load each data file of the dataset.
+
+        Products load first, as adjustments and rates refer to them, and
+        Region loads last, as a bellwether. With more than one worker, the
+        files in between are loaded at the same time, each in its own thread
+        and database connection. SQLite allows a single writer at a time,
+        so that files loaded at the same time would wait on each other or
+        fail with "database is locked": with SQLite, files are always loaded
+        one at a time. The time taken to load each file is kept in timings,
+        and the stats of its loader in load_stats.
+
+        If delta is True, each file is applied to the loaded data as a change
+        set, with Loader.load_delta. Files are then loaded one at a time, on
+        the current database connection, so that the whole dataset can be
+        applied in one transaction.
+        """
+        if workers is None:
+            workers = getattr(settings, "RATECHECKER_LOAD_WORKERS", 1)
+        if connections[DEFAULT_DB_ALIAS].vendor == "sqlite":
+            workers = 1
+
+        self.timings = OrderedDict()
+        self.load_stats = OrderedDict()
+        for _, keys in groupby(
+            sorted(self.loaders, key=load_order), load_order
+        ):
+            keys = list(keys)
+            if delta:
+                for key in keys:
+                    self.load_file(key, delta=True)
+            elif workers > 1 and len(keys) > 1:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(self.load_file_in_thread, key)
+                        for key in keys
+                    ]
+                    for future in futures:
+                        future.result()
+            else:
+                for key in keys:
+                    self.load_file(key)
+
+    def load_file(self, key, delta=False):
+        try:
+            f = self.datafile(key)
+        except KeyError:
+            # The fees data is expected to be temporarily unavailable,
+            # so if the fees file is not found, we skip it and
+            # continue loading the other data types.
+            if key == "fee":
+                return
+            raise
+
+        start = time.perf_counter()
+
+        # The zip file may be opened as binary, but we want to process the
+        # files that it contains as text.
+        f_text = io.TextIOWrapper(f)
+        loader = self.loaders[key](f_text, data_timestamp=self.timestamp)
+        if delta:
+            loader.load_delta()
+        else:
             loader.load()
 
+        self.timings[key] = time.perf_counter() - start
+        self.load_stats[key] = loader.stats
+
+    def load_file_in_thread(self, key):
+        try:
+            self.load_file(key)
+        finally:
+            # Threads open their own database connections.
+            connections.close_all()
+
     def datafile(self, name):
         filename = "{}_{}.txt".format(self.filename_prefix, name)
         return self.zf.open(filename)
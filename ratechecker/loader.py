@@ -1,10 +1,21 @@
 import csv
+import functools
+import io
 import itertools
+import operator
+import queue
+import threading
+import time
+import tracemalloc
 from decimal import Decimal
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connection, connections
 from django.utils import timezone
 
 from ratechecker.models import Adjustment, Product, Rate, Region
+from ratechecker.selection import to_scaled
 
 
 class LoaderError(BaseException):
@@ -21,140 +32,666 @@ def split(iterable, chunk_size=1000):
         yield chunk
 
 
+class IdSet(object):
+    """
+    A set of integer ids, held as a bitmap for ids below max_bitmap_id,
+    which is much smaller than a set for the dense ids of a dataset file.
+    Other ids are kept in a set.
+    """
+
+    def __init__(self, max_bitmap_id=1 << 28):
+        self.bitmap = bytearray()
+        self.max_bitmap_id = max_bitmap_id
+        self.others = set()
+
+    def __contains__(self, value):
+        if not 0 <= value < self.max_bitmap_id:
+            return value in self.others
+
+        index, bit = divmod(value, 8)
+        return index < len(self.bitmap) and bool(
+            self.bitmap[index] & (1 << bit)
+        )
+
+    def add(self, value):
+        """Add value, returning whether it was not already in the set."""
+        if not 0 <= value < self.max_bitmap_id:
+            if value in self.others:
+                return False
+            self.others.add(value)
+            return True
+
+        index, bit = divmod(value, 8)
+        if index >= len(self.bitmap):
+            self.bitmap.extend(bytes(max(index + 1, 2 * len(self.bitmap))))
+        mask = 1 << bit
+        if self.bitmap[index] & mask:
+            return False
+        self.bitmap[index] |= mask
+        return True
+
+
+def pipelined(rows, chunk_size, depth):
+    """
+    Yield rows, produced on a background thread up to depth chunks of
+    chunk_size rows ahead of the caller. Exceptions raised while producing
+    rows are raised again in the caller.
+    """
+    chunks = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in split(rows, chunk_size):
+                if not put((chunk, None)):
+                    return
+        except BaseException as exc:
+            put((None, exc))
+        else:
+            put((None, None))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk, exc = chunks.get()
+            if exc is not None:
+                raise exc
+            if chunk is None:
+                return
+            yield from chunk
+    finally:
+        stop.set()
+        thread.join()
+
+
+_tracing = 0
+_tracing_started = False
+_tracing_lock = threading.Lock()
+
+
+def traces_memory(load):
+    """
+    Decorate a loading method of Loader to trace the memory allocated by
+    Python while it runs, with tracemalloc, if RATECHECKER_LOAD_TRACE_MEMORY
+    is set, and keep its peak in bytes as the peak_memory of stats.
+
+    The resource module's ru_maxrss, in kilobytes on Linux but in bytes on
+    macOS, is the peak of the whole process over its lifetime, so it cannot
+    tell one file from the next. Files loaded at the same time, by several
+    workers, share the traced peak.
+    """
+
+    @functools.wraps(load)
+    def traced_load(self):
+        global _tracing, _tracing_started
+
+        if not getattr(settings, "RATECHECKER_LOAD_TRACE_MEMORY", False):
+            return load(self)
+
+        with _tracing_lock:
+            if not _tracing:
+                _tracing_started = not tracemalloc.is_tracing()
+                if _tracing_started:
+                    tracemalloc.start()
+            _tracing += 1
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+
+        try:
+            load(self)
+        finally:
+            with _tracing_lock:
+                peak = tracemalloc.get_traced_memory()[1] - start
+                _tracing -= 1
+                if not _tracing and _tracing_started:
+                    tracemalloc.stop()
+
+        self.stats["peak_memory"] = peak
+
+    return traced_load
+
+
+def bulk_create_rows(model_cls, rows, chunk_size=1000):
+    """Insert model instances with bulk_create, in chunks."""
+    for chunk in split(rows, chunk_size):
+        model_cls.objects.bulk_create(chunk)
+
+
+def delete_rows(model_cls, pks=None):
+    """
+    Delete the rows of model_cls with the primary keys pks, or all of them
+    if pks is None, and the rows that refer to them, with one DELETE per
+    table, children first, instead of the row by row cascade of
+    QuerySet.delete. Returns the number of rows of model_cls deleted.
+    """
+    quote_name = connection.ops.quote_name
+    opts = model_cls._meta
+
+    def delete(table, column):
+        sql = "DELETE FROM {}".format(quote_name(table))
+        if pks is None:
+            cursor.execute(sql)
+        else:
+            cursor.execute(
+                "{} WHERE {} IN ({})".format(
+                    sql, quote_name(column), ", ".join(["%s"] * len(pks))
+                ),
+                pks,
+            )
+        return cursor.rowcount
+
+    if pks is not None:
+        pks = list(pks)
+    with connection.cursor() as cursor:
+        # The ratechecker foreign keys all refer to primary keys.
+        for relation in opts.related_objects:
+            delete(
+                relation.related_model._meta.db_table, relation.field.column
+            )
+        return delete(opts.db_table, opts.pk.column)
+
+
+def load_fields(model_cls):
+    """
+    The fields set by loaders that insert column values, in order. An
+    automatic primary key is left to the database.
+    """
+    opts = model_cls._meta
+    return [
+        field for field in opts.concrete_fields if field is not opts.auto_field
+    ]
+
+
+def executemany_rows(model_cls, rows, chunk_size=1000):
+    """Insert tuples of column values with executemany, in chunks."""
+    columns = [field.column for field in load_fields(model_cls)]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(model_cls._meta.db_table),
+        ", ".join(connection.ops.quote_name(column) for column in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        for chunk in split(rows, chunk_size):
+            cursor.executemany(sql, chunk)
+
+
+def copy_rows(model_cls, rows, chunk_size=10000):
+    """Stream tuples of column values into COPY ... FROM STDIN."""
+    if connection.vendor != "postgresql":
+        raise ImproperlyConfigured("The copy load backend needs PostgreSQL")
+
+    columns = [field.column for field in load_fields(model_cls)]
+    sql = "COPY {} ({}) FROM STDIN".format(
+        connection.ops.quote_name(model_cls._meta.db_table),
+        ", ".join(connection.ops.quote_name(column) for column in columns),
+    )
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, "copy"):
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            # psycopg2
+            for chunk in split(rows, chunk_size):
+                raw_cursor.copy_expert(
+                    sql + " WITH (FORMAT csv)",
+                    io.StringIO("".join(map(copy_csv_line, chunk))),
+                )
+
+
+def copy_csv_line(row):
+    """
+    A line of COPY CSV input. Values are quoted so that empty strings are
+    kept apart from NULLs, which are left empty.
+    """
+    return (
+        ",".join(
+            ("" if value is None else '"%s"' % str(value).replace('"', '""'))
+            for value in row
+        )
+        + "\n"
+    )
+
+
+# The functions inserting loaded rows for each RATECHECKER_LOAD_BACKEND, and
+# whether they take model instances or tuples of column values.
+LOAD_BACKENDS = {
+    "bulk_create": (bulk_create_rows, False),
+    "executemany": (executemany_rows, True),
+    "copy": (copy_rows, True),
+}
+
+
+def get_load_backend():
+    backend = getattr(settings, "RATECHECKER_LOAD_BACKEND", "bulk_create")
+    try:
+        return LOAD_BACKENDS[backend]
+    except KeyError:
+        raise ImproperlyConfigured(
+            "Unknown RATECHECKER_LOAD_BACKEND %r" % backend
+        )
+
+
+THOUSANDTH = Decimal(".001")
+
+
+def nullable_int(row_item):
+    if row_item.strip():
+        try:
+            return int(row_item)
+        except ValueError:
+            return int(float(row_item))
+
+
+def nullable_string(row_item):
+    row_item = row_item.strip()
+    if row_item:
+        return row_item
+
+
+def nullable_decimal(row_item):
+    row_item = row_item.strip()
+    if row_item:
+        return Decimal(row_item).quantize(THOUSANDTH)
+
+
+def quantized_decimal(row_item):
+    return Decimal(row_item).quantize(THOUSANDTH)
+
+
+def scaled_decimal(value):
+    """A Decimal in thousandths, rounded as the database stores it."""
+    return to_scaled(value.quantize(THOUSANDTH))
+
+
+def string_to_boolean(bstr):
+    if bstr.lower() == "true" or bstr == "1":
+        return True
+    elif bstr.lower() == "false" or bstr == "0":
+        return False
+
+
+def identity(row_item):
+    return row_item
+
+
+def decimal_quantum(field):
+    """The precision a decimal field is stored with, or None."""
+    if field.get_internal_type() == "DecimalField":
+        return Decimal(1).scaleb(-field.decimal_places)
+
+
 class Loader(object):
     model_cls = None
 
+    # (attname, column, conversion function) for each field read from a
+    # column. Loaders with fields parse rows positionally with a converter
+    # compiled from the header row; other loaders implement make_instance
+    # for rows read by DictReader.
+    fields = None
+
+    # The attnames identifying a row from one dataset to the next, used by
+    # load_delta.
+    natural_key = None
+
     def __init__(self, f, delimiter="\t", data_timestamp=None):
         self.f = f
         self.delimiter = delimiter
         self.data_timestamp = data_timestamp or timezone.now()
         self.count = 0
+        self.stats = None
 
+    @traces_memory
     def load(self):
-        instance_generator = self.generate_instances()
-        for chunk in split(instance_generator):
-            self.model_cls.objects.bulk_create(chunk)
+        """
+        Insert the rows of the file with the RATECHECKER_LOAD_BACKEND.
+
+        RATECHECKER_LOAD_CHUNK_SIZE rows are inserted at a time. If
+        RATECHECKER_LOAD_QUEUE_DEPTH is set, rows are parsed on a background
+        thread, at most that many chunks ahead of the inserts. The number of
+        rows, rows per second and peak memory allocated are kept in stats.
+        """
+        start = time.perf_counter()
+        chunk_size = getattr(settings, "RATECHECKER_LOAD_CHUNK_SIZE", 1000)
+        depth = getattr(settings, "RATECHECKER_LOAD_QUEUE_DEPTH", 0)
+
+        insert_rows, as_values = get_load_backend()
+        if as_values:
+            rows = self.generate_values(connections[DEFAULT_DB_ALIAS])
+        else:
+            rows = self.generate_instances()
+        if depth:
+            rows = pipelined(rows, chunk_size, depth)
+        insert_rows(self.model_cls, rows, chunk_size)
 
         if 0 == self.count:
             raise LoaderError("no instances loaded")
 
-    def generate_instances(self):
-        entries = set()
+        self.stats = self.make_stats(start)
+
+    @traces_memory
+    def load_delta(self):
+        """
+        Apply the rows of the file to the loaded data as a change set.
+
+        Rows are matched to loaded rows on natural_key, RATECHECKER_LOAD_
+        CHUNK_SIZE at a time. New rows are inserted, changed rows updated and
+        loaded rows missing from the file deleted, along with the rows that
+        refer to them. Unchanged rows are left as they are, with the data
+        timestamp of an earlier dataset: the timestamp of the dataset is
+        recorded once, by record_delta. Loaders without a natural key delete
+        and reload all rows. The number of rows inserted, updated,
+        deleted and unchanged are kept in stats, along with those of load.
+        """
+        if not self.natural_key:
+            deleted = delete_rows(self.model_cls)
+            self.load()
+            self.stats.update(
+                inserted=self.count, updated=0, deleted=deleted, unchanged=0
+            )
+            return
+
+        start = time.perf_counter()
+        chunk_size = getattr(settings, "RATECHECKER_LOAD_CHUNK_SIZE", 1000)
+        changes = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        opts = self.model_cls._meta
+        natural_key = operator.itemgetter(*self.natural_key)
+        seen = IdSet() if len(self.natural_key) == 1 else set()
+
+        compared = None
+        for chunk in split(self.generate_field_values(), chunk_size):
+            if compared is None:
+                compared = [
+                    (name, decimal_quantum(opts.get_field(name)))
+                    for name in chunk[0]
+                    if name != "data_timestamp"
+                ]
+
+            inserts, updates = [], []
+            existing = self.loaded_rows(chunk, natural_key, compared)
+            for values in chunk:
+                key = natural_key(values)
+                seen.add(key)
+                loaded = existing.get(key)
+                if loaded is None:
+                    inserts.append(self.model_cls(**values))
+                elif self.changed(values, loaded, compared):
+                    updates.append(self.model_cls(pk=loaded["pk"], **values))
+                else:
+                    changes["unchanged"] += 1
+
+            self.model_cls.objects.bulk_create(inserts)
+            if updates:
+                self.model_cls.objects.bulk_update(
+                    updates,
+                    [name for name in chunk[0] if name != opts.pk.attname],
+                    batch_size=chunk_size,
+                )
+            changes["inserted"] += len(inserts)
+            changes["updated"] += len(updates)
+
+        if 0 == self.count:
+            raise LoaderError("no instances loaded")
+
+        deleted = [
+            pk
+            for pk, *key in self.model_cls.objects.values_list(
+                "pk", *self.natural_key
+            ).iterator()
+            if (tuple(key) if len(key) > 1 else key[0]) not in seen
+        ]
+        for pks in split(deleted, chunk_size):
+            delete_rows(self.model_cls, pks)
+        changes["deleted"] = len(deleted)
+
+        self.stats = self.make_stats(start)
+        self.stats.update(changes)
+
+    def loaded_rows(self, chunk, natural_key, compared):
+        """
+        The loaded rows that may match the field values in chunk, as dicts
+        of pk and the compared fields, by natural key.
+        """
+        rows = self.model_cls.objects.filter(
+            **{
+                name + "__in": {values[name] for values in chunk}
+                for name in self.natural_key
+            }
+        ).values("pk", *(name for name, _ in compared))
+        return {natural_key(row): row for row in rows}
+
+    @staticmethod
+    def changed(values, loaded, compared):
+        """
+        Whether field values differ from those of a loaded row. compared
+        lists the names of the compared fields, with the precision of those
+        that are decimals, as values are rounded to it when stored.
+        """
+        for name, quantum in compared:
+            value = values[name]
+            if quantum is not None and value is not None:
+                value = value.quantize(quantum)
+            if value != loaded[name]:
+                return True
+        return False
+
+    def make_stats(self, start):
+        seconds = time.perf_counter() - start
+        return {
+            "rows": self.count,
+            "seconds": seconds,
+            "rows_per_second": self.count / seconds if seconds else None,
+            "peak_memory": None,
+        }
+
+    def generate_rows(self):
+        """Yield the rows of the file, skipping repeated rate ids."""
+        entries = IdSet()
         reader = csv.DictReader(self.f, delimiter=str(self.delimiter))
 
         for row in reader:
             if "ratesid" in row:
-                if row["ratesid"] not in entries:
-                    yield self.make_instance(row)
-                    entries.add(row["ratesid"])
+                if entries.add(int(row["ratesid"])):
+                    yield row
                     self.count += 1
             else:
-                yield self.make_instance(row)
+                yield row
+                self.count += 1
+
+    def generate_field_values(self, compiled=True):
+        """
+        Yield the field values of each row, by attname, skipping repeated
+        rate ids. Rows are read as csv.reader tuples and converted by
+        compile_converter, unless compiled is False or the loader has no
+        fields, when they are read by DictReader and passed to make_values.
+        """
+        if not (compiled and self.fields):
+            for row in self.generate_rows():
+                yield self.make_values(row)
+            return
+
+        reader = csv.reader(self.f, delimiter=str(self.delimiter))
+        header = next(reader, None)
+        convert = None
+        entries = IdSet()
+        for row in reader:
+            if not row:
+                continue
+            if convert is None:
+                convert, rate_id_index = self.compile_converter(header)
+
+            if rate_id_index is None or entries.add(int(row[rate_id_index])):
+                yield convert(row)
                 self.count += 1
 
+    def compile_converter(self, header):
+        """
+        Compile the conversion of rows of a file with this header row, once
+        per file. Returns the function converting a row tuple to field
+        values and the position of the rate id column, if any.
+        """
+        positions = {column: index for index, column in enumerate(header)}
+        plan = tuple(
+            (attname, positions[column], convert)
+            for attname, column, convert in self.fields
+        )
+        data_timestamp = self.data_timestamp
+        complete_values = self.complete_values
+
+        def convert(row):
+            values = {
+                attname: convert(row[index])
+                for attname, index, convert in plan
+            }
+            values["data_timestamp"] = data_timestamp
+            return complete_values(values)
+
+        return convert, positions.get("ratesid")
+
+    def generate_instances(self):
+        if not self.fields:
+            for row in self.generate_rows():
+                yield self.make_instance(row)
+            return
+
+        model_cls = self.model_cls
+        for values in self.generate_field_values():
+            yield model_cls(**values)
+
+    def generate_values(self, db):
+        """
+        Yield the column values of each row, in the order of load_fields and
+        prepared for the db connection, without creating model instances.
+
+        The connection is resolved by the caller, as the connection proxy is
+        slow to access for every value and is local to each thread.
+        """
+        fields = load_fields(self.model_cls)
+        for values in self.generate_field_values():
+            yield tuple(
+                field.get_db_prep_save(
+                    (
+                        values[field.attname]
+                        if field.attname in values
+                        else field.get_default()
+                    ),
+                    db,
+                )
+                for field in fields
+            )
+
     def make_instance(self, row):
-        raise NotImplementedError("implemented in derived classes")
+        return self.model_cls(**self.make_values(row))
 
-    @staticmethod
-    def nullable_int(row_item):
-        if row_item.strip():
-            try:
-                return int(row_item)
-            except ValueError:
-                return int(float(row_item))
+    def make_values(self, row):
+        """The field values of the model instance for a row, by attname."""
+        if not self.fields:
+            raise NotImplementedError("implemented in derived classes")
 
-    @staticmethod
-    def nullable_string(row_item):
-        if row_item.strip():
-            return row_item.strip()
+        values = {
+            attname: convert(row[column])
+            for attname, column, convert in self.fields
+        }
+        values["data_timestamp"] = self.data_timestamp
+        return self.complete_values(values)
 
-    @staticmethod
-    def nullable_decimal(row_item):
-        if row_item.strip():
-            return Decimal(row_item.strip()).quantize(Decimal(".001"))
+    def complete_values(self, values):
+        """Set the field values derived from others, returning values."""
+        return values
 
-    @staticmethod
-    def string_to_boolean(bstr):
-        if bstr.lower() == "true" or bstr == "1":
-            return True
-        elif bstr.lower() == "false" or bstr == "0":
-            return False
+    nullable_int = staticmethod(nullable_int)
+    nullable_string = staticmethod(nullable_string)
+    nullable_decimal = staticmethod(nullable_decimal)
+    scaled_decimal = staticmethod(scaled_decimal)
+    string_to_boolean = staticmethod(string_to_boolean)
 
 
 class AdjustmentLoader(Loader):
     model_cls = Adjustment
-
-    def make_instance(self, row):
-        adj_value = self.nullable_decimal(row["adjvalue"])
-
-        return self.model_cls(
-            product_id=int(row["planid"]),
-            rule_id=int(row["ruleid"]),
-            affect_rate_type=row["affectratetype"],
-            adj_value=adj_value if adj_value is not None else 0,
-            min_loan_amt=self.nullable_decimal(row["minloanamt"]),
-            max_loan_amt=self.nullable_decimal(row["maxloanamt"].strip()),
-            prop_type=self.nullable_string(row["proptype"]),
-            min_fico=self.nullable_int(row["minfico"]),
-            max_fico=self.nullable_int(row["maxfico"]),
-            min_ltv=self.nullable_decimal(row["minltv"]),
-            max_ltv=self.nullable_decimal(row["maxltv"]),
-            state=row["state"],
-            data_timestamp=self.data_timestamp,
-        )
+    natural_key = ("product_id", "rule_id")
+    fields = (
+        ("product_id", "planid", int),
+        ("rule_id", "ruleid", int),
+        ("affect_rate_type", "affectratetype", identity),
+        ("adj_value", "adjvalue", nullable_decimal),
+        ("min_loan_amt", "minloanamt", nullable_decimal),
+        ("max_loan_amt", "maxloanamt", nullable_decimal),
+        ("prop_type", "proptype", nullable_string),
+        ("min_fico", "minfico", nullable_int),
+        ("max_fico", "maxfico", nullable_int),
+        ("min_ltv", "minltv", nullable_decimal),
+        ("max_ltv", "maxltv", nullable_decimal),
+        ("state", "state", identity),
+    )
+
+    def complete_values(self, values):
+        if values["adj_value"] is None:
+            values["adj_value"] = Decimal(0)
+        values["adj_value_scaled"] = scaled_decimal(values["adj_value"])
+        return values
 
 
 class ProductLoader(Loader):
     model_cls = Product
-
-    def make_instance(self, row):
-        return self.model_cls(
-            plan_id=int(row["planid"]),
-            institution=row["institution"],
-            loan_purpose=row["loanpurpose"],
-            pmt_type=row["pmttype"],
-            loan_type=row["loantype"],
-            loan_term=int(row["loanterm"]),
-            int_adj_term=self.nullable_int(row["intadjterm"]),
-            adj_period=self.nullable_int(row["adjperiod"]),
-            io=self.string_to_boolean(row["i/o"]),
-            arm_index=self.nullable_string(row["armindex"]),
-            int_adj_cap=self.nullable_int(row["initialadjcap"]),
-            annual_cap=self.nullable_int(row["annualcap"]),
-            loan_cap=self.nullable_int(row["loancap"]),
-            arm_margin=self.nullable_decimal(row["armmargin"]),
-            ai_value=self.nullable_decimal(row["aivalue"]),
-            min_ltv=Decimal(row["minltv"]).quantize(Decimal(".001")),
-            max_ltv=Decimal(row["maxltv"]).quantize(Decimal(".001")),
-            min_fico=int(row["minfico"]),
-            max_fico=int(row["maxfico"]),
-            min_loan_amt=Decimal(row["minloanamt"]),
-            max_loan_amt=Decimal(row["maxloanamt"]),
-            data_timestamp=self.data_timestamp,
-        )
+    natural_key = ("plan_id",)
+    fields = (
+        ("plan_id", "planid", int),
+        ("institution", "institution", identity),
+        ("loan_purpose", "loanpurpose", identity),
+        ("pmt_type", "pmttype", identity),
+        ("loan_type", "loantype", identity),
+        ("loan_term", "loanterm", int),
+        ("int_adj_term", "intadjterm", nullable_int),
+        ("adj_period", "adjperiod", nullable_int),
+        ("io", "i/o", string_to_boolean),
+        ("arm_index", "armindex", nullable_string),
+        ("int_adj_cap", "initialadjcap", nullable_int),
+        ("annual_cap", "annualcap", nullable_int),
+        ("loan_cap", "loancap", nullable_int),
+        ("arm_margin", "armmargin", nullable_decimal),
+        ("ai_value", "aivalue", nullable_decimal),
+        ("min_ltv", "minltv", quantized_decimal),
+        ("max_ltv", "maxltv", quantized_decimal),
+        ("min_fico", "minfico", int),
+        ("max_fico", "maxfico", int),
+        ("min_loan_amt", "minloanamt", Decimal),
+        ("max_loan_amt", "maxloanamt", Decimal),
+    )
 
 
 class RateLoader(Loader):
     model_cls = Rate
-
-    def make_instance(self, row):
-        return self.model_cls(
-            rate_id=int(row["ratesid"]),
-            product_id=int(row["planid"]),
-            region_id=int(row["regionid"]),
-            lock=int(row["lock"]),
-            base_rate=Decimal(row["baserate"]),
-            total_points=Decimal(row["totalpoints"]),
-            data_timestamp=self.data_timestamp,
-        )
+    natural_key = ("rate_id",)
+    fields = (
+        ("rate_id", "ratesid", int),
+        ("product_id", "planid", int),
+        ("region_id", "regionid", int),
+        ("lock", "lock", int),
+        ("base_rate", "baserate", Decimal),
+        ("total_points", "totalpoints", Decimal),
+    )
+
+    def complete_values(self, values):
+        values["base_rate_scaled"] = scaled_decimal(values["base_rate"])
+        values["total_points_scaled"] = scaled_decimal(values["total_points"])
+        return values
 
 
 class RegionLoader(Loader):
     model_cls = Region
-
-    def make_instance(self, row):
-        return self.model_cls(
-            region_id=int(row["RegionID"]),
-            state_id=row["StateID"],
-            data_timestamp=self.data_timestamp,
-        )
+    fields = (
+        ("region_id", "RegionID", int),
+        ("state_id", "StateID", identity),
+    )
@@ -0,0 +1,63 @@
+import math
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from ratechecker.benchmark import LOCKS, SyntheticDataset, time_parsing
+from ratechecker.loader import RateLoader
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks parsing a generated rate file, converting rows by "
+        "header name as read by DictReader and with the compiled positional "
+        "converter. Nothing is written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rates",
+            type=int,
+            default=1000000,
+            help="Approximate number of generated rates",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of times to parse the file each way",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, **options):
+        dataset = SyntheticDataset(seed=options["seed"])
+        rates_per_product = (
+            dataset.regions_per_product * len(LOCKS) * dataset.rates_per_lock
+        )
+        dataset.products = max(
+            1, math.ceil(options["rates"] / rates_per_product)
+        )
+
+        self.stdout.write("Generating {} rates".format(dataset.rate_count))
+        with tempfile.TemporaryFile("w+", newline="") as f:
+            f.writelines(dataset.lines("rate"))
+
+            timings = {}
+            for compiled in (False, True):
+                name = "compiled" if compiled else "DictReader"
+                for _ in range(options["repeat"]):
+                    f.seek(0)
+                    seconds = time_parsing(RateLoader(f), compiled)
+                    timings[name] = min(seconds, timings.get(name, seconds))
+
+                self.stdout.write(
+                    "{}: {:.2f} s, {:,.0f} rows/s".format(
+                        name, timings[name], dataset.rate_count / timings[name]
+                    )
+                )
+
+        self.stdout.write(
+            "Speedup: {:.2f}x".format(
+                timings["DictReader"] / timings["compiled"]
+            )
+        )
@@ -0,0 +1,160 @@
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from ratechecker.benchmark import (
+    SyntheticDataset,
+    format_summary,
+    summarize,
+    time_calls,
+)
+from ratechecker.dataset import Dataset
+from ratechecker.models import Adjustment, Product, Rate, Region
+from ratechecker.products import get_product_table
+from ratechecker.views import filter_adjustments, filter_rates, get_rates
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the rate checker queries on a generated dataset, "
+        "with and without the ratechecker indexes. Runs against a new "
+        "test database, which is destroyed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=4000,
+            help="Number of generated products",
+        )
+        parser.add_argument(
+            "--regions-per-product",
+            type=int,
+            default=8,
+            help="Number of regions each product has rates in",
+        )
+        parser.add_argument(
+            "--scenarios",
+            type=int,
+            default=200,
+            help="Number of generated requests to time",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of times to run each request",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, **options):
+        self.dataset = SyntheticDataset(
+            products=options["products"],
+            regions_per_product=options["regions_per_product"],
+            seed=options["seed"],
+        )
+        scenarios = self.dataset.scenarios(options["scenarios"])
+
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            self.load()
+
+            with override_settings(
+                RATECHECKER_SNAPSHOT=False, RATECHECKER_CACHE_SIZE=0
+            ):
+                self.drop_indexes()
+                self.report("Without indexes", scenarios, options["repeat"])
+
+                self.create_indexes()
+                self.report("With indexes", scenarios, options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def load(self):
+        self.stdout.write(
+            "Generating {} products and {} rates".format(
+                self.dataset.products, self.dataset.rate_count
+            )
+        )
+        with tempfile.TemporaryFile() as f:
+            self.dataset.write_archive(f)
+            f.seek(0)
+
+            # Adjustments are loaded before the products they refer to.
+            with transaction.atomic():
+                Dataset(f).load()
+
+    def indexes(self):
+        for model in (Product, Adjustment, Rate, Region):
+            for index in model._meta.indexes:
+                yield model, index
+
+    def drop_indexes(self):
+        with connection.schema_editor() as editor:
+            for model, index in self.indexes():
+                editor.remove_index(model, index)
+
+    def create_indexes(self):
+        with connection.schema_editor() as editor:
+            for model, index in self.indexes():
+                editor.add_index(model, index)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def report(self, title, scenarios, repeat):
+        self.analyze()
+        self.stdout.write("\n" + title)
+        self.stdout.write("=" * len(title))
+
+        params = scenarios[0]
+        region_ids = list(
+            Region.objects.filter(state_id=params["state"]).values_list(
+                "region_id", flat=True
+            )
+        )
+        product_ids = get_product_table().match(params)
+        rates = filter_rates(product_ids, region_ids, params)
+        adjustments = filter_adjustments(product_ids, params)
+
+        self.stdout.write("\nRate query plan:")
+        self.stdout.write(rates.explain())
+        self.stdout.write("\nAdjustment query plan:")
+        self.stdout.write(adjustments.explain())
+
+        rate_args = []
+        for params in scenarios:
+            region_ids = list(
+                Region.objects.filter(state_id=params["state"]).values_list(
+                    "region_id", flat=True
+                )
+            )
+            product_ids = get_product_table().match(params)
+            rate_args.append((product_ids, region_ids, params))
+
+        self.stdout.write("\nRate query:")
+        self.stdout.write(
+            format_summary(
+                summarize(
+                    time_calls(
+                        lambda *args: list(filter_rates(*args)),
+                        rate_args,
+                        repeat,
+                    )
+                )
+            )
+        )
+        self.stdout.write("get_rates:")
+        self.stdout.write(
+            format_summary(
+                summarize(
+                    time_calls(get_rates, [(p,) for p in scenarios], repeat)
+                )
+            )
+        )
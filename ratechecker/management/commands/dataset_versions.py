@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ratechecker.models import DatasetVersion
+from ratechecker.versions import activate_version, active_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the kept dataset versions, newest first, or makes one of them "
+        "the active dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--activate",
+            type=date.fromisoformat,
+            metavar="YYYY-MM-DD",
+            help="Date of the dataset version to make active",
+        )
+
+    def handle(self, **options):
+        # Records data loaded before versions were kept.
+        active_version()
+
+        if options["activate"]:
+            version = DatasetVersion.objects.filter(
+                timestamp__date=options["activate"]
+            ).first()
+            if version is None:
+                raise CommandError(
+                    "No dataset version from {}".format(options["activate"])
+                )
+
+            activate_version(version)
+
+        for version in DatasetVersion.objects.all():
+            self.stdout.write(str(version))
@@ -3,10 +3,18 @@ import traceback
 import warnings
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import connection
+from django.db import transaction
 
 from ratechecker.dataset import Dataset
+from ratechecker.shadow import (
+    build_shadow_indexes,
+    create_shadow_tables,
+    drop_shadow_tables,
+    using_shadow_tables,
+)
+from ratechecker.signals import data_loaded
 from ratechecker.validation import ScenarioValidator
+from ratechecker.versions import record_delta, swap_in_dataset
 
 
 class Command(BaseCommand):
@@ -29,6 +37,23 @@ class Command(BaseCommand):
             action="store_true",
             help="Skip load and revalidate existing table",
         )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            help=(
+                "Apply only the differences from the loaded data, "
+                "in one transaction"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Number of data files to load at the same time, ignored "
+                "with SQLite "
+                "(default: the RATECHECKER_LOAD_WORKERS setting, or 1)"
+            ),
+        )
 
     def handle(self, **options):
         warnings.filterwarnings("ignore", "Unknown table.*")
@@ -37,97 +62,96 @@ class Command(BaseCommand):
         archive = options["archive_filename"]
         validate_only = options["validate_only"]
         validation_file = options.get("validation_scenario_file")
-
-        if not validate_only:
-            self.print("Copying data to temp tables")
-            self.archive_data_to_temp_tables()
+        shadow = not (validate_only or options["delta"])
 
         try:
             self.print("Loading data from", archive.name)
             dataset = Dataset(archive)
 
-            if not validate_only:
-                self.print("Loading dataset with timestamp", dataset.timestamp)
-                dataset.load()
-
-            if validation_file:
-                self.print("Validating loaded data with", validation_file.name)
-                validator = ScenarioValidator(verbose=self.verbosity)
-                validator.validate_file(validation_file, dataset)
+            if validate_only:
+                self.validate(validation_file, dataset)
+            elif options["delta"]:
+                self.load_delta(dataset, validation_file)
+            else:
+                self.load(dataset, validation_file, options.get("workers"))
         except Exception:
             self.print(traceback.format_exc())
-
-            if not validate_only:
-                self.print("Restoring old data")
-
-                self.delete_data_from_base_tables()
-                self.reload_old_data()
-
             raise CommandError("Load failed")
         finally:
-            if not validate_only:
-                self.print("Cleaning up temp tables")
-                self.delete_temp_tables()
+            if shadow:
+                # After a failed load, the live tables were never touched.
+                self.print("Cleaning up shadow tables")
+                drop_shadow_tables()
+
+        if not validate_only:
+            data_loaded.send(sender=self.__class__, dataset=dataset)
 
         self.print("Load successful")
 
+    def load(self, dataset, validation_file, workers):
+        self.print("Creating shadow tables")
+        create_shadow_tables()
+
+        self.print("Loading dataset with timestamp", dataset.timestamp)
+        with using_shadow_tables(indexes=False):
+            dataset.load(workers=workers)
+        self.print_stats(dataset)
+
+        self.print("Building indexes")
+        build_shadow_indexes()
+
+        with using_shadow_tables():
+            self.validate(validation_file, dataset)
+
+        self.print("Swapping in new data")
+        swap_in_dataset(dataset.timestamp)
+
+    def load_delta(self, dataset, validation_file):
+        # The changes are only committed once validated, so requests see
+        # either the old dataset or the new one.
+        with transaction.atomic():
+            self.print(
+                "Applying changes of dataset with timestamp",
+                dataset.timestamp,
+            )
+            dataset.load(delta=True)
+            self.print_stats(dataset)
+
+            self.validate(validation_file, dataset)
+            record_delta(dataset.timestamp)
+
+    def print_stats(self, dataset):
+        for key, seconds in dataset.timings.items():
+            self.print(
+                "Loaded {} in {:.2f}s".format(key, seconds),
+                self.format_stats(dataset.load_stats.get(key)),
+            )
+
+    def validate(self, validation_file, dataset):
+        if validation_file:
+            self.print("Validating loaded data with", validation_file.name)
+            validator = ScenarioValidator(verbose=self.verbosity)
+            validator.validate_file(validation_file, dataset)
+
+    @staticmethod
+    def format_stats(stats):
+        if not stats:
+            return ""
+
+        text = "({} rows, {:.0f} rows/s".format(
+            stats["rows"], stats["rows_per_second"] or 0
+        )
+        if stats["peak_memory"] is not None:
+            text += ", peak memory {:.0f} MB".format(
+                stats["peak_memory"] / 2**20
+            )
+        if "inserted" in stats:
+            text += (
+                ", {inserted} inserted, {updated} updated, "
+                "{deleted} deleted, {unchanged} unchanged"
+            ).format(**stats)
+        return text + ")"
+
     def print(self, *args, **kwargs):
         if self.verbosity:  # pragma: no cover
             print(*args, **kwargs)
-
-    def archive_data_to_temp_tables(self):
-        """Save data to temporary tables and delete it from normal tables."""
-        self.delete_temp_tables()
-
-        cursor = connection.cursor()
-        cursor.execute(
-            "CREATE TABLE temporary_product AS "
-            "SELECT * FROM ratechecker_product"
-        )
-        cursor.execute(
-            "CREATE TABLE temporary_region AS "
-            "SELECT * FROM ratechecker_region"
-        )
-        cursor.execute(
-            "CREATE TABLE temporary_rate AS " "SELECT * FROM ratechecker_rate"
-        )
-        cursor.execute(
-            "CREATE TABLE temporary_adjustment AS "
-            "SELECT * FROM ratechecker_adjustment"
-        )
-
-        self.delete_data_from_base_tables()
-
-    def delete_temp_tables(self):
-        """Delete temporary tables."""
-        cursor = connection.cursor()
-        cursor.execute("DROP TABLE IF EXISTS temporary_product")
-        cursor.execute("DROP TABLE IF EXISTS temporary_region")
-        cursor.execute("DROP TABLE IF EXISTS temporary_rate")
-        cursor.execute("DROP TABLE IF EXISTS temporary_adjustment")
-
-    def delete_data_from_base_tables(self):
-        """Delete current data."""
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM ratechecker_product")
-        cursor.execute("DELETE FROM ratechecker_region")
-        cursor.execute("DELETE FROM ratechecker_rate")
-        cursor.execute("DELETE FROM ratechecker_adjustment")
-
-    def reload_old_data(self):
-        """Move data from temporary tables back into the base tables."""
-        cursor = connection.cursor()
-        cursor.execute(
-            "INSERT INTO ratechecker_product "
-            "SELECT * FROM temporary_product"
-        )
-        cursor.execute(
-            "INSERT INTO ratechecker_adjustment "
-            "SELECT * FROM temporary_adjustment"
-        )
-        cursor.execute(
-            "INSERT INTO ratechecker_rate " "SELECT * FROM temporary_rate"
-        )
-        cursor.execute(
-            "INSERT INTO ratechecker_region " "SELECT * FROM temporary_region"
-        )
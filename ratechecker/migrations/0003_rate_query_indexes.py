@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ratechecker", "0002_remove_fee_loader"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="adjustment",
+            index=models.Index(
+                fields=["product", "affect_rate_type"],
+                name="adjustment_product_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=[
+                    "loan_purpose",
+                    "pmt_type",
+                    "loan_type",
+                    "loan_term",
+                    "max_ltv",
+                    "max_loan_amt",
+                    "min_loan_amt",
+                    "max_fico",
+                    "min_fico",
+                ],
+                name="product_rate_query_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rate",
+            index=models.Index(
+                fields=["region_id", "lock"], name="rate_region_lock_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rate",
+            index=models.Index(
+                fields=[
+                    "product",
+                    "region_id",
+                    "lock",
+                    "base_rate",
+                    "total_points",
+                ],
+                name="rate_covering_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:04
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Round
+
+
+def scaled(name):
+    return Cast(
+        Round(
+            F(name)
+            * Value(
+                Decimal(1000),
+                output_field=models.DecimalField(
+                    max_digits=4, decimal_places=0
+                ),
+            )
+        ),
+        models.IntegerField(),
+    )
+
+
+def fill_scaled_values(apps, schema_editor):
+    Adjustment = apps.get_model("ratechecker", "Adjustment")
+    Rate = apps.get_model("ratechecker", "Rate")
+
+    Adjustment.objects.update(adj_value_scaled=scaled("adj_value"))
+    Rate.objects.update(
+        base_rate_scaled=scaled("base_rate"),
+        total_points_scaled=scaled("total_points"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ratechecker", "0003_rate_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="rate",
+            name="rate_covering_idx",
+        ),
+        migrations.AddField(
+            model_name="adjustment",
+            name="adj_value_scaled",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="rate",
+            name="base_rate_scaled",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="rate",
+            name="total_points_scaled",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.RunPython(fill_scaled_values, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="rate",
+            index=models.Index(
+                fields=[
+                    "product",
+                    "region_id",
+                    "lock",
+                    "base_rate",
+                    "total_points",
+                    "base_rate_scaled",
+                    "total_points_scaled",
+                ],
+                name="rate_covering_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ratechecker", "0004_integer_rates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("timestamp", models.DateTimeField(unique=True)),
+                ("table_prefix", models.CharField(max_length=16, unique=True)),
+                ("active", models.BooleanField(default=False)),
+                ("loaded", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-timestamp"],
+            },
+        ),
+    ]
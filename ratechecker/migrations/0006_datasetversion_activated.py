@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ratechecker", "0005_datasetversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasetversion",
+            name="activated",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
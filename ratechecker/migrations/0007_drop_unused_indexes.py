@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ratechecker", "0006_datasetversion_activated"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="adjustment",
+            name="adjustment_product_type_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="product_rate_query_idx",
+        ),
+    ]
@@ -1,7 +1,51 @@
+from contextvars import ContextVar
+from decimal import Decimal
+
 from django.db import models
+from django.utils import timezone
 
 from localflavor.us.models import USStateField
 
+from ratechecker.selection import to_scaled
+
+
+def scaled_field_value(instance, name):
+    """
+    The value of a three decimal place field of instance, in thousandths, as
+    it is stored in the database.
+    """
+    field = instance._meta.get_field(name)
+    value = field.to_python(getattr(instance, name))
+    if value is not None:
+        return to_scaled(value.quantize(Decimal(".001")))
+
+
+# The models standing in for Product, Adjustment, Rate and Region, by model
+# name, while an inactive dataset version is queried.
+version_models = ContextVar("ratechecker_version_models", default=None)
+
+# The DatasetVersion queried through version_models.
+queried_version = ContextVar("ratechecker_queried_version", default=None)
+
+
+def querying_version():
+    """Whether an inactive dataset version is queried in this context."""
+    return version_models.get() is not None
+
+
+class DatasetManager(models.Manager):
+    """
+    Queries the active dataset, which is held in the model tables, or the
+    dataset version set in version_models.
+    """
+
+    def get_queryset(self):
+        stand_ins = version_models.get()
+        if stand_ins is not None:
+            model = stand_ins[self.model._meta.model_name]
+            return model._default_manager.get_queryset()
+        return super().get_queryset()
+
 
 # I'm not fond of how these fields are named, but I tried to balance
 # Python naming conventions with how the fields are actually referred to
@@ -88,6 +132,8 @@ class Product(models.Model):
     coop = models.BooleanField(default=False)
     data_timestamp = models.DateTimeField()
 
+    objects = DatasetManager()
+
 
 class Adjustment(models.Model):
     POINTS = "P"
@@ -111,6 +157,8 @@ class Adjustment(models.Model):
         max_length=1, choices=AFFECT_RATE_TYPE_CHOICES
     )
     adj_value = models.DecimalField(max_digits=6, decimal_places=3, null=True)
+    # adj_value in thousandths, for RATECHECKER_INTEGER_RATES.
+    adj_value_scaled = models.IntegerField(null=True)
     min_loan_amt = models.DecimalField(
         max_digits=12, decimal_places=2, null=True
     )
@@ -127,6 +175,12 @@ class Adjustment(models.Model):
     state = USStateField(null=True)
     data_timestamp = models.DateTimeField()
 
+    objects = DatasetManager()
+
+    def save(self, *args, **kwargs):
+        self.adj_value_scaled = scaled_field_value(self, "adj_value")
+        super().save(*args, **kwargs)
+
 
 class Region(models.Model):
     """This table maps regions to states."""
@@ -135,6 +189,8 @@ class Region(models.Model):
     state_id = USStateField()
     data_timestamp = models.DateTimeField()
 
+    objects = DatasetManager()
+
 
 class Rate(models.Model):
     rate_id = models.IntegerField(primary_key=True)
@@ -144,4 +200,59 @@ class Rate(models.Model):
     lock = models.PositiveSmallIntegerField()
     base_rate = models.DecimalField(max_digits=6, decimal_places=3)
     total_points = models.DecimalField(max_digits=6, decimal_places=3)
+    # base_rate and total_points in thousandths, for
+    # RATECHECKER_INTEGER_RATES.
+    base_rate_scaled = models.IntegerField(null=True)
+    total_points_scaled = models.IntegerField(null=True)
     data_timestamp = models.DateTimeField()
+
+    objects = DatasetManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["region_id", "lock"], name="rate_region_lock_idx"
+            ),
+            # Covers the columns get_rates needs from each matching rate.
+            models.Index(
+                fields=[
+                    "product",
+                    "region_id",
+                    "lock",
+                    "base_rate",
+                    "total_points",
+                    "base_rate_scaled",
+                    "total_points_scaled",
+                ],
+                name="rate_covering_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.base_rate_scaled = scaled_field_value(self, "base_rate")
+        self.total_points_scaled = scaled_field_value(self, "total_points")
+        super().save(*args, **kwargs)
+
+
+class DatasetVersion(models.Model):
+    """
+    A dataset loaded by load_daily_data, identified by its timestamp. The
+    active version is held in the model tables, and the others, kept for
+    RATECHECKER_DATASET_VERSIONS loads, in tables named with table_prefix.
+    activated is when the version was last loaded or made active; it only
+    ever increases from one activation to the next.
+    """
+
+    timestamp = models.DateTimeField(unique=True)
+    table_prefix = models.CharField(max_length=16, unique=True)
+    active = models.BooleanField(default=False)
+    loaded = models.DateTimeField(auto_now_add=True)
+    activated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-timestamp"]
+
+    def __str__(self):
+        return "{:%Y-%m-%d}{}".format(
+            self.timestamp, " (active)" if self.active else ""
+        )
@@ -0,0 +1,117 @@
+from collections import defaultdict
+
+from ratechecker.caches import DatasetCache
+from ratechecker.models import Product
+
+
+PRODUCT_FIELDS = (
+    "plan_id",
+    "institution",
+    "loan_purpose",
+    "pmt_type",
+    "loan_type",
+    "loan_term",
+    "int_adj_term",
+    "io",
+    "max_ltv",
+    "min_fico",
+    "max_fico",
+    "min_loan_amt",
+    "max_loan_amt",
+)
+
+
+def _at_least(value, limit):
+    """value >= limit, where a missing value never matches (as in SQL)."""
+    return value is not None and value >= limit
+
+
+def _at_most(value, limit):
+    """value <= limit, where a missing value never matches (as in SQL)."""
+    return value is not None and value <= limit
+
+
+def product_matches(product, params_data, data_load_testing=False):
+    """Whether a product passes the range filters of get_rates."""
+    loan_amount = params_data.get("loan_amount")
+
+    if not (
+        _at_least(product.max_ltv, params_data.get("max_ltv"))
+        and _at_least(product.max_loan_amt, loan_amount)
+        and _at_least(product.max_fico, params_data.get("maxfico"))
+        and _at_most(product.min_fico, params_data.get("minfico"))
+    ):
+        return False
+
+    if params_data.get("loan_type") != Product.FHA_HB:
+        if not _at_most(product.min_loan_amt, loan_amount):
+            return False
+
+    if params_data.get("rate_structure") == Product.ARM:
+        if product.int_adj_term != int(params_data.get("arm_type")[:-2]):
+            return False
+        if product.io != bool(params_data.get("io")):
+            return False
+
+    if data_load_testing:
+        if product.institution != params_data.get("institution"):
+            return False
+
+    return True
+
+
+class ProductTable(object):
+    """
+    The loaded products, held in memory to match them against requests.
+
+    Products are grouped on the columns get_rates matches exactly, so only
+    the range filters need to be checked for each candidate product.
+    """
+
+    def __init__(self, products):
+        self.products = products
+
+    @classmethod
+    def load(cls):
+        products = defaultdict(list)
+        for product in Product.objects.order_by("pk").values_list(
+            *PRODUCT_FIELDS, named=True
+        ):
+            key = (
+                product.loan_purpose,
+                product.pmt_type,
+                product.loan_type,
+                product.loan_term,
+            )
+            products[key].append(product)
+
+        return cls(dict(products))
+
+    def match(self, params_data, data_load_testing=False):
+        """Ids of the products that pass the product filters of get_rates."""
+        key = (
+            params_data.get("loan_purpose"),
+            params_data.get("rate_structure"),
+            params_data.get("loan_type"),
+            params_data.get("loan_term"),
+        )
+
+        return [
+            product.plan_id
+            for product in self.products.get(key, ())
+            if product_matches(product, params_data, data_load_testing)
+        ]
+
+
+_product_table = DatasetCache(ProductTable.load)
+
+
+def get_product_table():
+    """
+    The in-memory table of the currently loaded products.
+
+    It is checked against dataset_version, so in the rate views, which set
+    the version of the request with using_dataset_version, it is found
+    without a query.
+    """
+    return _product_table.get()
@@ -1,7 +1,11 @@
+import re
+from collections.abc import Mapping
 from decimal import Decimal
 
 from localflavor.us.us_states import STATE_CHOICES
 from rest_framework import serializers
+from rest_framework.fields import SkipField, empty
+from rest_framework.utils import html
 
 from ratechecker.models import Product
 
@@ -184,3 +188,141 @@ class ParamsSerializer(serializers.Serializer):
             ]  # noqa
 
         return self._errors
+
+
+class FastParamsSerializer(ParamsSerializer):
+    """
+    ParamsSerializer with a precompiled fast path, for validating the
+    parameters of each rate_checker request.
+
+    Instantiating a serializer copies and binds all of its fields, and each
+    field then runs its own validation machinery. This class instead checks
+    values against field rules compiled once from ParamsSerializer, which
+    convert the common forms directly: strings and integers that are
+    already valid. Missing values and anything else, including every
+    invalid value, are validated by the field itself, so validated_data and
+    errors are the same as ParamsSerializer's.
+    """
+
+    _compiled = None
+
+    @classmethod
+    def compile(cls):
+        """Compile the field rules of ParamsSerializer."""
+        if cls._compiled is None:
+            serializer = ParamsSerializer()
+            assert not serializer.get_validators()
+            cls._compiled = [
+                (
+                    name,
+                    field,
+                    fast_converter(field),
+                    "validate_" + name,
+                )
+                for name, field in serializer.fields.items()
+                if not field.read_only
+            ]
+        return cls._compiled
+
+    def run_validators(self, value):
+        # ParamsSerializer has no serializer-level validators, and the base
+        # implementation binds every field to look for read-only defaults.
+        pass
+
+    def to_internal_value(self, data):
+        if not isinstance(data, Mapping) or html.is_html_input(data):
+            return super().to_internal_value(data)
+
+        ret = {}
+        errors = {}
+        for name, field, convert, validate_method in self.compile():
+            value = data.get(name, empty)
+            try:
+                if value is empty:
+                    validated_value = field.run_validation(value)
+                else:
+                    validated_value = convert(value)
+                    if validated_value is empty:
+                        validated_value = field.run_validation(value)
+                validate = getattr(self, validate_method, None)
+                if validate is not None:
+                    validated_value = validate(validated_value)
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+            except SkipField:
+                pass
+            else:
+                ret[name] = validated_value
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return ret
+
+
+def fast_converter(field):
+    """
+    A function converting the common string form of values of field, and
+    returning empty for anything the field should validate itself.
+    """
+    if type(field) is serializers.IntegerField and not field.validators:
+        max_length = field.MAX_STRING_LENGTH
+
+        def convert(value):
+            if type(value) is int:
+                return value
+            if type(value) is str and len(value) <= max_length:
+                try:
+                    return int(value)
+                except ValueError:
+                    pass
+            return empty
+
+    elif (
+        type(field) is serializers.DecimalField
+        and field.max_whole_digits is not None
+        and not field.localize
+        and not field.validators
+    ):
+        pattern = re.compile(
+            r"-?\d{1,%d}(?:\.\d{0,%d})?"
+            % (field.max_whole_digits, field.decimal_places)
+        )
+
+        def convert(value):
+            if type(value) is str and pattern.fullmatch(value):
+                return field.quantize(Decimal(value))
+            return empty
+
+    elif type(field) is serializers.ChoiceField and not field.validators:
+        choices = field.choice_strings_to_values
+
+        def convert(value):
+            if type(value) is str:
+                return choices.get(value, empty)
+            return empty
+
+    elif (
+        type(field) is serializers.CharField
+        and field.trim_whitespace
+        and field.min_length is None
+    ):
+        max_length = field.max_length or float("inf")
+
+        def convert(value):
+            if (
+                type(value) is str
+                and 0 < len(value) <= max_length
+                and value.isascii()
+                and value.isprintable()
+                and value == value.strip()
+            ):
+                return value
+            return empty
+
+    else:
+
+        def convert(value):
+            return empty
+
+    return convert
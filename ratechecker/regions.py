@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.models import Max
+from django.dispatch import receiver
+
+from asgiref.sync import sync_to_async
+
+from ratechecker.models import (
+    DatasetVersion,
+    Region,
+    queried_version,
+    querying_version,
+)
+from ratechecker.signals import data_loaded
+
+
+class RegionMap(object):
+    """The loaded regions: the region ids of each state."""
+
+    def __init__(self, regions):
+        self.regions = regions
+
+    @classmethod
+    def load(cls):
+        regions = defaultdict(list)
+        for region_id, state_id in Region.objects.order_by("pk").values_list(
+            "region_id", "state_id"
+        ):
+            regions[state_id].append(region_id)
+
+        return cls(regions=dict(regions))
+
+
+class RegionMapCache(object):
+    """
+    The RegionMap and the dataset version it was loaded from, kept in memory
+    for RATECHECKER_REGION_CACHE_TTL seconds.
+
+    Once they expire, the dataset version is looked up again, one small
+    query, and the map is only reloaded if the version changed. A dataset
+    loaded by another process is so noticed within the TTL, and one loaded by
+    this process as soon as data_loaded is sent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None
+
+    def get(self):
+        """The dataset version and the RegionMap loaded from it."""
+        entry = self._entry
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1:]
+
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry[0] <= time.monotonic():
+                version = lookup_dataset_version()
+                if entry is not None and entry[1] == version:
+                    region_map = entry[2]
+                else:
+                    region_map = RegionMap.load()
+                entry = self._entry = (
+                    time.monotonic() + region_cache_ttl(),
+                    version,
+                    region_map,
+                )
+            return entry[1:]
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+
+_region_map = RegionMapCache()
+
+
+@receiver(data_loaded)
+def clear_region_map(sender, **kwargs):
+    _region_map.clear()
+
+
+# The dataset version looked up for the request being answered, if any.
+_request_version = ContextVar("ratechecker_dataset_version", default=None)
+
+
+@contextmanager
+def using_dataset_version(version):
+    """
+    Answer dataset_version with version in this context, the handling of a
+    request, so that the version is looked up once for the ETag, the
+    Last-Modified date, the caches and the timestamp of the response.
+    """
+    token = _request_version.set(version)
+    try:
+        yield
+    finally:
+        _request_version.reset(token)
+
+
+def dataset_version():
+    """
+    Identify the currently loaded dataset, as (activated, pk, timestamp).
+
+    The version set by using_dataset_version is returned without a query, and
+    so is the version of the region map while RATECHECKER_REGION_CACHE_TTL is
+    set. Otherwise it is looked up by lookup_dataset_version.
+    """
+    version = _request_version.get()
+    if version is not None:
+        return version
+
+    if region_cache_ttl():
+        return _region_map.get()[0]
+
+    return lookup_dataset_version()
+
+
+def lookup_dataset_version():
+    """
+    Query the version of the currently loaded dataset, as dataset_version.
+
+    Each run of load_daily_data records a new active DatasetVersion, and
+    activating a version records its activation time, so the activation
+    time and primary key of the active version change with every load or
+    activation, in every process. Data loaded without a recorded version is
+    identified by the newest timestamp and primary key of Region, which is
+    loaded last.
+    """
+    version = (
+        DatasetVersion.objects.filter(active=True)
+        .values_list("activated", "pk", "timestamp")
+        .first()
+    )
+    if version is not None:
+        return version
+
+    version = Region.objects.aggregate(
+        timestamp=Max("data_timestamp"), last_id=Max("pk")
+    )
+    return version["timestamp"], version["last_id"], version["timestamp"]
+
+
+def region_cache_ttl():
+    """How long to keep the region map, or None to always query Region."""
+    if querying_version():
+        return None
+    return getattr(settings, "RATECHECKER_REGION_CACHE_TTL", None)
+
+
+def get_region_map():
+    return _region_map.get()[1]
+
+
+def get_region_ids(state):
+    """Ids of the regions in a state."""
+    if region_cache_ttl():
+        return get_region_map().regions.get(state, [])
+
+    return list(
+        Region.objects.filter(state_id=state).values_list(
+            "region_id", flat=True
+        )
+    )
+
+
+async def aget_region_ids(state):
+    """Async version of get_region_ids."""
+    if region_cache_ttl():
+        return await sync_to_async(get_region_ids)(state)
+
+    return [
+        region_id
+        async for region_id in Region.objects.filter(
+            state_id=state
+        ).values_list("region_id", flat=True)
+    ]
+
+
+def regions_by_state(states=None):
+    """
+    Map states to the ids of their regions.
+
+    Only the given states are included, or every state with regions if
+    states is None. States without regions are left out.
+    """
+    if region_cache_ttl():
+        regions = get_region_map().regions
+        if states is None:
+            return dict(regions)
+        return {state: regions[state] for state in states if state in regions}
+
+    regions = defaultdict(list)
+    queryset = Region.objects.order_by("pk")
+    if states is not None:
+        queryset = queryset.filter(state_id__in=states)
+    for state_id, region_id in queryset.values_list("state_id", "region_id"):
+        regions[state_id].append(region_id)
+
+    return dict(regions)
+
+
+def dataset_timestamp():
+    """
+    The timestamp of the queried dataset, reported with its rates, or None
+    if no data is loaded.
+
+    Loads record it on the DatasetVersion once, rather than on every row: a
+    delta load leaves the rows it does not change with the timestamp of an
+    earlier dataset.
+    """
+    version = queried_version.get()
+    if version is not None:
+        return version.timestamp
+
+    return dataset_version()[2]
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.conf import settings
+
+
+# Rates, points and adjustments are all stored with three decimal places, so
+# they can be held exactly as integer counts of thousandths.
+SCALE = 1000
+
+# Rates are only offered if their adjusted points are within this distance
+# of the requested points (0.5, in thousandths).
+MAX_POINTS_DISTANCE = 500
+
+
+def use_integer_rates():
+    """
+    Whether get_rates should read rates, points and adjustments from their
+    integer columns, in thousandths, rather than their Decimal columns.
+    """
+    return getattr(settings, "RATECHECKER_INTEGER_RATES", False)
+
+
+def to_scaled(value):
+    """Convert a value with at most three decimal places to thousandths."""
+    return int(value * SCALE)
+
+
+def format_scaled(value):
+    """Format thousandths the same way as the equivalent Decimal."""
+    return str(Decimal(value).scaleb(-3))
+
+
+def select_rates(rows, adjustments, points, factor=1):
+    """
+    Pick the rate nearest to the requested points for each product.
+
+    rows is an iterable of (product_id, base_rate, total_points) tuples, in
+    thousandths, in the order the rates are stored. adjustments maps product
+    ids to a dict of summed "P" (points) and "R" (rate) adjustments, also in
+    thousandths.
+
+    This is the integer equivalent of the selection loop in get_rates,
+    including its tie-breaking. Returns a dict mapping each product id to its
+    adjusted (base_rate, total_points).
+    """
+    points = to_scaled(points)
+    available = {}
+
+    for product_id, base_rate, total_points in rows:
+        adjustment = adjustments.get(product_id)
+        if adjustment:
+            total_points += adjustment.get("P", 0)
+            base_rate += adjustment.get("R", 0)
+
+        difference = abs(points - total_points)
+        if difference > MAX_POINTS_DISTANCE:
+            continue
+
+        current = available.get(product_id)
+        if current is not None:
+            current_difference = abs(points - current[1])
+            if not (
+                difference < current_difference
+                or (
+                    difference == current_difference
+                    and factor * current[1] < 0
+                    and factor * total_points > 0
+                )
+            ):
+                continue
+
+        available[product_id] = (base_rate, total_points)
+
+    return available
+
+
+def rates_histogram(available, data_load_testing=False):
+    """
+    Build the data returned by get_rates from the selected rates.
+
+    Normally this counts the products offering each base rate. When testing
+    a data load, the adjusted points for each base rate are returned instead.
+    """
+    data = {}
+    for base_rate, total_points in available.values():
+        key = format_scaled(base_rate)
+        if data_load_testing:
+            data[key] = format_scaled(total_points)
+        else:
+            data[key] = data.get(key, 0) + 1
+
+    return data
@@ -0,0 +1,216 @@
+"""
+Shadow tables, into which a new dataset is loaded before it is swapped in.
+
+While load_daily_data loads and validates a dataset, the ratechecker models
+point at shadow tables, named with SHADOW_PREFIX, so the live tables keep
+serving the previous dataset. Once the new dataset has been validated, the
+live tables are dropped and the shadow tables renamed in their place, in one
+transaction: readers see either the old dataset or the new one. The live
+tables can instead be kept, renamed with another prefix, as a previous
+dataset version (see ratechecker.versions).
+"""
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Index
+
+from ratechecker.caches import clear_dataset_caches
+from ratechecker.models import Adjustment, Product, Rate, Region
+
+
+SHADOW_PREFIX = "shadow_"
+
+# Products come first, as adjustments and rates refer to them.
+MODELS = (Product, Adjustment, Rate, Region)
+
+# The tables and indexes of the models, without any prefix.
+BASE_TABLES = {model: model._meta.db_table for model in MODELS}
+BASE_INDEXES = {model: model._meta.indexes for model in MODELS}
+
+
+def shadow_name(name):
+    return SHADOW_PREFIX + name
+
+
+def prefixed_index(index, prefix):
+    clone = index.clone()
+    clone.name = prefix + index.name
+    return clone
+
+
+@contextmanager
+def using_tables(prefix, indexes=True):
+    """
+    Point the ratechecker models at their tables named with prefix.
+
+    This changes the models for the whole process, so it is only meant for
+    management commands. Caches built from the dataset are cleared when
+    entering and leaving the context. If indexes is False, the models have
+    no Meta.indexes while in the context.
+    """
+    saved = [
+        (model, model._meta.db_table, model._meta.indexes) for model in MODELS
+    ]
+    for model, _, _ in saved:
+        model._meta.db_table = prefix + BASE_TABLES[model]
+        model._meta.indexes = (
+            [prefixed_index(index, prefix) for index in BASE_INDEXES[model]]
+            if indexes
+            else []
+        )
+
+    clear_column_caches()
+    clear_dataset_caches()
+    try:
+        yield
+    finally:
+        for model, db_table, model_indexes in saved:
+            model._meta.db_table = db_table
+            model._meta.indexes = model_indexes
+        clear_column_caches()
+        clear_dataset_caches()
+
+
+def using_shadow_tables(indexes=True):
+    """Point the ratechecker models at their shadow tables."""
+    return using_tables(SHADOW_PREFIX, indexes)
+
+
+def clear_column_caches():
+    """
+    Forget the column references fields cache, which are qualified with the
+    table name they were first used with.
+    """
+    for model in MODELS:
+        for field in model._meta.concrete_fields:
+            field.__dict__.pop("cached_col", None)
+
+
+def edit_schema(edit):
+    """
+    Make schema changes with edit(editor) in the current transaction.
+
+    The schema editor is not used as a context manager, as on SQLite that
+    needs foreign key checks to be disabled, which cannot be done inside a
+    transaction. Deferred statements, such as creating indexes and foreign
+    key constraints, are run at the end.
+    """
+    editor = connection.schema_editor()
+    editor.deferred_sql = []
+    edit(editor)
+    for sql in editor.deferred_sql:
+        editor.execute(sql, None)
+
+
+def create_shadow_tables():
+    """
+    Create empty shadow tables, replacing any left by a failed load. Their
+    Meta.indexes are built by build_shadow_indexes once data is loaded.
+    """
+    drop_shadow_tables()
+    with using_shadow_tables(indexes=False):
+        edit_schema(
+            lambda editor: [editor.create_model(model) for model in MODELS]
+        )
+
+
+def build_shadow_indexes():
+    def edit(editor):
+        for model in MODELS:
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+
+    with using_shadow_tables():
+        edit_schema(edit)
+
+
+def drop_tables(prefix):
+    """Drop the tables named with prefix, if they exist."""
+    with connection.cursor() as cursor:
+        for model in reversed(MODELS):
+            cursor.execute(
+                "DROP TABLE IF EXISTS {}".format(
+                    connection.ops.quote_name(prefix + BASE_TABLES[model])
+                )
+            )
+
+
+def drop_shadow_tables():
+    """Drop the shadow tables, if they exist."""
+    drop_tables(SHADOW_PREFIX)
+
+
+def renamed_indexes(model, old_prefix, new_prefix):
+    """
+    Pairs of indexes on the table of model named with old_prefix, and the
+    same indexes named with new_prefix instead.
+    """
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+
+    field_names = {
+        field.column: field.name for field in model._meta.concrete_fields
+    }
+    for name, constraint in sorted(constraints.items()):
+        if (
+            constraint["index"]
+            and not constraint["primary_key"]
+            and not constraint["unique"]
+            and name.startswith(old_prefix)
+        ):
+            fields = [field_names[column] for column in constraint["columns"]]
+            yield (
+                Index(fields=fields, name=name),
+                Index(
+                    fields=fields,
+                    name=new_prefix + name.replace(old_prefix, "", 1),
+                ),
+            )
+
+
+def rename_tables(editor, old_prefix, new_prefix):
+    """
+    Rename the tables named with old_prefix, and their indexes, to be named
+    with new_prefix.
+
+    Indexes are renamed along with their tables, so that the live tables
+    keep the index names migrations refer to and tables created later can
+    reuse the names.
+    """
+    with using_tables(new_prefix):
+        for model in MODELS:
+            editor.alter_db_table(
+                model,
+                old_prefix + BASE_TABLES[model],
+                model._meta.db_table,
+            )
+            for old_index, new_index in renamed_indexes(
+                model, old_prefix, new_prefix
+            ):
+                editor.rename_index(model, old_index, new_index)
+
+
+def swap_shadow_tables(archive_prefix=None):
+    """
+    Replace the live tables with the shadow tables, in one transaction.
+
+    The live tables are dropped, or kept under archive_prefix if it is
+    given.
+    """
+
+    def edit(editor):
+        if archive_prefix:
+            rename_tables(editor, "", archive_prefix)
+        else:
+            for model in reversed(MODELS):
+                editor.delete_model(model)
+
+        rename_tables(editor, SHADOW_PREFIX, "")
+
+    with transaction.atomic():
+        edit_schema(edit)
+
+    clear_dataset_caches()
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent by the load_daily_data command once a new dataset has been loaded
+# successfully. The loaded Dataset is passed as the dataset argument.
+data_loaded = Signal()
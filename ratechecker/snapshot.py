@@ -0,0 +1,254 @@
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+
+from ratechecker import vectorized
+from ratechecker.adjustments import (
+    ADJUSTMENT_FIELDS,
+    build_adjustment_indexes,
+    sum_adjustments,
+)
+from ratechecker.caches import DatasetCache
+from ratechecker.models import Adjustment, Rate, Region, querying_version
+from ratechecker.products import ProductTable
+from ratechecker.regions import dataset_version
+from ratechecker.selection import rates_histogram, select_rates, to_scaled
+from ratechecker.vectorized import use_vectorized
+
+
+class RateColumns(object):
+    """The rates of one product, stored column-wise in compact arrays."""
+
+    __slots__ = (
+        "rate_id",
+        "region_id",
+        "lock",
+        "base_rate",
+        "total_points",
+    )
+
+    def __init__(self):
+        self.rate_id = array("q")
+        self.region_id = array("q")
+        self.lock = array("l")
+        self.base_rate = array("q")
+        self.total_points = array("q")
+
+    def append(self, rate_id, region_id, lock, base_rate, total_points):
+        self.rate_id.append(rate_id)
+        self.region_id.append(region_id)
+        self.lock.append(lock)
+        self.base_rate.append(base_rate)
+        self.total_points.append(total_points)
+
+    def __iter__(self):
+        return zip(
+            self.rate_id,
+            self.region_id,
+            self.lock,
+            self.base_rate,
+            self.total_points,
+        )
+
+
+class RateSnapshot(object):
+    """
+    The loaded rate dataset, held in memory to answer get_rates.
+
+    Rates, points and adjustment values are kept as integer thousandths, and
+    each product's adjustment rules are compiled into an AdjustmentIndex.
+    The timestamp of the dataset is stored once, as it is recorded for the
+    load.
+    """
+
+    def __init__(self, regions, products, rates, adjustments, timestamp):
+        self.regions = regions
+        self.products = products
+        self.rates = rates
+        self.adjustments = adjustments
+        self.timestamp = timestamp
+
+    @classmethod
+    def load(cls):
+        regions = defaultdict(list)
+        for region_id, state_id in Region.objects.order_by("pk").values_list(
+            "region_id", "state_id"
+        ):
+            regions[state_id].append(region_id)
+
+        rates = defaultdict(RateColumns)
+        for (
+            product_id,
+            rate_id,
+            region_id,
+            lock,
+            base_rate,
+            total_points,
+        ) in (
+            Rate.objects.order_by("product_id", "rate_id")
+            .values_list(
+                "product_id",
+                "rate_id",
+                "region_id",
+                "lock",
+                "base_rate",
+                "total_points",
+            )
+            .iterator(chunk_size=10000)
+        ):
+            rates[product_id].append(
+                rate_id,
+                region_id,
+                lock,
+                to_scaled(base_rate),
+                to_scaled(total_points),
+            )
+
+        adjustments = build_adjustment_indexes(
+            adjustment._replace(adj_value=to_scaled(adjustment.adj_value))
+            for adjustment in Adjustment.objects.order_by("pk").values_list(
+                *ADJUSTMENT_FIELDS, named=True
+            )
+            if adjustment.adj_value is not None
+        )
+
+        return cls(
+            regions=dict(regions),
+            products=ProductTable.load(),
+            rates=dict(rates),
+            adjustments=adjustments,
+            timestamp=dataset_version()[2],
+        )
+
+    def match_rates(self, product_ids, region_ids, lock_range):
+        """
+        Rates of the given products in the given regions and lock range.
+
+        Rates are returned as (rate_id, product_id, base_rate, total_points)
+        tuples, ordered by rate id like the database would.
+        """
+        min_lock, max_lock = lock_range
+        region_ids = set(region_ids)
+
+        rows = []
+        for product_id in product_ids:
+            columns = self.rates.get(product_id)
+            if columns is None:
+                continue
+
+            for (
+                rate_id,
+                region_id,
+                lock,
+                base_rate,
+                total_points,
+            ) in columns:
+                if region_id in region_ids and min_lock < lock <= max_lock:
+                    rows.append((rate_id, product_id, base_rate, total_points))
+
+        rows.sort()
+        return rows
+
+    def sum_adjustments(self, product_ids, params_data):
+        """Summed points and rate adjustments for each product."""
+        return sum_adjustments(self.adjustments, product_ids, params_data)
+
+    def get_rates(self, params_data, data_load_testing=False):
+        """Answer get_rates from memory, with identical results."""
+        factor = -1 if data_load_testing else 1
+
+        region_ids = self.regions.get(params_data.get("state"))
+        if not region_ids:
+            return {"data": {}, "timestamp": None}
+
+        if data_load_testing:
+            lock = params_data.get("lock")
+            lock_range = (lock - 1, lock)
+        else:
+            lock_range = (
+                params_data.get("min_lock", 0),
+                params_data.get("max_lock", 0),
+            )
+
+        product_ids = self.products.match(params_data, data_load_testing)
+        select = self._select_vectorized if use_vectorized() else self._select
+        data = select(
+            product_ids,
+            region_ids,
+            lock_range,
+            params_data,
+            factor,
+            data_load_testing,
+        )
+
+        return {"data": data, "timestamp": self.timestamp or ""}
+
+    def _select(
+        self,
+        product_ids,
+        region_ids,
+        lock_range,
+        params_data,
+        factor,
+        data_load_testing,
+    ):
+        rows = self.match_rates(product_ids, region_ids, lock_range)
+        adjustments = self.sum_adjustments(
+            {row[1] for row in rows}, params_data
+        )
+
+        available = select_rates(
+            (row[1:4] for row in rows),
+            adjustments,
+            params_data.get("points"),
+            factor,
+        )
+        return rates_histogram(available, data_load_testing)
+
+    def _select_vectorized(
+        self,
+        product_ids,
+        region_ids,
+        lock_range,
+        params_data,
+        factor,
+        data_load_testing,
+    ):
+        product_ids, base_rates, total_points = vectorized.match_rates(
+            self.rates, product_ids, region_ids, lock_range
+        )
+        adjustments = self.sum_adjustments(
+            set(product_ids.tolist()), params_data
+        )
+
+        product_ids, base_rates, total_points = vectorized.select_rates(
+            product_ids,
+            base_rates,
+            total_points,
+            adjustments,
+            params_data.get("points"),
+            factor,
+        )
+        return vectorized.rates_histogram(
+            base_rates, total_points, data_load_testing
+        )
+
+
+_snapshot = DatasetCache(RateSnapshot.load)
+
+
+def get_snapshot():
+    """The in-memory snapshot of the currently loaded dataset."""
+    return _snapshot.get()
+
+
+def use_snapshot():
+    """
+    Whether to answer rates from the snapshot, with RATECHECKER_SNAPSHOT.
+    Inactive dataset versions are always queried from the database.
+    """
+    return (
+        getattr(settings, "RATECHECKER_SNAPSHOT", False)
+        and not querying_version()
+    )
@@ -2,7 +2,10 @@ from datetime import date
 from io import BytesIO
 from zipfile import ZipFile
 
+from django.utils import timezone
+
 from ratechecker.dataset import Dataset
+from ratechecker.models import DatasetVersion
 
 
 def get_sample_cover_sheet(day=None):
@@ -57,3 +60,12 @@ def get_sample_dataset(day=None, datasets=None):
     if datasets is None:
         datasets = {}
     return Dataset(get_sample_dataset_zipfile(day=day, datasets=datasets))
+
+
+def record_dataset_version(timestamp=None):
+    """Record an active DatasetVersion, as load_daily_data does."""
+    return DatasetVersion.objects.create(
+        timestamp=timestamp or timezone.now(),
+        table_prefix="v_test_",
+        active=True,
+    )
@@ -0,0 +1,38 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from ratechecker.models import DatasetVersion, Region
+
+
+class DatasetVersionsTestCase(TestCase):
+    def setUp(self):
+        self.timestamp = timezone.make_aware(datetime.datetime(2026, 10, 1))
+        Region.objects.create(
+            region_id=1, state_id="VA", data_timestamp=self.timestamp
+        )
+
+    def test_lists_versions(self):
+        stdout = StringIO()
+        call_command("dataset_versions", stdout=stdout)
+        self.assertEqual(stdout.getvalue(), "2026-10-01 (active)\n")
+
+    def test_activate_unknown_version(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "dataset_versions",
+                "--activate",
+                "2026-09-30",
+                stdout=StringIO(),
+            )
+
+    def test_activate_active_version(self):
+        call_command(
+            "dataset_versions", "--activate", "2026-10-01", stdout=StringIO()
+        )
+        self.assertTrue(DatasetVersion.objects.get().active)
+        self.assertEqual(Region.objects.count(), 1)
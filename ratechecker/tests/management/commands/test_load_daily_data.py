@@ -1,12 +1,16 @@
 import os
 import shutil
 import tempfile
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
+from django.utils import timezone
 
+from ratechecker.caches import dataset_version
+from ratechecker.models import Region
+from ratechecker.signals import data_loaded
 from ratechecker.tests.helpers import write_sample_dataset
 
 
@@ -60,6 +64,27 @@ class LoadDailyTestCase(TestCase):
         )
         self.assertEqual(load.call_count, 4)
 
+    @patch("ratechecker.loader.Loader.load")
+    def test_run_command_sends_data_loaded(self, load):
+        archive_filename = os.path.join(self.tempdir, "archive.zip")
+        write_sample_dataset(archive_filename)
+
+        validation_filename = os.path.join(self.tempdir, "scenarios.jsonl")
+        self.touch_file(validation_filename)
+
+        receiver = Mock()
+        data_loaded.connect(receiver)
+        self.addCleanup(data_loaded.disconnect, receiver)
+
+        call_command(
+            "load_daily_data",
+            archive_filename,
+            "--validation-scenario-file",
+            validation_filename,
+            verbosity=0,
+        )
+        receiver.assert_called_once()
+
     @patch("ratechecker.loader.Loader.load", side_effect=RuntimeError)
     def test_run_command_calls_load_handles_load_exception(self, load):
         archive_filename = os.path.join(self.tempdir, "archive.zip")
@@ -76,3 +101,65 @@ class LoadDailyTestCase(TestCase):
                 validation_filename,
                 verbosity=0,
             )
+
+    @patch("ratechecker.loader.Loader.load", side_effect=RuntimeError)
+    def test_failed_load_keeps_data(self, load):
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=timezone.now()
+        )
+        archive_filename = os.path.join(self.tempdir, "archive.zip")
+        write_sample_dataset(archive_filename)
+
+        with self.assertRaises(CommandError):
+            call_command("load_daily_data", archive_filename, verbosity=0)
+
+        self.assertEqual(Region.objects.count(), 1)
+        self.assertEqual(Region._meta.db_table, "ratechecker_region")
+
+    def test_run_command_loads_data(self):
+        call_command(
+            "load_daily_data", "ratechecker/data/sample.zip", verbosity=0
+        )
+        self.assertEqual(Region.objects.count(), 1)
+
+    def test_reload_changes_dataset_version(self):
+        call_command(
+            "load_daily_data", "ratechecker/data/sample.zip", verbosity=0
+        )
+        version = dataset_version()
+        call_command(
+            "load_daily_data", "ratechecker/data/sample.zip", verbosity=0
+        )
+        self.assertNotEqual(dataset_version(), version)
+
+    def test_run_command_delta(self):
+        call_command(
+            "load_daily_data", "ratechecker/data/sample.zip", verbosity=0
+        )
+        call_command(
+            "load_daily_data",
+            "ratechecker/data/sample.zip",
+            "--delta",
+            verbosity=0,
+        )
+        self.assertEqual(Region.objects.count(), 1)
+
+    @patch("ratechecker.loader.Loader.load_delta")
+    def test_failed_delta_rolls_back(self, load_delta):
+        def delete_then_fail():
+            Region.objects.all().delete()
+            raise RuntimeError
+
+        load_delta.side_effect = delete_then_fail
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=timezone.now()
+        )
+        archive_filename = os.path.join(self.tempdir, "archive.zip")
+        write_sample_dataset(archive_filename)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "load_daily_data", archive_filename, "--delta", verbosity=0
+            )
+
+        self.assertEqual(Region.objects.count(), 1)
@@ -0,0 +1,135 @@
+import random
+from collections import namedtuple
+from decimal import Decimal
+from unittest import TestCase as UnitTestCase
+
+from django.test import override_settings
+
+from ratechecker.adjustments import (
+    ADJUSTMENT_FIELDS,
+    AdjustmentIndex,
+    _adjustment_indexes,
+    adjustment_applies,
+    build_adjustment_indexes,
+    sum_adjustments,
+)
+from ratechecker.tests import test_views_rate_query
+
+
+Rule = namedtuple("Rule", ADJUSTMENT_FIELDS)
+
+
+def make_rule(**kwargs):
+    values = dict.fromkeys(ADJUSTMENT_FIELDS)
+    values.update(product_id=1, affect_rate_type="P", adj_value=125)
+    values.update(kwargs)
+    return Rule(**values)
+
+
+@override_settings(RATECHECKER_ADJUSTMENT_INDEX=True)
+class AdjustmentIndexRateQueryTestCase(
+    test_views_rate_query.RateQueryTestCase
+):
+    """Run the get_rates tests with compiled adjustment indexes."""
+
+    def setUp(self):
+        super().setUp()
+        _adjustment_indexes.clear()
+
+
+class AdjustmentIndexTestCase(UnitTestCase):
+    def setUp(self):
+        self.params = {
+            "loan_amount": Decimal("200000"),
+            "property_type": "CONDO",
+            "state": "DC",
+            "minfico": 700,
+            "maxfico": 720,
+            "min_ltv": Decimal("80"),
+            "max_ltv": Decimal("80"),
+        }
+
+    def test_empty_criteria_match(self):
+        index = AdjustmentIndex([make_rule(prop_type="", state=None)])
+        self.assertEqual(index.lookup(self.params), {"P": 125})
+
+    def test_bounds_are_inclusive(self):
+        index = AdjustmentIndex(
+            [
+                make_rule(
+                    min_loan_amt=Decimal("200000"),
+                    max_loan_amt=Decimal("200000"),
+                    min_fico=700,
+                    max_fico=720,
+                    min_ltv=Decimal("80"),
+                    max_ltv=Decimal("80"),
+                )
+            ]
+        )
+        self.assertEqual(index.lookup(self.params), {"P": 125})
+
+        self.params["maxfico"] = 721
+        self.assertEqual(index.lookup(self.params), {})
+
+    def test_sums_by_rate_type(self):
+        index = AdjustmentIndex(
+            [
+                make_rule(adj_value=125),
+                make_rule(adj_value=-250),
+                make_rule(affect_rate_type="R", adj_value=500),
+                make_rule(affect_rate_type="R", state="VA", adj_value=1),
+                make_rule(adj_value=None),
+            ]
+        )
+        self.assertEqual(index.lookup(self.params), {"P": -125, "R": 500})
+
+    def test_sum_adjustments_skips_products_without_matches(self):
+        indexes = build_adjustment_indexes(
+            [make_rule(product_id=1), make_rule(product_id=2, state="VA")]
+        )
+        self.assertEqual(
+            sum_adjustments(indexes, [1, 2, 3], self.params), {1: {"P": 125}}
+        )
+
+    def test_matches_adjustment_query(self):
+        rnd = random.Random(0)
+        rules = [
+            make_rule(
+                affect_rate_type=rnd.choice("PR"),
+                adj_value=rnd.randrange(-500, 500, 125),
+                min_loan_amt=rnd.choice([None, Decimal(100000)]),
+                max_loan_amt=rnd.choice([None, Decimal(300000)]),
+                prop_type=rnd.choice([None, "", "CONDO", "COOP"]),
+                state=rnd.choice([None, "", "DC", "VA"]),
+                min_fico=rnd.choice([None, 680, 700, 720]),
+                max_fico=rnd.choice([None, 700, 720, 740]),
+                min_ltv=rnd.choice([None, Decimal(60), Decimal("80.5")]),
+                max_ltv=rnd.choice([None, Decimal(80), Decimal(95)]),
+            )
+            for _ in range(40)
+        ]
+        index = AdjustmentIndex(rules)
+
+        for _ in range(500):
+            fico = rnd.choice([660, 680, 700, 720, 740, 760])
+            ltv = Decimal(rnd.choice([50, 60, 80, "80.5", 95, 97]))
+            params = {
+                "loan_amount": Decimal(
+                    rnd.choice([50000, 100000, 300000, 400000])
+                ),
+                "property_type": rnd.choice(["SF", "CONDO", "COOP"]),
+                "state": rnd.choice(["DC", "VA", "MD"]),
+                "minfico": fico,
+                "maxfico": fico + rnd.choice([0, 19]),
+                "min_ltv": ltv,
+                "max_ltv": ltv,
+            }
+
+            expected = {}
+            for rule in rules:
+                if adjustment_applies(rule, params):
+                    expected[rule.affect_rate_type] = (
+                        expected.get(rule.affect_rate_type, 0) + rule.adj_value
+                    )
+
+            self.assertEqual(index.lookup(params), expected)
@@ -0,0 +1,113 @@
+import json
+from unittest.mock import patch
+
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync
+
+from ratechecker.models import Region
+from ratechecker.tests import test_views_rate_query
+from ratechecker.views import aget_rates, rate_checker_async
+
+
+def get_rates(params_data, data_load_testing=False, return_fees=False):
+    return async_to_sync(aget_rates)(params_data, data_load_testing)
+
+
+class AsyncRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    """Run the get_rates tests against aget_rates."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(test_views_rate_query, "get_rates", get_rates)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_state_without_regions_only_queries_regions(self):
+        self.initialize_params({"state": "IL"})
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_rates(self.params.__dict__),
+                {"data": {}, "timestamp": None},
+            )
+
+
+@override_settings(RATECHECKER_INTEGER_RATES=True)
+class AsyncIntegerRatesRateQueryTestCase(AsyncRateQueryTestCase):
+    """Run the get_rates tests against aget_rates and the integer columns."""
+
+
+@override_settings(RATECHECKER_ADJUSTMENT_INDEX=True)
+class AsyncAdjustmentIndexRateQueryTestCase(AsyncRateQueryTestCase):
+    """Run the get_rates tests against aget_rates with adjustment indexes."""
+
+
+@override_settings(RATECHECKER_SQL_SELECTION=True)
+class AsyncSqlSelectionRateQueryTestCase(AsyncRateQueryTestCase):
+    """Run the get_rates tests against aget_rates with SQL selection."""
+
+
+class RateCheckerAsyncViewTestCase(TestCase):
+    url = "/oah-api/rates/rate-checker"
+    params = {
+        "state": "DC",
+        "loan_purpose": "PURCH",
+        "rate_structure": "FIXED",
+        "loan_type": "CONF",
+        "loan_term": 30,
+        "loan_amount": 160000,
+        "price": 320000,
+        "maxfico": 700,
+        "minfico": 700,
+    }
+
+    def setUp(self):
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=timezone.now()
+        )
+
+    async def get(self, params, headers=None):
+        request = AsyncRequestFactory().get(self.url, params, headers=headers)
+        return await rate_checker_async(request)
+
+    async def test_same_response_as_sync_view(self):
+        expected = await self.async_client.get(self.url, self.params)
+        response = await self.get(self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+
+    async def test_all_locks(self):
+        params = dict(self.params, locks="all")
+        expected = await self.async_client.get(self.url, params)
+        response = await self.get(params)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(
+            list(json.loads(response.content)["locks"]), ["30", "45", "60"]
+        )
+
+    async def test_invalid(self):
+        expected = await self.async_client.get(self.url, {})
+        response = await self.get({})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), expected.json())
+
+    async def test_not_modified(self):
+        response = await self.get(self.params)
+        response = await self.get(
+            self.params, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(RATECHECKER_CACHE_SIZE=10)
+    async def test_cached(self):
+        first = await self.get(self.params)
+        second = await self.get(self.params)
+        self.assertEqual(first.content, second.content)
+
+    async def test_post_not_allowed(self):
+        request = AsyncRequestFactory().post(self.url, {})
+        response = await rate_checker_async(request)
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,379 @@
+import json
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ratechecker.batch import get_rates_batch, get_rates_by_state
+from ratechecker.caches import rate_cache
+from ratechecker.models import Region
+from ratechecker.tests import test_views_rate_query
+from ratechecker.tests.helpers import record_dataset_version
+from ratechecker.views import get_rates
+
+
+SCENARIOS = [
+    {},
+    {"rate_structure": "ARM"},
+    {"rate_structure": "ARM", "loan_term": 15},
+    {"rate_structure": "ARM", "loan_term": 15, "loan_amount": 10000},
+    {"loan_type": "FHA-HB", "loan_term": 15, "loan_amount": 10000},
+    {"loan_type": "FHA-HB", "loan_term": 15, "state": "VA"},
+    {"loan_type": "FHA"},
+    {"state": "MD"},
+    {"state": "MD", "min_lock": 0, "max_lock": 30},
+    {"state": "IL"},
+]
+
+
+class BatchRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    def scenarios(self):
+        scenarios = []
+        for values in SCENARIOS:
+            self.initialize_params(values)
+            scenarios.append(dict(self.params.__dict__))
+        return scenarios
+
+    def test_get_rates_batch_matches_get_rates(self):
+        scenarios = self.scenarios()
+        self.assertEqual(
+            get_rates_batch(scenarios),
+            [get_rates(params) for params in scenarios],
+        )
+
+    @override_settings(RATECHECKER_ADJUSTMENT_INDEX=True)
+    def test_get_rates_batch_with_adjustment_index(self):
+        self.test_get_rates_batch_matches_get_rates()
+
+    @override_settings(RATECHECKER_SNAPSHOT=True)
+    def test_get_rates_batch_with_snapshot(self):
+        self.test_get_rates_batch_matches_get_rates()
+
+    def test_get_rates_batch_shares_queries(self):
+        record_dataset_version()
+        scenarios = self.scenarios()
+        get_rates_batch(scenarios)
+
+        # Regions, the dataset version of the cached products, one rate
+        # query for each of DC, VA and MD, adjustments and the dataset
+        # timestamp.
+        with self.assertNumQueries(7):
+            get_rates_batch(scenarios)
+
+
+class BatchViewTestCase(test_views_rate_query.RateQueryTestCase):
+    url = reverse("rate-checker-batch")
+
+    def post(self, data):
+        return self.client.post(
+            self.url, json.dumps(data), content_type="application/json"
+        )
+
+    @staticmethod
+    def request_params(**values):
+        params = {
+            "state": "DC",
+            "loan_purpose": "PURCH",
+            "rate_structure": "FIXED",
+            "loan_type": "CONF",
+            "loan_term": 30,
+            "loan_amount": 160000,
+            "price": 320000,
+            "maxfico": 700,
+            "minfico": 700,
+            "lock": 60,
+            "property_type": "CONDO",
+        }
+        params.update(values)
+        return params
+
+    def test_batch(self):
+        response = self.post(
+            [
+                self.request_params(),
+                self.request_params(rate_structure="arm", arm_type="5-1"),
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["data"], {"2.275": 1, "3.705": 2})
+        self.assertEqual(results[1]["data"], {"0.125": 1})
+        self.assertEqual(results[1]["request"]["rate_structure"], "ARM")
+
+    def test_batch_matches_rate_checker(self):
+        params = self.request_params(lock=45)
+        response = self.post([params])
+        self.assertEqual(
+            response.json()["results"][0],
+            self.client.get(reverse("rate-checker"), params).json(),
+        )
+
+    def test_batch_item_errors(self):
+        response = self.post(
+            [self.request_params(state="XX"), "invalid", self.request_params()]
+        )
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertIn("state", results[0]["errors"])
+        self.assertIn("non_field_errors", results[1]["errors"])
+        self.assertEqual(results[2]["data"], {"2.275": 1, "3.705": 2})
+
+    def test_batch_not_a_list(self):
+        response = self.post(self.request_params())
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(RATECHECKER_BATCH_MAX_SIZE=2)
+    def test_batch_too_large(self):
+        response = self.post([self.request_params()] * 3)
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(RATECHECKER_CACHE_SIZE=10)
+    def test_batch_cached(self):
+        rate_cache.clear()
+        self.post([self.request_params()])
+        misses = rate_cache.stats()["misses"]
+
+        response = self.post([self.request_params(), self.request_params()])
+        self.assertEqual(
+            response.json()["results"][0], response.json()["results"][1]
+        )
+        self.assertEqual(rate_cache.stats()["misses"], misses)
+
+    def test_get_not_allowed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+
+class AllLocksViewTestCase(test_views_rate_query.RateQueryTestCase):
+    url = reverse("rate-checker")
+
+    def get(self, **params):
+        return self.client.get(
+            self.url, BatchViewTestCase.request_params(**params)
+        )
+
+    def test_all_locks(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(state="MD", locks="all", lock=45)
+        self.assertEqual(response.status_code, 200)
+
+        rate_queries = [
+            query
+            for query in queries
+            if 'FROM "ratechecker_rate"' in query["sql"]
+        ]
+        self.assertEqual(len(rate_queries), 1)
+
+        result = response.json()
+        locks = result.pop("locks")
+        self.assertEqual(result, self.get(state="MD", lock=45).json())
+        self.assertEqual(
+            locks,
+            {
+                str(lock): self.get(state="MD", lock=lock).json()["data"]
+                for lock in (30, 45, 60)
+            },
+        )
+        self.assertNotEqual(locks["30"], locks["60"])
+
+    @override_settings(RATECHECKER_CACHE_SIZE=10)
+    def test_all_locks_cached(self):
+        rate_cache.clear()
+        first = self.get(locks="all")
+        misses = rate_cache.stats()["misses"]
+        self.assertEqual(self.get(locks="all").json(), first.json())
+        self.assertEqual(rate_cache.stats()["misses"], misses)
+
+    @override_settings(RATECHECKER_CACHE_SIZE=10)
+    def test_all_locks_requested_lock_answered_once(self):
+        rate_cache.clear()
+        misses = rate_cache.stats()["misses"]
+        self.get(locks="all", lock=45)
+        # One result for each lock period, the requested one included.
+        self.assertEqual(rate_cache.stats()["misses"], misses + 3)
+
+    def test_all_locks_invalid(self):
+        response = self.get(locks="all", state="XX")
+        self.assertEqual(response.status_code, 400)
+
+
+class SweepViewTestCase(test_views_rate_query.RateQueryTestCase):
+    url = reverse("rate-checker-sweep")
+
+    def sweep(self, dimension, values, **params):
+        return self.client.get(
+            self.url,
+            dict(
+                BatchViewTestCase.request_params(**params),
+                sweep=dimension,
+                values=values,
+            ),
+        )
+
+    def assertMatchesRateChecker(self, response, **params):
+        result = dict(response.json()["results"][0])
+        result.pop("value")
+        self.assertEqual(
+            result,
+            self.client.get(
+                reverse("rate-checker"),
+                BatchViewTestCase.request_params(**params),
+            ).json(),
+        )
+
+    def test_sweep_points(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.sweep("points", "0,1,-1")
+        self.assertEqual(response.status_code, 200)
+
+        rate_queries = [
+            query
+            for query in queries
+            if 'FROM "ratechecker_rate"' in query["sql"]
+        ]
+        self.assertEqual(len(rate_queries), 1)
+
+        results = response.json()["results"]
+        self.assertEqual([r["value"] for r in results], ["0", "1", "-1"])
+        self.assertEqual(results[0]["data"], {"2.275": 1, "3.705": 2})
+        self.assertEqual(results[0]["request"]["points"], 0)
+        self.assertEqual(results[1]["request"]["points"], 1)
+
+    def test_sweep_loan_amount(self):
+        response = self.sweep("loan_amount", "300000, 160000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][1]["data"], {"2.275": 1, "3.705": 2}
+        )
+        self.assertMatchesRateChecker(response, loan_amount=300000)
+
+    def test_sweep_fico(self):
+        response = self.sweep("fico", "680-699,700")
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertEqual(results[0]["request"]["minfico"], 680)
+        self.assertEqual(results[0]["request"]["maxfico"], 699)
+        self.assertEqual(results[1]["request"]["minfico"], 700)
+        self.assertEqual(results[1]["request"]["maxfico"], 700)
+        self.assertMatchesRateChecker(response, minfico=680, maxfico=699)
+
+    def test_sweep_invalid_dimension(self):
+        response = self.sweep("lock", "30")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("sweep", response.json())
+
+    def test_sweep_missing_values(self):
+        response = self.sweep("points", "")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("values", response.json())
+
+    def test_sweep_invalid_value(self):
+        response = self.sweep("loan_amount", "100000,abc")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ["abc"])
+
+
+class StatesViewTestCase(test_views_rate_query.RateQueryTestCase):
+    url = reverse("rate-checker-states")
+
+    def get(self, **params):
+        return self.client.get(
+            self.url, BatchViewTestCase.request_params(**params)
+        )
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_states(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(state="dc, va,MD", lock=45)
+            self.assertEqual(response.status_code, 200)
+            content = self.content(response)
+
+        rate_queries = [
+            query
+            for query in queries
+            if 'FROM "ratechecker_rate"' in query["sql"]
+        ]
+        self.assertEqual(len(rate_queries), 1)
+
+        states = content["states"]
+        self.assertEqual(list(states), ["DC", "VA", "MD"])
+        for state, result in states.items():
+            expected = self.client.get(
+                reverse("rate-checker"),
+                BatchViewTestCase.request_params(state=state, lock=45),
+            ).json()
+            expected.pop("request")
+            self.assertEqual(result, expected)
+
+        self.assertEqual(content["request"]["state"], "DC, VA,MD")
+
+    def test_states_fetched_as_reached(self):
+        self.initialize_params()
+        results = get_rates_by_state(self.params.__dict__, ["DC", "VA"])
+
+        # The rates of all states are queried as the first state is reached.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(next(results)[0], "DC")
+        rate_queries = [
+            query
+            for query in queries
+            if 'FROM "ratechecker_rate"' in query["sql"]
+        ]
+        self.assertEqual(len(rate_queries), 1)
+
+    def test_region_in_several_states(self):
+        for region in Region.objects.filter(state_id="DC"):
+            Region.objects.create(
+                region_id=region.region_id,
+                state_id="MD",
+                data_timestamp=region.data_timestamp,
+            )
+
+        states = self.content(self.get(state="DC,MD"))["states"]
+        self.assertTrue(states["MD"]["data"])
+        for state, result in states.items():
+            expected = self.client.get(
+                reverse("rate-checker"),
+                BatchViewTestCase.request_params(state=state),
+            ).json()
+            expected.pop("request")
+            self.assertEqual(result, expected)
+
+    def test_all_states(self):
+        response = self.get(state="all")
+        self.assertEqual(
+            list(self.content(response)["states"]), ["DC", "MD", "VA"]
+        )
+
+    def test_state_without_regions(self):
+        response = self.get(state="DC,IL")
+        self.assertEqual(
+            self.content(response)["states"]["IL"],
+            {"data": {}, "timestamp": None},
+        )
+
+    def test_invalid_states(self):
+        response = self.get(state="DC,XX,YY")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"state": ["Invalid states: XX, YY."]}
+        )
+
+    def test_invalid_params(self):
+        response = self.get(state="DC,VA", loan_amount="abc")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("loan_amount", response.json())
+
+    @override_settings(RATECHECKER_SNAPSHOT=True)
+    def test_states_with_snapshot(self):
+        content = self.content(self.get(state="ALL"))
+        with override_settings(RATECHECKER_SNAPSHOT=False):
+            self.assertEqual(content, self.content(self.get(state="ALL")))
@@ -0,0 +1,77 @@
+from io import BytesIO, StringIO
+from unittest import TestCase as UnitTestCase
+
+from django.db import transaction
+from django.test import TestCase
+
+from ratechecker.benchmark import (
+    SyntheticDataset,
+    summarize,
+    time_calls,
+    time_parsing,
+)
+from ratechecker.dataset import Dataset
+from ratechecker.loader import RateLoader
+from ratechecker.models import Adjustment, Product, Rate, Region
+from ratechecker.views import get_rates
+
+
+class SyntheticDatasetTestCase(TestCase):
+    def setUp(self):
+        self.dataset = SyntheticDataset(
+            products=20, regions_per_product=2, rates_per_lock=4
+        )
+
+    def test_archive_loads(self):
+        f = BytesIO()
+        self.dataset.write_archive(f)
+        f.seek(0)
+
+        with transaction.atomic():
+            Dataset(f).load()
+
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(Rate.objects.count(), self.dataset.rate_count)
+        self.assertEqual(Adjustment.objects.count(), 200)
+        self.assertEqual(Region.objects.count(), len(self.dataset.states) * 4)
+
+    def test_scenarios_are_valid(self):
+        scenarios = self.dataset.scenarios(10)
+        self.assertEqual(len(scenarios), 10)
+        for params in scenarios:
+            get_rates(params)
+
+    def test_deterministic(self):
+        self.assertEqual(
+            list(self.dataset.rows("rate")),
+            list(
+                SyntheticDataset(
+                    products=20, regions_per_product=2, rates_per_lock=4
+                ).rows("rate")
+            ),
+        )
+
+    def test_lines(self):
+        lines = list(self.dataset.lines("region"))
+        self.assertEqual(lines[0], "RegionID\tStateID\n")
+        self.assertEqual(len(lines), len(self.dataset.states) * 4 + 1)
+
+    def test_time_parsing(self):
+        for compiled in (False, True):
+            loader = RateLoader(StringIO("".join(self.dataset.lines("rate"))))
+            self.assertGreater(time_parsing(loader, compiled), 0)
+            self.assertEqual(loader.count, self.dataset.rate_count)
+
+
+class TimingTestCase(UnitTestCase):
+    def test_time_calls(self):
+        calls = []
+        timings = time_calls(calls.append, [(1,), (2,)], repeat=2)
+        self.assertEqual(calls, [1, 2, 1, 2])
+        self.assertEqual(len(timings), 4)
+
+    def test_summarize(self):
+        summary = summarize([0.001, 0.003, 0.002])
+        self.assertEqual(summary["calls"], 3)
+        self.assertAlmostEqual(summary["median"], 2)
+        self.assertAlmostEqual(summary["max"], 3)
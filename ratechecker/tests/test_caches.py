@@ -0,0 +1,113 @@
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ratechecker.caches import (
+    DatasetCache,
+    RateCache,
+    dataset_version,
+    rate_cache,
+)
+from ratechecker.models import Region
+from ratechecker.signals import data_loaded
+
+
+class DatasetCacheTestCase(TestCase):
+    def test_builds_once_per_version(self):
+        build = Mock(side_effect=[1, 2])
+        cache = DatasetCache(build)
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(cache.get(), 1)
+        build.assert_called_once()
+
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=timezone.now()
+        )
+        self.assertEqual(cache.get(), 2)
+
+    def test_clear(self):
+        build = Mock(side_effect=[1, 2])
+        cache = DatasetCache(build)
+        cache.get()
+        cache.clear()
+        self.assertEqual(cache.get(), 2)
+
+    def test_dataset_version_empty(self):
+        self.assertEqual(dataset_version(), (None, None, None))
+
+
+@override_settings(RATECHECKER_CACHE_SIZE=2)
+class RateCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = RateCache()
+        self.compute = Mock(side_effect=lambda params: {"data": params["n"]})
+
+    def test_disabled_by_default(self):
+        with self.settings(RATECHECKER_CACHE_SIZE=0):
+            self.cache.get({"n": 1}, self.compute)
+            self.cache.get({"n": 1}, self.compute)
+        self.assertEqual(self.compute.call_count, 2)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_hits_and_misses(self):
+        self.assertEqual(self.cache.get({"n": 1}, self.compute), {"data": 1})
+        self.assertEqual(self.cache.get({"n": 1}, self.compute), {"data": 1})
+        self.compute.assert_called_once()
+        self.assertEqual(
+            self.cache.stats(),
+            {"hits": 1, "misses": 1, "size": 1, "max_size": 2},
+        )
+
+    def test_returns_copies(self):
+        self.cache.get({"n": 1}, self.compute)["request"] = "modified"
+        self.assertEqual(self.cache.get({"n": 1}, self.compute), {"data": 1})
+
+    def test_evicts_least_recently_used(self):
+        self.cache.get({"n": 1}, self.compute)
+        self.cache.get({"n": 2}, self.compute)
+        self.cache.get({"n": 1}, self.compute)
+        self.cache.get({"n": 3}, self.compute)
+        self.assertEqual(self.compute.call_count, 3)
+
+        self.cache.get({"n": 1}, self.compute)
+        self.assertEqual(self.compute.call_count, 3)
+        self.cache.get({"n": 2}, self.compute)
+        self.assertEqual(self.compute.call_count, 4)
+
+    def test_key_ignores_parameter_order(self):
+        self.assertEqual(
+            RateCache.key({"a": 1, "b": Decimal("2.5")}),
+            RateCache.key({"b": Decimal("2.5"), "a": 1}),
+        )
+        self.assertNotEqual(RateCache.key({"a": 1}), RateCache.key({"a": 2}))
+
+    def test_invalidated_when_data_changes(self):
+        self.cache.get({"n": 1}, self.compute)
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=timezone.now()
+        )
+        self.cache.get({"n": 1}, self.compute)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_cleared_when_data_loaded(self):
+        rate_cache.clear()
+        with patch.object(rate_cache, "clear") as clear:
+            data_loaded.send(sender=None, dataset=None)
+        clear.assert_called_once()
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            }
+        },
+        RATECHECKER_CACHE_BACKEND="default",
+    )
+    def test_shared_backend(self):
+        self.cache.get({"n": 1}, self.compute)
+        other = RateCache()
+        self.assertEqual(other.get({"n": 1}, self.compute), {"data": 1})
+        self.compute.assert_called_once()
+        self.assertEqual(other.stats()["hits"], 1)
@@ -0,0 +1,121 @@
+import datetime
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+
+from oahapi.conditional import seconds_until
+from ratechecker.models import Region
+from ratechecker.tests.helpers import record_dataset_version
+
+
+class SecondsUntilTestCase(TestCase):
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_later_today(self):
+        now = timezone.make_aware(datetime.datetime(2024, 3, 1, 5, 30))
+        self.assertEqual(seconds_until(datetime.time(6, 0), now), 30 * 60)
+
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_tomorrow(self):
+        now = timezone.make_aware(datetime.datetime(2024, 3, 1, 6, 0))
+        self.assertEqual(seconds_until(datetime.time(6, 0), now), 24 * 60 * 60)
+
+
+class RateCheckerConditionalTestCase(TestCase):
+    url = "/oah-api/rates/rate-checker"
+    status_url = "/oah-api/rates/rate-checker/status"
+    params = {
+        "state": "DC",
+        "loan_purpose": "PURCH",
+        "rate_structure": "FIXED",
+        "loan_type": "CONF",
+        "loan_term": 30,
+        "loan_amount": 160000,
+        "price": 320000,
+        "maxfico": 700,
+        "minfico": 700,
+    }
+
+    def setUp(self):
+        self.timestamp = timezone.now().replace(microsecond=0)
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=self.timestamp
+        )
+
+    def test_headers(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"])
+        self.assertEqual(
+            response["Last-Modified"], http_date(self.timestamp.timestamp())
+        )
+        self.assertFalse(response.has_header("Cache-Control"))
+
+    def test_etag_depends_on_query(self):
+        first = self.client.get(self.url, self.params)
+        second = self.client.get(self.url, dict(self.params, loan_term=15))
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_if_none_match(self):
+        record_dataset_version()
+        etag = self.client.get(self.url, self.params)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, self.params, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        response = self.client.get(
+            self.url,
+            self.params,
+            HTTP_IF_MODIFIED_SINCE=http_date(self.timestamp.timestamp()),
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_dataset(self):
+        etag = self.client.get(self.url, self.params)["ETag"]
+        Region.objects.create(
+            region_id=1,
+            state_id="DC",
+            data_timestamp=self.timestamp + datetime.timedelta(days=1),
+        )
+        response = self.client.get(
+            self.url, self.params, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(RATECHECKER_LOAD_TIME=datetime.time(6, 0))
+    def test_cache_control(self):
+        with patch(
+            "ratechecker.views.seconds_until", return_value=3600
+        ) as seconds_until:
+            response = self.client.get(self.url, self.params)
+            not_modified = self.client.get(
+                self.url, self.params, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        seconds_until.assert_called_with(datetime.time(6, 0))
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+        self.assertEqual(not_modified["Cache-Control"], "public, max-age=3600")
+
+    @override_settings(RATECHECKER_LOAD_TIME=datetime.time(6, 0))
+    def test_cache_control_not_set_on_errors(self):
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header("Cache-Control"))
+
+    def test_status(self):
+        etag = self.client.get(self.status_url)["ETag"]
+        response = self.client.get(self.status_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(
+        RATECHECKER_CACHE_SIZE=10, RATECHECKER_LOAD_TIME=datetime.time(6, 0)
+    )
+    def test_status_with_cache_stats(self):
+        response = self.client.get(self.status_url)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Last-Modified"))
+        self.assertFalse(response.has_header("Cache-Control"))
@@ -1,12 +1,15 @@
 from datetime import date, datetime
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from xml.etree.cElementTree import ParseError
 
 from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TransactionTestCase
 from django.utils import timezone
 
-from ratechecker.dataset import CoverSheet
+from ratechecker.dataset import CoverSheet, Dataset
+from ratechecker.models import Adjustment, Product, Rate, Region
 from ratechecker.tests.helpers import get_sample_dataset
 
 
@@ -36,6 +39,61 @@ class TestDataset(TestCase):
 
         loader.load.assert_called_once()
 
+    # Files are loaded in threads with databases other than SQLite.
+    @patch.object(connection, "vendor", "postgresql")
+    def test_load_order(self):
+        keys = ["adjustment", "product", "rate", "region"]
+        dataset = get_sample_dataset(
+            day=date(2017, 4, 3),
+            datasets={"20170403_%s.txt" % key: "testing" for key in keys},
+        )
+
+        for workers in (1, 4):
+            loaded = []
+            dataset.loaders = {
+                key: Mock(
+                    return_value=Mock(
+                        load=Mock(
+                            side_effect=lambda key=key: loaded.append(key)
+                        )
+                    )
+                )
+                for key in keys
+            }
+            dataset.load(workers=workers)
+
+            self.assertEqual(loaded[0], "product")
+            self.assertEqual(sorted(loaded[1:3]), ["adjustment", "rate"])
+            self.assertEqual(loaded[3], "region")
+            self.assertEqual(sorted(dataset.timings), sorted(keys))
+
+    @patch.object(connection, "vendor", "postgresql")
+    def test_load_fails_in_thread(self):
+        keys = ["adjustment", "rate"]
+        dataset = get_sample_dataset(
+            day=date(2017, 4, 3),
+            datasets={"20170403_%s.txt" % key: "testing" for key in keys},
+        )
+        loader = Mock()
+        loader.return_value.load.side_effect = RuntimeError
+        dataset.loaders = {key: loader for key in keys}
+
+        with self.assertRaises(RuntimeError):
+            dataset.load(workers=2)
+
+    @patch("ratechecker.dataset.ThreadPoolExecutor")
+    def test_load_sqlite_one_file_at_a_time(self, executor):
+        keys = ["adjustment", "rate"]
+        dataset = get_sample_dataset(
+            day=date(2017, 4, 3),
+            datasets={"20170403_%s.txt" % key: "testing" for key in keys},
+        )
+        dataset.loaders = {key: Mock() for key in keys}
+
+        dataset.load(workers=2)
+        executor.assert_not_called()
+        self.assertEqual(sorted(dataset.timings), keys)
+
     def test_load_fails_if_dataset_missing(self):
         dataset = get_sample_dataset(
             day=date(2017, 4, 3), datasets={"20170403_key.txt": "testing"}
@@ -58,6 +116,35 @@ class TestDataset(TestCase):
         self.assertEqual(f.read(), b"testing")
 
 
+class TestDatasetLoad(TransactionTestCase):
+    def load_sample(self, workers):
+        with open("ratechecker/data/sample.zip", "rb") as f:
+            Dataset(f).load(workers=workers)
+
+        return [
+            model.objects.count()
+            for model in (Product, Adjustment, Rate, Region)
+        ]
+
+    def test_load_sequential(self):
+        self.assertEqual(self.load_sample(workers=1), [1, 1, 1, 1])
+
+    def test_load_parallel(self):
+        self.assertEqual(self.load_sample(workers=3), [1, 1, 1, 1])
+
+    def test_load_delta(self):
+        self.load_sample(workers=1)
+        with open("ratechecker/data/sample.zip", "rb") as f:
+            dataset = Dataset(f)
+            dataset.load(workers=3, delta=True)
+
+        self.assertEqual(
+            [stats["unchanged"] for stats in dataset.load_stats.values()],
+            [1, 1, 1, 0],
+        )
+        self.assertEqual(dataset.load_stats["region"]["inserted"], 1)
+
+
 class TestCoverSheet(TestCase):
     def test_null_file_raises_typeerror(self):
         with self.assertRaises(TypeError):
@@ -0,0 +1,93 @@
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from model_bakery import baker
+
+from ratechecker import vectorized
+from ratechecker.models import Adjustment, Product, Rate
+from ratechecker.tests import test_views_rate_query
+
+
+@override_settings(RATECHECKER_INTEGER_RATES=True)
+class IntegerRatesRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    """Run the get_rates tests against the integer columns."""
+
+
+@override_settings(
+    RATECHECKER_INTEGER_RATES=True, RATECHECKER_ADJUSTMENT_INDEX=True
+)
+class IntegerRatesAdjustmentIndexRateQueryTestCase(
+    test_views_rate_query.RateQueryTestCase
+):
+    """Run the get_rates tests against the integer columns, with indexes."""
+
+
+@skipIf(vectorized.np is None, "NumPy is not installed")
+@override_settings(RATECHECKER_INTEGER_RATES=True, RATECHECKER_VECTORIZED=True)
+class IntegerRatesVectorizedRateQueryTestCase(
+    test_views_rate_query.RateQueryTestCase
+):
+    """Run the get_rates tests against the integer columns, vectorized."""
+
+
+class ScaledColumnsTestCase(TestCase):
+    def setUp(self):
+        self.product = baker.make(Product)
+
+    def test_rate_save(self):
+        rate = Rate.objects.create(
+            rate_id=1,
+            product=self.product,
+            region_id=1,
+            lock=30,
+            base_rate="3.875",
+            total_points=Decimal("-0.125"),
+            data_timestamp=timezone.now(),
+        )
+        rate.refresh_from_db()
+        self.assertEqual(rate.base_rate_scaled, 3875)
+        self.assertEqual(rate.total_points_scaled, -125)
+
+        rate.base_rate = Decimal("4")
+        rate.save()
+        rate.refresh_from_db()
+        self.assertEqual(rate.base_rate_scaled, 4000)
+
+    def test_rate_save_rounds_as_stored(self):
+        rate = Rate.objects.create(
+            rate_id=1,
+            product=self.product,
+            region_id=1,
+            lock=30,
+            base_rate=Decimal("3.8755"),
+            total_points=Decimal("0"),
+            data_timestamp=timezone.now(),
+        )
+        rate.refresh_from_db()
+        self.assertEqual(rate.base_rate_scaled, 3876)
+        self.assertEqual(rate.base_rate, Decimal("3.876"))
+
+    def test_adjustment_save(self):
+        adjustment = Adjustment.objects.create(
+            rule_id=1,
+            product=self.product,
+            affect_rate_type="P",
+            adj_value="-0.35",
+            data_timestamp=timezone.now(),
+        )
+        adjustment.refresh_from_db()
+        self.assertEqual(adjustment.adj_value_scaled, -350)
+
+    def test_adjustment_save_null(self):
+        adjustment = Adjustment.objects.create(
+            rule_id=1,
+            product=self.product,
+            affect_rate_type="P",
+            adj_value=None,
+            data_timestamp=timezone.now(),
+        )
+        adjustment.refresh_from_db()
+        self.assertIsNone(adjustment.adj_value_scaled)
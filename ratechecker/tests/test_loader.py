@@ -1,22 +1,29 @@
+import itertools
+import tracemalloc
+from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.base import ContentFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from model_bakery import baker
 
 from ratechecker.loader import (
     AdjustmentLoader,
+    IdSet,
     Loader,
     LoaderError,
     ProductLoader,
     RateLoader,
     RegionLoader,
+    copy_csv_line,
+    pipelined,
     split,
 )
-from ratechecker.models import Product
+from ratechecker.models import Adjustment, Product, Rate, Region
 
 
 class TestSplit(TestCase):
@@ -33,6 +40,48 @@ class TestSplit(TestCase):
         self.assertListEqual(chunks, [[1, 2], [3, 4]])
 
 
+class TestIdSet(TestCase):
+    def test_add(self):
+        ids = IdSet(max_bitmap_id=100)
+        for value in (0, 7, 8, 99, 100, -1, 10**12):
+            self.assertTrue(ids.add(value))
+            self.assertFalse(ids.add(value))
+        self.assertTrue(ids.add(98))
+
+    def test_contains(self):
+        ids = IdSet(max_bitmap_id=100)
+        ids.add(7)
+        ids.add(100)
+        self.assertIn(7, ids)
+        self.assertIn(100, ids)
+        self.assertNotIn(8, ids)
+        self.assertNotIn(99, ids)
+        self.assertNotIn(1000, ids)
+        self.assertNotIn(-1, ids)
+
+
+class TestPipelined(TestCase):
+    def test_rows(self):
+        rows = pipelined(iter(range(10)), chunk_size=3, depth=1)
+        self.assertEqual(list(rows), list(range(10)))
+
+    def test_empty(self):
+        self.assertEqual(list(pipelined(iter([]), 3, 1)), [])
+
+    def test_error(self):
+        def rows():
+            yield 1
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            list(pipelined(rows(), chunk_size=1, depth=1))
+
+    def test_consumer_stops(self):
+        rows = pipelined(itertools.count(), chunk_size=2, depth=1)
+        self.assertEqual(next(rows), 0)
+        rows.close()
+
+
 class UserLoader(Loader):
     model_cls = User
 
@@ -124,6 +173,67 @@ class TestLoader(TestCase):
         self.assertIsNone(Loader.string_to_boolean(""))
 
 
+class TestCompiledConverter(TestCase):
+    def values(self, loader_cls, text, compiled):
+        loader = loader_cls(ContentFile(text), data_timestamp=self.ts)
+        return list(loader.generate_field_values(compiled=compiled)), loader
+
+    def assertSameValues(self, loader_cls, text, count):
+        expected, _ = self.values(loader_cls, text, compiled=False)
+        values, loader = self.values(loader_cls, text, compiled=True)
+        self.assertEqual(values, expected)
+        self.assertEqual(loader.count, count)
+
+    def setUp(self):
+        self.ts = timezone.now()
+
+    def test_product(self):
+        self.assertSameValues(
+            ProductLoader,
+            "coop\tplanid\tinstitution\tloanpurpose\tpmttype\tloantype\t"
+            "loanterm\tintadjterm\tadjperiod\ti/o\tarmindex\t"
+            "initialadjcap\tannualcap\tloancap\tarmmargin\taivalue\t"
+            "minltv\tmaxltv\tminfico\tmaxfico\tminloanamt\tmaxloanamt\n"
+            "0\t1\tBANK\tPURCH\tARM\tCONF\t30\t5\t1\t0\tLIBOR\t2\t2\t5\t"
+            "2.25\t1.5\t1.0000\t97.0000\t620\t850\t1.0000\t400000.0000\n"
+            "1\t2\tBANK\tPURCH\tFIXED\tCONF\t30\t\t\tfalse\t\t\t\t\t"
+            "\t\t1\t90\t700\t850\t1\t100000\n",
+            2,
+        )
+
+    def test_adjustment(self):
+        self.assertSameValues(
+            AdjustmentLoader,
+            "state\tplanid\truleid\taffectratetype\tadjvalue\tminloanamt\t"
+            "maxloanamt\tproptype\tminfico\tmaxfico\tminltv\tmaxltv\n"
+            "\t1\t1\tP\t-0.25\t\t\t\t640\t660\t90\t99\n"
+            "DC\t2\t2\tR\t\t1000\t 2000 \tCONDO\t\t\t\t\n",
+            2,
+        )
+
+    def test_rate(self):
+        self.assertSameValues(
+            RateLoader,
+            "planid\tratesid\tregionid\tlock\tbaserate\ttotalpoints\n"
+            "1\t1\t1\t30\t4.375\t0.500\n"
+            "\n"
+            "2\t2\t2\t60\t3.8755\t-0.125\n"
+            "2\t1\t1\t45\t5\t1\n",
+            2,
+        )
+
+    def test_region(self):
+        self.assertSameValues(RegionLoader, "StateID\tRegionID\nDC\t1\n", 1)
+
+    def test_empty(self):
+        self.assertSameValues(RegionLoader, "RegionID\tStateID\n", 0)
+        self.assertSameValues(RegionLoader, "", 0)
+
+    def test_missing_column(self):
+        with self.assertRaises(KeyError):
+            self.values(RegionLoader, "RegionID\n1\n", compiled=True)
+
+
 class LoaderTestCaseMixin(object):
     loader_cls = None
 
@@ -171,6 +281,14 @@ class TestAdjustmentLoader(LoaderTestCaseMixin, TestCase):
         self.row["adjvalue"] = ""
         self.assertEqual(self.load().adj_value, Decimal(0))
 
+    def test_load_adj_value_scaled(self):
+        self.row["adjvalue"] = "-0.125"
+        self.assertEqual(self.load().adj_value_scaled, -125)
+
+    def test_load_adj_value_scaled_none(self):
+        self.row["adjvalue"] = ""
+        self.assertEqual(self.load().adj_value_scaled, 0)
+
     def test_min_loan_amt(self):
         self.assertEqual(self.load().min_loan_amt, Decimal(1000))
 
@@ -381,6 +499,13 @@ class TestRateLoader(LoaderTestCaseMixin, TestCase):
     def test_total_points(self):
         self.assertEqual(self.load().total_points, Decimal(90))
 
+    def test_base_rate_scaled(self):
+        self.row["baserate"] = "3.875"
+        self.assertEqual(self.load().base_rate_scaled, 3875)
+
+    def test_total_points_scaled(self):
+        self.assertEqual(self.load().total_points_scaled, 90000)
+
 
 class TestRegionLoader(LoaderTestCaseMixin, TestCase):
     loader_cls = RegionLoader
@@ -396,3 +521,259 @@ class TestRegionLoader(LoaderTestCaseMixin, TestCase):
 
     def test_state_id(self):
         self.assertEqual(self.load().state_id, "NY")
+
+
+class TestLoadBackends(TestCase):
+    models = (Product, Adjustment, Rate, Region)
+
+    def load(self, ts):
+        RegionLoader(
+            ContentFile("RegionID\tStateID\n1\tDC\n2\tVA\n"),
+            data_timestamp=ts,
+        ).load()
+        ProductLoader(
+            ContentFile(
+                "planid\tinstitution\tloanpurpose\tpmttype\tloantype\t"
+                "loanterm\tintadjterm\tadjperiod\ti/o\tarmindex\t"
+                "initialadjcap\tannualcap\tloancap\tarmmargin\taivalue\t"
+                "minltv\tmaxltv\tminfico\tmaxfico\tminloanamt\tmaxloanamt\n"
+                "1\tBANK\tPURCH\tARM\tCONF\t30\t5\t1\t0\tLIBOR\t2\t2\t5\t"
+                "2.25\t1.5\t1.0000\t97.0000\t620\t850\t1.0000\t400000.0000\n"
+                "2\tBANK\tPURCH\tFIXED\tCONF\t30\t\t\tfalse\t\t\t\t\t"
+                "\t\t1\t90\t700\t850\t1\t100000\n"
+            ),
+            data_timestamp=ts,
+        ).load()
+        AdjustmentLoader(
+            ContentFile(
+                "planid\truleid\taffectratetype\tadjvalue\tminloanamt\t"
+                "maxloanamt\tproptype\tminfico\tmaxfico\tminltv\tmaxltv\t"
+                "state\n"
+                "1\t1\tP\t-0.25\t\t\t\t640\t660\t90\t99\t\n"
+                "2\t2\tR\t\t1000\t 2000 \tCONDO\t\t\t\t\tDC\n"
+            ),
+            data_timestamp=ts,
+        ).load()
+        RateLoader(
+            ContentFile(
+                "ratesid\tplanid\tregionid\tlock\tbaserate\ttotalpoints\n"
+                "1\t1\t1\t30\t4.375\t0.500\n"
+                "2\t2\t2\t60\t3.8755\t-0.125\n"
+                "1\t2\t1\t45\t5\t1\n"
+            ),
+            data_timestamp=ts,
+        ).load()
+
+    def loaded(self):
+        return {
+            model.__name__: [
+                {name: value for name, value in row.items() if name != "id"}
+                for row in model.objects.order_by("pk").values()
+            ]
+            for model in self.models
+        }
+
+    def test_executemany_same_as_bulk_create(self):
+        ts = timezone.now()
+        self.load(ts)
+        expected = self.loaded()
+        for model in self.models:
+            model.objects.all().delete()
+
+        with self.settings(RATECHECKER_LOAD_BACKEND="executemany"):
+            self.load(ts)
+        self.assertEqual(self.loaded(), expected)
+        self.assertEqual(len(expected["Rate"]), 2)
+
+    def test_pipelined_same_as_bulk_create(self):
+        ts = timezone.now()
+        self.load(ts)
+        expected = self.loaded()
+        for backend in ("bulk_create", "executemany"):
+            for model in self.models:
+                model.objects.all().delete()
+
+            with self.settings(
+                RATECHECKER_LOAD_BACKEND=backend,
+                RATECHECKER_LOAD_CHUNK_SIZE=1,
+                RATECHECKER_LOAD_QUEUE_DEPTH=1,
+            ):
+                self.load(ts)
+            self.assertEqual(self.loaded(), expected)
+
+    def test_stats(self):
+        loader = RegionLoader(ContentFile("RegionID\tStateID\n1\tDC\n"))
+        loader.load()
+        self.assertEqual(loader.stats["rows"], 1)
+        self.assertGreater(loader.stats["rows_per_second"], 0)
+        self.assertIsNone(loader.stats["peak_memory"])
+
+    @override_settings(RATECHECKER_LOAD_TRACE_MEMORY=True)
+    def test_stats_peak_memory(self):
+        rows = "".join("{}\tDC\n".format(i) for i in range(1000))
+        loader = RegionLoader(ContentFile("RegionID\tStateID\n" + rows))
+        loader.load()
+        self.assertGreater(loader.stats["peak_memory"], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @override_settings(RATECHECKER_LOAD_BACKEND="executemany")
+    def test_executemany_empty(self):
+        with self.assertRaises(LoaderError):
+            RegionLoader(ContentFile("RegionID\tStateID\n")).load()
+
+    @override_settings(RATECHECKER_LOAD_BACKEND="copy")
+    def test_copy_needs_postgresql(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RegionLoader(ContentFile("RegionID\tStateID\n1\tDC\n")).load()
+
+    @override_settings(RATECHECKER_LOAD_BACKEND="unknown")
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RegionLoader(ContentFile("RegionID\tStateID\n1\tDC\n")).load()
+
+    def test_copy_csv_line(self):
+        self.assertEqual(
+            copy_csv_line((1, None, "", 'say "hi"', Decimal("0.500"), True)),
+            '"1",,"","say ""hi""","0.500","True"\n',
+        )
+
+
+class TestLoadDelta(TestCase):
+    rate_header = "ratesid\tplanid\tregionid\tlock\tbaserate\ttotalpoints\n"
+    adjustment_header = (
+        "planid\truleid\taffectratetype\tadjvalue\tminloanamt\t"
+        "maxloanamt\tproptype\tminfico\tmaxfico\tminltv\tmaxltv\tstate\n"
+    )
+
+    def setUp(self):
+        self.ts = timezone.now()
+        for plan_id in (1, 2):
+            baker.make(Product, plan_id=plan_id)
+        RateLoader(
+            ContentFile(
+                self.rate_header + "1\t1\t1\t30\t4.375\t0.500\n"
+                "2\t1\t1\t60\t3.8755\t-0.125\n"
+                "3\t2\t1\t45\t5\t1\n"
+            ),
+            data_timestamp=self.ts,
+        ).load()
+
+    def load_delta(self, loader_cls, text, ts):
+        loader = loader_cls(ContentFile(text), data_timestamp=ts)
+        loader.load_delta()
+        return loader.stats
+
+    def test_rates(self):
+        ts = self.ts + timedelta(days=1)
+        stats = self.load_delta(
+            RateLoader,
+            self.rate_header + "1\t1\t1\t30\t4.375\t0.5\n"
+            "2\t1\t1\t60\t3.876\t-0.250\n"
+            "4\t2\t1\t30\t3.5\t0\n",
+            ts,
+        )
+        self.assertEqual(
+            [
+                stats[name]
+                for name in ("inserted", "updated", "deleted", "unchanged")
+            ],
+            [1, 1, 1, 1],
+        )
+        self.assertEqual(stats["rows"], 3)
+        self.assertEqual(
+            list(
+                Rate.objects.order_by("pk").values_list(
+                    "rate_id", "total_points", "total_points_scaled"
+                )
+            ),
+            [
+                (1, Decimal("0.5"), 500),
+                (2, Decimal("-0.25"), -250),
+                (4, Decimal("0"), 0),
+            ],
+        )
+        # Only the rows written have the timestamp of the new dataset.
+        self.assertEqual(
+            list(
+                Rate.objects.order_by("pk").values_list(
+                    "rate_id", "data_timestamp"
+                )
+            ),
+            [(1, self.ts), (2, ts), (4, ts)],
+        )
+
+    def test_deleted_products_delete_their_rows(self):
+        baker.make(Adjustment, product_id=2, rule_id=1)
+        stats = self.load_delta(
+            ProductLoader,
+            "planid\tinstitution\tloanpurpose\tpmttype\tloantype\t"
+            "loanterm\tintadjterm\tadjperiod\ti/o\tarmindex\t"
+            "initialadjcap\tannualcap\tloancap\tarmmargin\taivalue\t"
+            "minltv\tmaxltv\tminfico\tmaxfico\tminloanamt\tmaxloanamt\n"
+            "1\tBANK\tPURCH\tFIXED\tCONF\t30\t\t\tfalse\t\t\t\t\t"
+            "\t\t1\t90\t700\t850\t1\t100000\n",
+            self.ts,
+        )
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(list(Product.objects.values_list("plan_id")), [(1,)])
+        self.assertEqual(
+            sorted(Rate.objects.values_list("rate_id", flat=True)), [1, 2]
+        )
+        self.assertFalse(Adjustment.objects.exists())
+
+    def test_unchanged_after_rounding(self):
+        stats = self.load_delta(
+            RateLoader,
+            self.rate_header + "1\t1\t1\t30\t4.375\t0.500\n"
+            "2\t1\t1\t60\t3.8755\t-0.125\n"
+            "3\t2\t1\t45\t5\t1\n",
+            self.ts,
+        )
+        self.assertEqual(stats["unchanged"], 3)
+        self.assertEqual(stats["inserted"] + stats["updated"], 0)
+
+    def test_composite_natural_key(self):
+        AdjustmentLoader(
+            ContentFile(
+                self.adjustment_header + "1\t1\tP\t-0.25\t\t\t\t\t\t\t\t\n"
+                "1\t2\tR\t0.5\t\t\t\t\t\t\t\tVA\n"
+                "2\t1\tP\t1\t\t\t\t\t\t\t\t\n"
+            ),
+            data_timestamp=self.ts,
+        ).load()
+        pk = Adjustment.objects.get(product_id=2, rule_id=1).pk
+
+        stats = self.load_delta(
+            AdjustmentLoader,
+            self.adjustment_header + "1\t2\tR\t0.5\t\t\t\t\t\t\t\tVA\n"
+            "2\t1\tP\t0.75\t\t\t\t\t\t\t\t\n"
+            "2\t2\tP\t1\t\t\t\t\t\t\t\t\n",
+            self.ts,
+        )
+        self.assertEqual(
+            [
+                stats[name]
+                for name in ("inserted", "updated", "deleted", "unchanged")
+            ],
+            [1, 1, 1, 1],
+        )
+        self.assertEqual(Adjustment.objects.get(pk=pk).adj_value_scaled, 750)
+        self.assertEqual(
+            sorted(Adjustment.objects.values_list("product_id", "rule_id")),
+            [(1, 2), (2, 1), (2, 2)],
+        )
+
+    def test_no_natural_key_reloads(self):
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=self.ts
+        )
+        stats = self.load_delta(
+            RegionLoader, "RegionID\tStateID\n1\tDC\n2\tVA\n", self.ts
+        )
+        self.assertEqual(stats["inserted"], 2)
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(Region.objects.count(), 2)
+
+    def test_empty(self):
+        with self.assertRaises(LoaderError):
+            self.load_delta(RateLoader, self.rate_header, self.ts)
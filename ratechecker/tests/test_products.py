@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from model_bakery import baker
+
+from ratechecker.models import Product, Rate, Region
+from ratechecker.products import (
+    ProductTable,
+    _product_table,
+    get_product_table,
+)
+from ratechecker.regions import dataset_version, using_dataset_version
+from ratechecker.views import get_rates
+
+
+class ProductTableTestCase(TestCase):
+    def setUp(self):
+        _product_table.clear()
+        self.params = {
+            "state": "DC",
+            "loan_purpose": "PURCH",
+            "rate_structure": "FIXED",
+            "loan_type": "CONF",
+            "loan_term": 30,
+            "loan_amount": Decimal("200000"),
+            "max_ltv": Decimal("80"),
+            "min_ltv": Decimal("80"),
+            "maxfico": 700,
+            "minfico": 700,
+            "min_lock": 45,
+            "max_lock": 60,
+            "points": 0,
+            "arm_type": "5-1",
+            "io": 0,
+        }
+
+    def make_product(self, plan_id, **kwargs):
+        values = {
+            "plan_id": plan_id,
+            "institution": "BANK",
+            "loan_purpose": "PURCH",
+            "pmt_type": "FIXED",
+            "loan_type": "CONF",
+            "loan_term": 30,
+            "io": False,
+            "max_ltv": Decimal("95"),
+            "min_fico": 620,
+            "max_fico": 850,
+            "min_loan_amt": Decimal("1"),
+            "max_loan_amt": Decimal("500000"),
+        }
+        values.update(kwargs)
+        return baker.make(Product, **values)
+
+    def match(self, params=None, data_load_testing=False):
+        return ProductTable.load().match(
+            dict(self.params, **(params or {})), data_load_testing
+        )
+
+    def test_match_exact_columns(self):
+        self.make_product(1)
+        self.make_product(2, loan_term=15)
+        self.make_product(3, loan_type="FHA")
+        self.assertEqual(self.match(), [1])
+        self.assertEqual(self.match({"loan_term": 15}), [2])
+
+    def test_match_ranges(self):
+        self.make_product(1, max_ltv=Decimal("75"))
+        self.make_product(2, max_ltv=None)
+        self.make_product(3, min_fico=720)
+        self.make_product(4, max_loan_amt=Decimal("150000"))
+        self.make_product(5)
+        self.assertEqual(self.match(), [5])
+
+    def test_match_high_balance_ignores_min_loan_amount(self):
+        self.make_product(1, loan_type="FHA-HB", min_loan_amt=Decimal("1e6"))
+        self.assertEqual(self.match({"loan_type": "FHA-HB"}), [1])
+
+    def test_match_arm(self):
+        self.make_product(1, pmt_type="ARM", int_adj_term=5)
+        self.make_product(2, pmt_type="ARM", int_adj_term=7)
+        self.make_product(3, pmt_type="ARM", int_adj_term=5, io=True)
+        self.assertEqual(self.match({"rate_structure": "ARM"}), [1])
+        self.assertEqual(
+            self.match({"rate_structure": "ARM", "arm_type": "7-1"}), [2]
+        )
+
+    def test_match_data_load_testing(self):
+        self.make_product(1)
+        self.make_product(2, institution="OTHER")
+        self.assertEqual(
+            self.match({"institution": "OTHER"}, data_load_testing=True), [2]
+        )
+
+    def test_request_version_reused(self):
+        self.make_product(1)
+        get_product_table()
+        with using_dataset_version(dataset_version()):
+            with self.assertNumQueries(0):
+                self.assertEqual(get_product_table().match(self.params), [1])
+
+    def test_get_rates_does_not_join_products(self):
+        now = timezone.now()
+        self.make_product(1)
+        Region.objects.create(region_id=1, state_id="DC", data_timestamp=now)
+        Rate.objects.create(
+            rate_id=1,
+            product_id=1,
+            region_id=1,
+            lock=60,
+            base_rate=Decimal("3.5"),
+            total_points=Decimal("0"),
+            data_timestamp=now,
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = get_rates(self.params)
+
+        self.assertEqual(result["data"], {"3.500": 1})
+        rate_queries = [
+            query["sql"]
+            for query in queries
+            if 'FROM "ratechecker_rate"' in query["sql"]
+        ]
+        self.assertEqual(len(rate_queries), 1)
+        self.assertNotIn("ratechecker_product", rate_queries[0])
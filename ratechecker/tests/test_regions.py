@@ -0,0 +1,143 @@
+import datetime
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ratechecker import regions
+from ratechecker.caches import dataset_version
+from ratechecker.models import Region
+from ratechecker.regions import (
+    RegionMap,
+    _region_map,
+    dataset_timestamp,
+    get_region_ids,
+    regions_by_state,
+)
+from ratechecker.signals import data_loaded
+from ratechecker.tests import test_views_rate_query
+from ratechecker.tests.helpers import record_dataset_version
+from ratechecker.views import get_rates
+
+
+class RegionMapTestCase(TestCase):
+    def setUp(self):
+        _region_map.clear()
+        self.older = timezone.now() - datetime.timedelta(days=1)
+        self.newer = timezone.now()
+        Region.objects.create(
+            region_id=2, state_id="VA", data_timestamp=self.newer
+        )
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=self.older
+        )
+        Region.objects.create(
+            region_id=3, state_id="VA", data_timestamp=self.newer
+        )
+
+    def test_load(self):
+        region_map = RegionMap.load()
+        self.assertEqual(region_map.regions, {"VA": [2, 3], "DC": [1]})
+
+    def test_dataset_timestamp(self):
+        self.assertEqual(dataset_timestamp(), self.newer)
+
+    def test_dataset_timestamp_recorded(self):
+        # As after a delta load that changed no region.
+        version = record_dataset_version(self.newer + datetime.timedelta(1))
+        self.assertEqual(dataset_timestamp(), version.timestamp)
+
+    def test_load_empty(self):
+        Region.objects.all().delete()
+        region_map = RegionMap.load()
+        self.assertEqual(region_map.regions, {})
+        self.assertIsNone(dataset_timestamp())
+
+    def assertSameWithAndWithoutCache(self, func, *args):
+        expected = func(*args)
+        with self.settings(RATECHECKER_REGION_CACHE_TTL=60):
+            self.assertEqual(func(*args), expected)
+
+    def test_lookups(self):
+        self.assertSameWithAndWithoutCache(get_region_ids, "VA")
+        self.assertSameWithAndWithoutCache(get_region_ids, "IL")
+        self.assertSameWithAndWithoutCache(regions_by_state)
+        self.assertSameWithAndWithoutCache(regions_by_state, ["DC", "IL"])
+        self.assertSameWithAndWithoutCache(dataset_timestamp)
+        self.assertSameWithAndWithoutCache(dataset_version)
+
+    @override_settings(RATECHECKER_REGION_CACHE_TTL=60)
+    def test_cached_until_expiry(self):
+        record_dataset_version()
+        self.assertEqual(get_region_ids("DC"), [1])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_region_ids("DC"), [1])
+            dataset_version()
+
+        expired = regions.time.monotonic() + 61
+        with patch("ratechecker.regions.time.monotonic", return_value=expired):
+            # Only the dataset version, which has not changed.
+            with self.assertNumQueries(1):
+                self.assertEqual(get_region_ids("DC"), [1])
+
+    @override_settings(RATECHECKER_REGION_CACHE_TTL=60)
+    def test_reloaded_when_version_changes(self):
+        self.assertEqual(get_region_ids("DC"), [1])
+
+        # As by load_daily_data in another process, without data_loaded.
+        Region.objects.create(
+            region_id=4, state_id="DC", data_timestamp=self.newer
+        )
+        self.assertEqual(get_region_ids("DC"), [1])
+
+        expired = regions.time.monotonic() + 61
+        with patch("ratechecker.regions.time.monotonic", return_value=expired):
+            self.assertEqual(get_region_ids("DC"), [1, 4])
+
+    @override_settings(RATECHECKER_REGION_CACHE_TTL=60)
+    def test_reloaded_when_data_loaded(self):
+        self.assertEqual(get_region_ids("DC"), [1])
+        Region.objects.create(
+            region_id=4, state_id="DC", data_timestamp=self.newer
+        )
+
+        data_loaded.send(sender=None, dataset=None)
+        self.assertEqual(get_region_ids("DC"), [1, 4])
+
+    @override_settings(RATECHECKER_REGION_CACHE_TTL=60)
+    def test_status_without_region_queries(self):
+        record_dataset_version()
+        self.client.get(reverse("rate-checker-status"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("rate-checker-status"))
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(RATECHECKER_REGION_CACHE_TTL=60)
+class RegionCacheRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    """Run the get_rates tests with the region map cached."""
+
+    def setUp(self):
+        super().setUp()
+        _region_map.clear()
+
+    def test_get_rates_without_region_lookups(self):
+        self.initialize_params({"state": "IL"})
+        get_rates(self.params.__dict__)
+
+        with CaptureQueriesContext(connection) as queries:
+            get_rates(self.params.__dict__)
+            self.initialize_params({"loan_type": "JUMBO"})
+            get_rates(self.params.__dict__)
+
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if '"ratechecker_region"."region_id"' in query["sql"]
+            ]
+        )
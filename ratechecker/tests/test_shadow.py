@@ -0,0 +1,117 @@
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ratechecker.dataset import Dataset
+from ratechecker.models import Adjustment, Product, Rate, Region
+from ratechecker.shadow import (
+    build_shadow_indexes,
+    create_shadow_tables,
+    drop_shadow_tables,
+    swap_shadow_tables,
+    using_shadow_tables,
+)
+
+
+class ShadowTablesTestCase(TestCase):
+    models = (Product, Adjustment, Rate, Region)
+
+    def setUp(self):
+        Region.objects.create(
+            region_id=99, state_id="VA", data_timestamp=timezone.now()
+        )
+
+    def load_sample(self):
+        create_shadow_tables()
+        with using_shadow_tables(indexes=False):
+            with open("ratechecker/data/sample.zip", "rb") as f:
+                Dataset(f).load()
+        build_shadow_indexes()
+
+    def table_names(self):
+        with connection.cursor() as cursor:
+            return connection.introspection.table_names(cursor)
+
+    def index_names(self, model):
+        with connection.cursor() as cursor:
+            return {
+                name
+                for name, constraint in (
+                    connection.introspection.get_constraints(
+                        cursor, model._meta.db_table
+                    ).items()
+                )
+                if constraint["index"] and not constraint["primary_key"]
+            }
+
+    def test_using_shadow_tables(self):
+        with using_shadow_tables():
+            self.assertEqual(Rate._meta.db_table, "shadow_ratechecker_rate")
+            self.assertEqual(
+                Rate._meta.indexes[0].name, "shadow_rate_region_lock_idx"
+            )
+        self.assertEqual(Rate._meta.db_table, "ratechecker_rate")
+        self.assertEqual(Rate._meta.indexes[0].name, "rate_region_lock_idx")
+
+    def test_using_shadow_tables_after_queries(self):
+        self.assertEqual(
+            list(Region.objects.filter(state_id="VA").values("region_id")),
+            [{"region_id": 99}],
+        )
+        self.load_sample()
+        with using_shadow_tables():
+            self.assertFalse(Region.objects.filter(state_id="VA").exists())
+        self.assertTrue(Region.objects.filter(state_id="VA").exists())
+
+    def test_using_shadow_tables_without_indexes(self):
+        with using_shadow_tables(indexes=False):
+            self.assertEqual(Rate._meta.indexes, [])
+        self.assertEqual(len(Rate._meta.indexes), 2)
+
+    def test_live_tables_untouched_until_swap(self):
+        self.load_sample()
+        self.assertEqual(
+            list(Region.objects.values_list("region_id", flat=True)), [99]
+        )
+        with using_shadow_tables():
+            self.assertEqual(
+                [model.objects.count() for model in self.models],
+                [1, 1, 1, 1],
+            )
+
+        swap_shadow_tables()
+        self.assertEqual(
+            [model.objects.count() for model in self.models], [1, 1, 1, 1]
+        )
+        self.assertFalse(Region.objects.filter(region_id=99).exists())
+        self.assertFalse(
+            [name for name in self.table_names() if "shadow" in name]
+        )
+
+    def test_swap_keeps_index_names(self):
+        expected = {model: self.index_names(model) for model in self.models}
+        for _ in range(2):
+            self.load_sample()
+            swap_shadow_tables()
+
+        for model in self.models:
+            names = self.index_names(model)
+            self.assertFalse([name for name in names if "shadow" in name])
+            self.assertLessEqual(
+                {index.name for index in model._meta.indexes}, names
+            )
+            self.assertEqual(len(names), len(expected[model]))
+
+    def test_drop_shadow_tables(self):
+        self.load_sample()
+        drop_shadow_tables()
+        self.assertFalse(
+            [name for name in self.table_names() if "shadow" in name]
+        )
+        self.assertEqual(Region.objects.count(), 1)
+
+    def test_create_replaces_leftover_tables(self):
+        self.load_sample()
+        self.load_sample()
+        with using_shadow_tables():
+            self.assertEqual(Rate.objects.count(), 1)
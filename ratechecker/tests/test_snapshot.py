@@ -0,0 +1,81 @@
+from decimal import Decimal
+from unittest import TestCase as UnitTestCase
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.utils import timezone
+
+from ratechecker.models import Region
+from ratechecker.selection import (
+    format_scaled,
+    rates_histogram,
+    select_rates,
+    to_scaled,
+)
+from ratechecker.snapshot import RateSnapshot, _snapshot
+from ratechecker.tests import test_views_rate_query
+from ratechecker.views import get_rates
+
+
+@override_settings(RATECHECKER_SNAPSHOT=True)
+class SnapshotRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    """Run the get_rates tests against the in-memory snapshot."""
+
+    def setUp(self):
+        super().setUp()
+        _snapshot.clear()
+
+    def test_get_rates_uses_snapshot(self):
+        self.initialize_params()
+        with patch.object(
+            RateSnapshot, "get_rates", return_value={}
+        ) as snapshot_get_rates:
+            get_rates(self.params.__dict__)
+        snapshot_get_rates.assert_called_once()
+
+    def test_snapshot_reloads_when_data_changes(self):
+        self.initialize_params()
+        snapshot = _snapshot.get()
+        self.assertIs(_snapshot.get(), snapshot)
+
+        Region.objects.create(
+            region_id=4, state_id="DE", data_timestamp=timezone.now()
+        )
+        self.assertIsNot(_snapshot.get(), snapshot)
+        self.assertEqual(_snapshot.get().regions["DE"], [4])
+
+
+class SelectionTestCase(UnitTestCase):
+    def test_to_scaled(self):
+        self.assertEqual(to_scaled(Decimal("3.705")), 3705)
+        self.assertEqual(to_scaled(Decimal("-0.125")), -125)
+        self.assertEqual(to_scaled(1), 1000)
+
+    def test_format_scaled(self):
+        self.assertEqual(format_scaled(3705), str(Decimal("3.705")))
+        self.assertEqual(format_scaled(-125), str(Decimal("-0.125")))
+        self.assertEqual(format_scaled(0), str(Decimal("0.000")))
+
+    def test_select_rates_skips_distant_points(self):
+        rows = [(1, 3000, 501), (2, 3000, 500)]
+        self.assertEqual(select_rates(rows, {}, 0), {2: (3000, 500)})
+
+    def test_select_rates_applies_adjustments(self):
+        rows = [(1, 3000, 700)]
+        adjustments = {1: {"P": -250, "R": 125}}
+        self.assertEqual(select_rates(rows, adjustments, 0), {1: (3125, 450)})
+
+    def test_select_rates_prefers_positive_points_on_ties(self):
+        rows = [(1, 3000, -250), (1, 2000, 250), (1, 1000, -250)]
+        self.assertEqual(select_rates(rows, {}, 0), {1: (2000, 250)})
+        self.assertEqual(
+            select_rates(rows, {}, 0, factor=-1), {1: (3000, -250)}
+        )
+
+    def test_rates_histogram(self):
+        available = {1: (3000, 0), 2: (3000, 125), 3: (2875, -125)}
+        self.assertEqual(rates_histogram(available), {"3.000": 2, "2.875": 1})
+        self.assertEqual(
+            rates_histogram(available, data_load_testing=True),
+            {"3.000": "0.125", "2.875": "-0.125"},
+        )
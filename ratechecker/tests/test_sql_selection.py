@@ -0,0 +1,126 @@
+import itertools
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from model_bakery import baker
+
+from ratechecker.models import Adjustment, Product, Rate, Region
+from ratechecker.tests import test_views_rate_query
+from ratechecker.views import get_rates
+
+
+@override_settings(RATECHECKER_SQL_SELECTION=True)
+class SqlSelectionRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    """Run the get_rates tests with rates selected in the database."""
+
+
+class SqlSelectionTieBreakTestCase(TestCase):
+    """Compare tie-breaking between the database and the selection loop."""
+
+    params = {
+        "state": "DC",
+        "loan_purpose": "PURCH",
+        "rate_structure": "FIXED",
+        "loan_type": "CONF",
+        "loan_term": 30,
+        "loan_amount": Decimal(200000),
+        "max_ltv": Decimal(80),
+        "min_ltv": Decimal(80),
+        "maxfico": 700,
+        "minfico": 700,
+        "min_lock": 0,
+        "max_lock": 60,
+        "lock": 60,
+        "property_type": "CONDO",
+        "institution": "BANK",
+    }
+
+    def setUp(self):
+        self.now = timezone.now()
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=self.now
+        )
+        self.product = baker.make(
+            Product,
+            plan_id=1,
+            institution="BANK",
+            loan_purpose="PURCH",
+            pmt_type="FIXED",
+            loan_type="CONF",
+            loan_term=30,
+            max_ltv=Decimal(95),
+            min_fico=600,
+            max_fico=800,
+            min_loan_amt=Decimal(100000),
+            max_loan_amt=Decimal(500000),
+        )
+
+    def make_rates(self, points):
+        Rate.objects.all().delete()
+        for rate_id, total_points in enumerate(points, start=1):
+            Rate.objects.create(
+                rate_id=rate_id,
+                product=self.product,
+                region_id=1,
+                lock=60,
+                base_rate=Decimal("3") + Decimal(rate_id) / 1000,
+                total_points=total_points,
+                data_timestamp=self.now,
+            )
+
+    def assertSameSelection(self, requested_points):
+        for data_load_testing in (False, True):
+            params = dict(self.params, points=requested_points)
+            expected = get_rates(dict(params), data_load_testing)
+            with self.settings(RATECHECKER_SQL_SELECTION=True):
+                result = get_rates(dict(params), data_load_testing)
+            self.assertEqual(result, expected)
+
+    def test_ties(self):
+        for requested_points, values in (
+            (Decimal("0"), ("-0.25", "0.25")),
+            (Decimal("0.25"), ("0", "0.5")),
+            (Decimal("-0.25"), ("-0.5", "0")),
+            (Decimal("0"), ("0", "0")),
+            (Decimal("1"), ("0.75", "1.25", "0.875")),
+        ):
+            for points in itertools.permutations(values):
+                with self.subTest(
+                    requested_points=requested_points, points=points
+                ):
+                    self.make_rates([Decimal(p) for p in points])
+                    self.assertSameSelection(requested_points)
+
+    def test_adjustments(self):
+        self.make_rates([Decimal("-0.75"), Decimal("0.5"), Decimal("0.25")])
+        Adjustment.objects.create(
+            rule_id=1,
+            product=self.product,
+            affect_rate_type="P",
+            adj_value=Decimal("0.5"),
+            data_timestamp=self.now,
+        )
+        Adjustment.objects.create(
+            rule_id=2,
+            product=self.product,
+            affect_rate_type="R",
+            adj_value=Decimal("-0.125"),
+            state="DC",
+            data_timestamp=self.now,
+        )
+        Adjustment.objects.create(
+            rule_id=3,
+            product=self.product,
+            affect_rate_type="R",
+            adj_value=Decimal("1"),
+            state="VA",
+            data_timestamp=self.now,
+        )
+        self.assertSameSelection(0)
+        self.assertSameSelection(1)
+
+    def test_no_rates_in_window(self):
+        self.make_rates([Decimal("2")])
+        self.assertSameSelection(0)
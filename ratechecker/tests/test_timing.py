@@ -0,0 +1,120 @@
+import json
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+
+from oahapi import timing
+from oahapi.timing import ServerTimingMiddleware
+from ratechecker.models import Region
+
+
+def parse_server_timing(header):
+    """Map each Server-Timing metric name to its parameters."""
+    metrics = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class ServerTimingMiddlewareTestCase(TestCase):
+    def get_response(self, request):
+        with timing.phase("outer") as outer:
+            Region.objects.count()
+            with timing.phase("inner") as inner:
+                list(Region.objects.all())
+                inner.rows = 3
+            outer.rows = 1
+        timing.record(cache="off")
+        return HttpResponse()
+
+    def call(self):
+        middleware = ServerTimingMiddleware(self.get_response)
+        return middleware(RequestFactory().get("/"))
+
+    def test_header(self):
+        metrics = parse_server_timing(self.call()["Server-Timing"])
+        self.assertEqual(
+            list(metrics), ["outer", "inner", "db", "cache", "total"]
+        )
+        self.assertIn("queries=2", metrics["outer"]["desc"])
+        self.assertIn("rows=1", metrics["outer"]["desc"])
+        self.assertIn("queries=1", metrics["inner"]["desc"])
+        self.assertIn("rows=3", metrics["inner"]["desc"])
+        self.assertEqual(metrics["db"]["desc"], '"queries=2"')
+        self.assertEqual(metrics["cache"]["desc"], '"off"')
+        self.assertGreaterEqual(
+            float(metrics["total"]["dur"]), float(metrics["outer"]["dur"])
+        )
+
+    def test_async(self):
+        async def get_response(request):
+            return await sync_to_async(self.get_response)(request)
+
+        middleware = ServerTimingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(metrics["db"]["desc"], '"queries=2"')
+        self.assertIn("rows=3", metrics["inner"]["desc"])
+
+    def test_no_log_by_default(self):
+        with self.assertNoLogs("oahapi.timing"):
+            self.call()
+
+    @override_settings(OAHAPI_TIMING_LOG=True)
+    def test_log(self):
+        with self.assertLogs("oahapi.timing") as logs:
+            self.call()
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], "/")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], 2)
+        self.assertEqual(record["phases"]["inner"]["rows"], 3)
+        self.assertEqual(record["metrics"], {"cache": "off"})
+
+    def test_outside_request(self):
+        with timing.phase("ignored") as phase:
+            phase.rows = 1
+        timing.record(cache="off")
+
+
+class RateCheckerServerTimingTestCase(TestCase):
+    def test_rate_checker_phases(self):
+        Region.objects.create(
+            region_id=1, state_id="DC", data_timestamp=timezone.now()
+        )
+        response = self.client.get(
+            "/oah-api/rates/rate-checker",
+            {
+                "state": "DC",
+                "loan_purpose": "PURCH",
+                "rate_structure": "FIXED",
+                "loan_type": "CONF",
+                "loan_term": 30,
+                "loan_amount": 160000,
+                "price": 320000,
+                "maxfico": 700,
+                "minfico": 700,
+            },
+        )
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        for name in (
+            "region-lookup",
+            "rate-fetch",
+            "adjustments",
+            "selection",
+            "response-build",
+            "render",
+            "db",
+            "cache",
+            "total",
+        ):
+            self.assertIn(name, metrics)
+        self.assertIn("rows=1", metrics["region-lookup"]["desc"])
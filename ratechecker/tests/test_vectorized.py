@@ -0,0 +1,121 @@
+import random
+from decimal import Decimal
+from unittest import TestCase as UnitTestCase
+from unittest import skipIf
+
+from django.test import override_settings
+
+from ratechecker import selection, vectorized
+from ratechecker.snapshot import _snapshot
+from ratechecker.tests import test_views_rate_query
+
+
+@skipIf(vectorized.np is None, "NumPy is not installed")
+@override_settings(RATECHECKER_VECTORIZED=True)
+class VectorizedRateQueryTestCase(test_views_rate_query.RateQueryTestCase):
+    """Run the get_rates tests with vectorized rate selection."""
+
+
+@skipIf(vectorized.np is None, "NumPy is not installed")
+@override_settings(RATECHECKER_SNAPSHOT=True, RATECHECKER_VECTORIZED=True)
+class VectorizedSnapshotRateQueryTestCase(
+    test_views_rate_query.RateQueryTestCase
+):
+    """Run the get_rates tests against the snapshot, vectorized."""
+
+    def setUp(self):
+        super().setUp()
+        _snapshot.clear()
+
+
+@skipIf(vectorized.np is None, "NumPy is not installed")
+class VectorizedSelectionTestCase(UnitTestCase):
+    def select(self, rows, adjustments, points, factor=1):
+        np = vectorized.np
+        product_ids, base_rates, total_points = (
+            np.array(column, dtype=np.int64) for column in zip(*rows)
+        )
+        return vectorized.select_rates(
+            product_ids, base_rates, total_points, adjustments, points, factor
+        )
+
+    def assertSameSelection(self, rows, adjustments, points, factor):
+        expected = selection.select_rates(rows, adjustments, points, factor)
+        product_ids, base_rates, total_points = self.select(
+            rows, adjustments, points, factor
+        )
+        self.assertEqual(
+            list(expected.items()),
+            [
+                (p, (b, t))
+                for p, b, t in zip(
+                    product_ids.tolist(),
+                    base_rates.tolist(),
+                    total_points.tolist(),
+                )
+            ],
+        )
+
+        for data_load_testing in (False, True):
+            self.assertEqual(
+                list(
+                    selection.rates_histogram(
+                        expected, data_load_testing
+                    ).items()
+                ),
+                list(
+                    vectorized.rates_histogram(
+                        base_rates, total_points, data_load_testing
+                    ).items()
+                ),
+            )
+
+    def test_scaled_array(self):
+        self.assertEqual(
+            vectorized.scaled_array(
+                [Decimal("3.705"), Decimal("-0.125"), Decimal("0.000")]
+            ).tolist(),
+            [3705, -125, 0],
+        )
+
+    def test_empty(self):
+        np = vectorized.np
+        empty = np.empty(0, dtype=np.int64)
+        product_ids, _, _ = vectorized.select_rates(empty, empty, empty, {}, 0)
+        self.assertEqual(len(product_ids), 0)
+
+    def test_nothing_near_requested_points(self):
+        product_ids, _, _ = self.select([(1, 3000, 750)], {}, 0)
+        self.assertEqual(len(product_ids), 0)
+
+    def test_prefers_positive_points_on_ties(self):
+        rows = [(1, 3000, -250), (1, 2000, 250), (1, 1000, -250)]
+        self.assertSameSelection(rows, {}, 0, 1)
+        self.assertSameSelection(rows, {}, 0, -1)
+
+    def test_zero_points_tie_keeps_first(self):
+        rows = [(1, 3000, 0), (1, 2000, 1000), (2, 2500, 1000), (2, 1500, 0)]
+        self.assertSameSelection(rows, {}, 1, 1)
+        self.assertSameSelection(rows, {}, 1, -1)
+
+    def test_matches_python_selection(self):
+        rnd = random.Random(0)
+        for _ in range(200):
+            rows = [
+                (
+                    rnd.randint(1, 8),
+                    rnd.choice([2875, 3000, 3125, 3250]),
+                    rnd.randrange(-1500, 1500, 125),
+                )
+                for _ in range(rnd.randint(1, 60))
+            ]
+            adjustments = {
+                product_id: {
+                    "P": rnd.randrange(-500, 500, 125),
+                    "R": rnd.randrange(-250, 250, 125),
+                }
+                for product_id in range(1, 8, 2)
+            }
+            points = rnd.choice([-1, 0, 1, 2])
+            factor = rnd.choice([1, -1])
+            self.assertSameSelection(rows, adjustments, points, factor)
@@ -0,0 +1,259 @@
+import datetime
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from asgiref.sync import async_to_sync
+
+from ratechecker import regions
+from ratechecker.dataset import Dataset
+from ratechecker.models import DatasetVersion, Rate, Region
+from ratechecker.shadow import (
+    build_shadow_indexes,
+    create_shadow_tables,
+    using_shadow_tables,
+)
+from ratechecker.versions import (
+    activate_version,
+    active_version,
+    querying_dataset,
+    record_delta,
+    swap_in_dataset,
+    version_as_of,
+)
+from ratechecker.views import rate_checker_async
+
+
+def day(n):
+    return timezone.make_aware(datetime.datetime(2026, 10, n))
+
+
+class LoadVersionsMixin(object):
+    def load(self, timestamp, base_rate=None):
+        """Load the sample dataset as of timestamp and swap it in."""
+        create_shadow_tables()
+        with using_shadow_tables(indexes=False):
+            with open("ratechecker/data/sample.zip", "rb") as f:
+                dataset = Dataset(f)
+                dataset.timestamp = timestamp
+                dataset.load()
+            if base_rate is not None:
+                Rate.objects.update(
+                    base_rate=Decimal(base_rate),
+                    base_rate_scaled=int(Decimal(base_rate) * 1000),
+                )
+        build_shadow_indexes()
+        swap_in_dataset(timestamp)
+
+    def table_names(self):
+        with connection.cursor() as cursor:
+            return connection.introspection.table_names(cursor)
+
+    def versions(self):
+        return list(DatasetVersion.objects.values_list("timestamp", "active"))
+
+
+class DatasetVersionsTestCase(LoadVersionsMixin, TestCase):
+    def test_single_version_by_default(self):
+        self.load(day(1))
+        self.load(day(2))
+        self.assertEqual(self.versions(), [(day(2), True)])
+        self.assertFalse(
+            [name for name in self.table_names() if name.startswith("v2026")]
+        )
+
+    @override_settings(RATECHECKER_DATASET_VERSIONS=2)
+    def test_previous_version_kept(self):
+        self.load(day(1))
+        self.load(day(2))
+        self.assertEqual(self.versions(), [(day(2), True), (day(1), False)])
+        self.assertIn("v20261001_ratechecker_rate", self.table_names())
+        self.assertEqual(Region.objects.get().data_timestamp, day(2))
+
+    @override_settings(RATECHECKER_DATASET_VERSIONS=2)
+    def test_expired_versions_dropped(self):
+        for n in (1, 2, 3):
+            self.load(day(n))
+        self.assertEqual(self.versions(), [(day(3), True), (day(2), False)])
+        self.assertNotIn("v20261001_ratechecker_rate", self.table_names())
+
+    @override_settings(RATECHECKER_DATASET_VERSIONS=3)
+    def test_same_timestamp_replaced(self):
+        self.load(day(1))
+        self.load(day(2))
+        self.load(day(1))
+        self.assertEqual(self.versions(), [(day(2), False), (day(1), True)])
+
+    @override_settings(RATECHECKER_DATASET_VERSIONS=3)
+    def test_activate_version(self):
+        self.load(day(1), base_rate="5.000")
+        self.load(day(2))
+        activate_version(DatasetVersion.objects.get(timestamp=day(1)))
+
+        self.assertEqual(self.versions(), [(day(2), False), (day(1), True)])
+        self.assertEqual(Rate.objects.get().base_rate, Decimal("5.000"))
+        self.assertFalse(
+            [
+                name
+                for name in self.table_names()
+                if name.startswith("v20261001")
+            ]
+        )
+
+        # Loading after a rollback keeps the index names of the tables.
+        self.load(day(3))
+        self.assertEqual(Region.objects.get().data_timestamp, day(3))
+
+    @override_settings(RATECHECKER_DATASET_VERSIONS=2)
+    def test_querying_dataset(self):
+        self.load(day(1), base_rate="5.000")
+        self.load(day(2))
+        version = DatasetVersion.objects.get(timestamp=day(1))
+
+        with querying_dataset(version):
+            self.assertEqual(Rate.objects.get().base_rate, Decimal("5.000"))
+            self.assertEqual(
+                Rate.objects.values_list(
+                    "product__data_timestamp", flat=True
+                ).get(),
+                day(1),
+            )
+            with self.assertRaises(Region.DoesNotExist):
+                Region.objects.get(state_id="VA")
+        self.assertEqual(Rate.objects.get().base_rate, Decimal("4.375"))
+
+    def test_version_as_of(self):
+        self.load(day(1))
+        self.assertEqual(version_as_of(day(5).date()).timestamp, day(1))
+        self.assertEqual(version_as_of(day(1).date()).timestamp, day(1))
+        self.assertIsNone(version_as_of(datetime.date(2026, 9, 30)))
+
+    def test_record_delta(self):
+        self.load(day(1))
+        record_delta(day(2))
+        self.assertEqual(self.versions(), [(day(2), True)])
+        self.assertEqual(
+            DatasetVersion.objects.get().table_prefix, "v20261002_"
+        )
+
+    def test_active_version_recorded_for_loaded_data(self):
+        self.assertIsNone(active_version())
+        Region.objects.create(
+            region_id=1, state_id="VA", data_timestamp=day(3)
+        )
+        self.assertEqual(active_version().timestamp, day(3))
+        self.assertEqual(self.versions(), [(day(3), True)])
+
+
+@override_settings(RATECHECKER_DATASET_VERSIONS=2)
+class RateCheckerAsOfTestCase(LoadVersionsMixin, TestCase):
+    url = "/oah-api/rates/rate-checker"
+    params = {
+        "state": "AK",
+        "loan_purpose": "PURCH",
+        "rate_structure": "FIXED",
+        "loan_type": "CONF",
+        "loan_term": 30,
+        "loan_amount": 160000,
+        "price": 320000,
+        "maxfico": 700,
+        "minfico": 700,
+        "lock": 30,
+    }
+
+    def setUp(self):
+        self.load(day(1), base_rate="5.000")
+        self.load(day(2))
+
+    def get_data(self, **params):
+        response = self.client.get(self.url, dict(self.params, **params))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_active_dataset_by_default(self):
+        self.assertEqual(self.get_data(), {"4.375": 1})
+        self.assertEqual(self.get_data(as_of="2026-10-05"), {"4.375": 1})
+
+    def test_as_of(self):
+        self.assertEqual(self.get_data(as_of="2026-10-01"), {"5.000": 1})
+
+    def test_as_of_product_table_kept(self):
+        self.assertEqual(self.get_data(as_of="2026-10-01"), {"5.000": 1})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_data(as_of="2026-10-01"), {"5.000": 1})
+        self.assertFalse(
+            [query for query in queries if "_product" in query["sql"]]
+        )
+
+    @override_settings(
+        RATECHECKER_CACHE_SIZE=10,
+        RATECHECKER_REGION_CACHE_TTL=60,
+        RATECHECKER_SNAPSHOT=True,
+    )
+    def test_as_of_not_served_from_caches(self):
+        self.assertEqual(self.get_data(), {"4.375": 1})
+        self.assertEqual(self.get_data(as_of="2026-10-01"), {"5.000": 1})
+        self.assertEqual(self.get_data(), {"4.375": 1})
+
+    def test_activation_moves_last_modified_forward(self):
+        last_modified = self.client.get(self.url, self.params)["Last-Modified"]
+        activate_version(DatasetVersion.objects.get(timestamp=day(1)))
+
+        response = self.client.get(
+            self.url, self.params, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], {"5.000": 1})
+
+    @override_settings(
+        RATECHECKER_CACHE_SIZE=10,
+        RATECHECKER_REGION_CACHE_TTL=60,
+        RATECHECKER_SNAPSHOT=True,
+    )
+    def test_activation_noticed_by_other_processes(self):
+        self.assertEqual(self.get_data(), {"4.375": 1})
+
+        # As if activated by another process, whose caches are not cleared.
+        with patch("ratechecker.versions.clear_dataset_caches"):
+            activate_version(DatasetVersion.objects.get(timestamp=day(1)))
+
+        # Noticed once the region map expires.
+        expired = regions.time.monotonic() + 61
+        with patch("ratechecker.regions.time.monotonic", return_value=expired):
+            self.assertEqual(self.get_data(), {"5.000": 1})
+
+    def test_timestamp_recorded_for_delta(self):
+        # As after a delta load that changed no rows.
+        record_delta(day(3))
+        for as_of, timestamp in (("", day(3)), ("2026-10-01", day(1))):
+            response = self.client.get(
+                self.url, dict(self.params, as_of=as_of)
+            )
+            self.assertEqual(
+                parse_datetime(response.json()["timestamp"]), timestamp
+            )
+
+    def test_as_of_async(self):
+        request = AsyncRequestFactory().get(
+            self.url, dict(self.params, as_of="2026-10-01")
+        )
+        response = async_to_sync(rate_checker_async)(request)
+        self.assertEqual(json.loads(response.content)["data"], {"5.000": 1})
+
+    def test_as_of_before_kept_versions(self):
+        response = self.client.get(
+            self.url, dict(self.params, as_of="2026-09-30")
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("as_of", response.json())
+
+    def test_invalid_as_of(self):
+        response = self.client.get(self.url, dict(self.params, as_of="x"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("as_of", response.json())
@@ -9,7 +9,9 @@ from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from ratechecker.caches import rate_cache
 from ratechecker.models import Adjustment, Product, Rate, Region
+from ratechecker.tests.helpers import record_dataset_version
 from ratechecker.views import set_lock_max_min
 
 
@@ -473,6 +475,50 @@ class RateCheckerTestCase(APITestCase):
         # self.assertEqual(response_fixed.data.get('data').get('monthly'), 1.5)
         # self.assertTrue(response_fixed.data.get('data').get('upfront') is None)  # noqa
 
+    @override_settings(RATECHECKER_CACHE_SIZE=10)
+    def test_rate_checker__cached(self):
+        """... when the same parameters are requested again"""
+        rate_cache.clear()
+        record_dataset_version()
+        params = {
+            "state": "DC",
+            "loan_purpose": "PURCH",
+            "rate_structure": "FIXED",
+            "loan_type": "CONF",
+            "loan_term": 30,
+            "loan_amount": 160000,
+            "price": 320000,
+            "maxfico": 700,
+            "minfico": 700,
+        }
+        first = self.client.get(self.url, params)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        hits = rate_cache.stats()["hits"]
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, params)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(rate_cache.stats()["hits"], hits + 1)
+
+    def test_rate_checker__dataset_version_queried_once(self):
+        """... with the version shared by its headers, caches and timestamp"""
+        record_dataset_version()
+        params = {
+            "state": "DC",
+            "loan_purpose": "PURCH",
+            "rate_structure": "FIXED",
+            "loan_type": "CONF",
+            "loan_term": 30,
+            "loan_amount": 160000,
+            "price": 320000,
+            "maxfico": 700,
+            "minfico": 700,
+        }
+        self.client.get(self.url, params)
+        # The dataset version, the regions, the rates and the adjustments.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
 @override_settings(URLCONF="ratechecker.urls")
 class RateCheckerStatusTest(APITestCase):
@@ -522,3 +568,11 @@ class RateCheckerStatusTest(APITestCase):
         baker.make(Region, data_timestamp=timestamp)
         response = self.get()
         self.assertContains(response, "2017-01-02T03:04:56Z")
+
+    @override_settings(RATECHECKER_CACHE_SIZE=10)
+    def test_cache_stats(self):
+        rate_cache.clear()
+        response = self.get()
+        self.assertEqual(
+            json.loads(response.content)["cache"]["max_size"], 10
+        )
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.utils import timezone
 
@@ -600,3 +602,10 @@ class RateQueryTestCase(TestCase):
         self.assertEqual(len(result["data"]), 2)
         self.assertEqual(result["data"]["2.995"], 1)
         self.assertEqual(result["data"]["2.985"], 1)
+
+    def test_get_rates__no_rate_instances(self):
+        """... check that rates are read without building Rate instances."""
+        self.initialize_params()
+        with patch.object(Rate, "from_db", side_effect=AssertionError):
+            result = get_rates(self.params.__dict__)
+        self.assertEqual(result["data"], {"2.275": 1, "3.705": 2})
@@ -1,9 +1,16 @@
+import itertools
 from decimal import Decimal
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
 from ratechecker.models import Product
-from ratechecker.ratechecker_parameters import ParamsSerializer, scrub_error
+from ratechecker.ratechecker_parameters import (
+    FastParamsSerializer,
+    ParamsSerializer,
+    scrub_error,
+)
+from ratechecker.tests import test_views_ratecheckerparameters
 
 
 class RateCheckerParametersTestCase(TestCase):
@@ -325,3 +332,85 @@ class RateCheckerParametersTestCase(TestCase):
         serializer = ParamsSerializer(data=self.data)
         with self.assertRaises(AssertionError):
             serializer.errors
+
+
+class FastParamsSerializerTestCase(RateCheckerParametersTestCase):
+    """Run the ParamsSerializer tests against FastParamsSerializer."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(
+            test_views_ratecheckerparameters,
+            "ParamsSerializer",
+            FastParamsSerializer,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class FastParamsSerializerEquivalenceTestCase(SimpleTestCase):
+    """Compare both serializers on query string values."""
+
+    data = {
+        "price": "240000",
+        "loan_amount": "200000",
+        "state": "GA",
+        "loan_type": "JUMBO",
+        "minfico": "700",
+        "maxfico": "800",
+        "rate_structure": "FIXED",
+        "loan_term": "30",
+    }
+
+    values = {
+        "price": ["", "0", "-5", "12.345", "1.5E3", "NAN", "1" * 11, " 1"],
+        "loan_amount": ["", "-200000", "200000.10", "0", "ABC", "2e5"],
+        "ltv": ["", "80", "80.1235", "1234", "-0.000", "00080"],
+        "state": ["", "XX", "<SCRIPT>", "DC", "dc"],
+        "loan_type": ["", "FHA-HB", "VA", "%3CSCRIPT%3E"],
+        "minfico": ["", "-700", "700.0", "7.5", " 700 ", "1_0", "9" * 1001],
+        "lock": ["", "30", "45", "50", "60.00"],
+        "points": ["", "-1", "2", "0.5"],
+        "io": ["", "1", "2", "X"],
+        "rate_structure": ["", "ARM", "FIXED", "arm"],
+        "arm_type": ["", "5-1", "3-1", "11-1"],
+        "institution": ["", "BANK", " BANK", "A" * 21, "NUL\x00", "\u00e9"],
+        "property_type": ["", "COOP", "HOUSE"],
+        "loan_purpose": ["", "REFI", "BUY"],
+    }
+
+    def assertSameValidation(self, data):
+        expected = ParamsSerializer(data=data)
+        serializer = FastParamsSerializer(data=data)
+        self.assertEqual(serializer.is_valid(), expected.is_valid())
+        self.assertEqual(
+            list(serializer.validated_data.items()),
+            list(expected.validated_data.items()),
+        )
+        self.assertEqual(serializer.errors, expected.errors)
+
+    def test_values(self):
+        for name, values in self.values.items():
+            for value in values:
+                with self.subTest(name=name, value=value):
+                    self.assertSameValidation(dict(self.data, **{name: value}))
+
+    def test_combinations(self):
+        for price, ltv, arm_type in itertools.product(
+            ("", "240000", "-1"), ("", "90", "X"), ("", "5-1")
+        ):
+            data = dict(self.data, rate_structure="ARM")
+            for name, value in (
+                ("price", price),
+                ("ltv", ltv),
+                ("arm_type", arm_type),
+            ):
+                if value:
+                    data[name] = value
+                else:
+                    data.pop(name, None)
+            with self.subTest(data=data):
+                self.assertSameValidation(data)
+
+    def test_not_a_mapping(self):
+        self.assertSameValidation(["state"])
@@ -1,4 +1,13 @@
-from ratechecker.views import RateCheckerStatus, rate_checker
+from django.conf import settings
+
+from ratechecker.views import (
+    RateCheckerStatus,
+    rate_checker,
+    rate_checker_async,
+    rate_checker_batch,
+    rate_checker_states,
+    rate_checker_sweep,
+)
 
 
 try:
@@ -8,7 +17,30 @@ except ImportError:
 
 
 urlpatterns = [
-    re_path(r"rate-checker$", rate_checker, name="rate-checker"),
+    re_path(
+        r"rate-checker$",
+        (
+            rate_checker_async
+            if getattr(settings, "OAHAPI_ASYNC_VIEWS", False)
+            else rate_checker
+        ),
+        name="rate-checker",
+    ),
+    re_path(
+        r"rate-checker/batch$",
+        rate_checker_batch,
+        name="rate-checker-batch",
+    ),
+    re_path(
+        r"rate-checker/sweep$",
+        rate_checker_sweep,
+        name="rate-checker-sweep",
+    ),
+    re_path(
+        r"rate-checker/states$",
+        rate_checker_states,
+        name="rate-checker-states",
+    ),
     re_path(
         r"rate-checker/status$",
         RateCheckerStatus.as_view(),
@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from ratechecker.selection import MAX_POINTS_DISTANCE, format_scaled, to_scaled
+
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def use_vectorized():
+    """Whether rate selection should use the NumPy implementation."""
+    if not getattr(settings, "RATECHECKER_VECTORIZED", False):
+        return False
+
+    if np is None:  # pragma: no cover
+        raise ImproperlyConfigured("RATECHECKER_VECTORIZED requires NumPy")
+
+    return True
+
+
+def scaled_array(values):
+    """Convert a sequence of three-decimal-place Decimals to thousandths."""
+    return np.rint(np.array(values, dtype=np.float64) * 1000).astype(np.int64)
+
+
+def match_rates(rates, product_ids, region_ids, lock_range):
+    """
+    Array version of RateSnapshot.match_rates.
+
+    rates maps product ids to their RateColumns. Returns arrays of the
+    product id, base rate and total points of the matching rates, ordered
+    by rate id.
+    """
+    columns = [(p, rates[p]) for p in product_ids if p in rates]
+    if not columns:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    def gather(name):
+        return np.concatenate(
+            [
+                np.frombuffer(
+                    getattr(c, name), dtype=getattr(c, name).typecode
+                )
+                for _, c in columns
+            ]
+        )
+
+    rate_ids = gather("rate_id")
+    locks = gather("lock")
+    min_lock, max_lock = lock_range
+    (matches,) = np.nonzero(
+        np.isin(gather("region_id"), region_ids)
+        & (locks > min_lock)
+        & (locks <= max_lock)
+    )
+    matches = matches[np.argsort(rate_ids[matches], kind="stable")]
+
+    product_ids = np.repeat(
+        np.array([p for p, _ in columns], dtype=np.int64),
+        [len(c.rate_id) for _, c in columns],
+    )
+
+    return (
+        product_ids[matches],
+        gather("base_rate")[matches],
+        gather("total_points")[matches],
+    )
+
+
+def select_rates(
+    product_ids, base_rates, total_points, adjustments, points, factor=1
+):
+    """
+    Pick the rate nearest to the requested points for each product.
+
+    This is the array equivalent of ratechecker.selection.select_rates, with
+    the same tie-breaking. The inputs are arrays of the product id, base rate
+    and total points of each rate, in thousandths and in the order the rates
+    are stored; adjustments maps product ids to their summed "P" and "R"
+    adjustments in thousandths.
+
+    Returns arrays of the product id, adjusted base rate and adjusted total
+    points of the selected rates, in the order get_rates would pick them.
+    """
+    if not len(product_ids):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    products, product_index = np.unique(product_ids, return_inverse=True)
+    product_adjustments = [adjustments.get(p, {}) for p in products.tolist()]
+    points_adjustment = np.array(
+        [a.get("P", 0) for a in product_adjustments], dtype=np.int64
+    )
+    rate_adjustment = np.array(
+        [a.get("R", 0) for a in product_adjustments], dtype=np.int64
+    )
+
+    total_points = total_points + points_adjustment[product_index]
+    base_rates = base_rates + rate_adjustment[product_index]
+    difference = np.abs(to_scaled(points) - total_points)
+
+    # Rows too far from the requested points are never selected.
+    (rows,) = np.nonzero(difference <= MAX_POINTS_DISTANCE)
+    if not len(rows):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    product_index = product_index[rows]
+    difference = difference[rows]
+    sign = np.sign(factor * total_points[rows])
+
+    # Group rows by product, nearest first, ties in storage order.
+    order = np.lexsort((rows, difference, product_index))
+    new_group = np.diff(product_index[order], prepend=-1) != 0
+    group_starts = np.flatnonzero(new_group)
+    group = np.cumsum(new_group) - 1
+
+    # The loop keeps the first nearest rate, unless it has negative points
+    # and a later rate at the same distance has positive points.
+    first = order[group_starts]
+    nearest = difference[order] == difference[first][group]
+    (positive,) = np.nonzero(nearest & (sign[order] > 0))
+    positive_groups, first_positive = np.unique(
+        group[positive], return_index=True
+    )
+    winners = first.copy()
+    replace = sign[first[positive_groups]] < 0
+    winners[positive_groups[replace]] = order[
+        positive[first_positive[replace]]
+    ]
+
+    # Products are picked in the order their first candidate rate appears.
+    first_row = np.minimum.reduceat(order, group_starts)
+    winners = rows[winners[np.argsort(first_row, kind="stable")]]
+
+    return (
+        np.asarray(product_ids)[winners],
+        base_rates[winners],
+        total_points[winners],
+    )
+
+
+def rates_histogram(base_rates, total_points, data_load_testing=False):
+    """Array equivalent of ratechecker.selection.rates_histogram."""
+    if data_load_testing:
+        return {
+            format_scaled(base_rate): format_scaled(points)
+            for base_rate, points in zip(
+                base_rates.tolist(), total_points.tolist()
+            )
+        }
+
+    values, first_index, counts = np.unique(
+        base_rates, return_index=True, return_counts=True
+    )
+    order = np.argsort(first_index, kind="stable")
+
+    return {
+        format_scaled(value): count
+        for value, count in zip(values[order].tolist(), counts[order].tolist())
+    }
+
+
+def rates_data(rates, summed_adj_dict, points, factor, data_load_testing):
+    """
+    Compute the data returned by get_rates from its fetched rates.
+
+    rates are RateRow records and summed_adj_dict holds the Decimal sums of
+    the Adjustment query, as built by get_rates.
+    """
+    adjustments = {
+        product_id: {
+            rate_type: to_scaled(value) for rate_type, value in summed.items()
+        }
+        for product_id, summed in summed_adj_dict.items()
+    }
+
+    product_ids, base_rates, total_points = select_rates(
+        np.array([rate.product_id for rate in rates], dtype=np.int64),
+        scaled_array([rate.base_rate for rate in rates]),
+        scaled_array([rate.total_points for rate in rates]),
+        adjustments,
+        points,
+        factor,
+    )
+
+    return rates_histogram(base_rates, total_points, data_load_testing)
+
+
+def scaled_rates_data(rows, adjustments, points, factor, data_load_testing):
+    """
+    rates_data for rates fetched as (product_id, base_rate, total_points,
+    ...) tuples and adjustments summed in thousandths.
+    """
+    columns = np.array([row[:3] for row in rows], dtype=np.int64).reshape(
+        -1, 3
+    )
+
+    product_ids, base_rates, total_points = select_rates(
+        columns[:, 0],
+        columns[:, 1],
+        columns[:, 2],
+        adjustments,
+        points,
+        factor,
+    )
+
+    return rates_histogram(base_rates, total_points, data_load_testing)
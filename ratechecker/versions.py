@@ -0,0 +1,261 @@
+"""
+Dataset versions: the datasets loaded by load_daily_data, kept so that rates
+can be answered as of an earlier date and a previous dataset can be made
+active again without reloading it.
+
+The active version is held in the model tables, as before. When
+RATECHECKER_DATASET_VERSIONS is more than one, the tables of the previous
+active version are renamed with its DatasetVersion.table_prefix instead of
+being dropped when a new dataset is swapped in. Activating a version renames
+tables in one transaction; no data is copied.
+
+Inactive versions are queried through stand-in models, with the fields of
+the ratechecker models but the tables of the version, which querying_dataset
+sets for the current thread or task only.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ratechecker.caches import clear_dataset_caches
+from ratechecker.models import (
+    DatasetVersion,
+    Region,
+    queried_version,
+    version_models,
+)
+from ratechecker.shadow import (
+    BASE_TABLES,
+    MODELS,
+    drop_tables,
+    edit_schema,
+    rename_tables,
+    swap_shadow_tables,
+)
+
+
+def kept_versions():
+    """How many dataset versions to keep, counting the active one."""
+    return max(1, getattr(settings, "RATECHECKER_DATASET_VERSIONS", 1))
+
+
+def version_prefix(timestamp):
+    return timezone.localtime(timestamp).strftime("v%Y%m%d_")
+
+
+def activation_time():
+    """
+    The time to record a version as activated: now, but at least a second
+    after the last activation, so that Last-Modified, which has a resolution
+    of one second, moves forward even when an older version is activated.
+    """
+    now = timezone.now()
+    last = DatasetVersion.objects.aggregate(last=Max("activated"))["last"]
+    if last is not None and now < last + timedelta(seconds=1):
+        return last + timedelta(seconds=1)
+    return now
+
+
+def active_version():
+    """
+    The active DatasetVersion, or None if no data is loaded.
+
+    Data loaded before versions were kept is recorded as a version the first
+    time it is needed.
+    """
+    version = DatasetVersion.objects.filter(active=True).first()
+    if version is not None:
+        return version
+
+    timestamp = Region.objects.aggregate(timestamp=Max("data_timestamp"))[
+        "timestamp"
+    ]
+    if timestamp is None:
+        return None
+
+    DatasetVersion.objects.filter(timestamp=timestamp).delete()
+    return DatasetVersion.objects.create(
+        timestamp=timestamp,
+        table_prefix=version_prefix(timestamp),
+        active=True,
+    )
+
+
+def drop_version(version):
+    drop_tables(version.table_prefix)
+    version.delete()
+
+
+def drop_expired_versions():
+    """Drop the inactive versions beyond the number of versions kept."""
+    kept_inactive = kept_versions() - 1
+    inactive = DatasetVersion.objects.filter(active=False)
+    for version in list(inactive[kept_inactive:]):
+        drop_version(version)
+
+
+def swap_in_dataset(timestamp):
+    """
+    Swap the shadow tables in as the active version, with timestamp.
+
+    The previous active version is kept if more than one version is kept.
+    A kept version with the same timestamp is replaced.
+    """
+    with transaction.atomic():
+        previous = active_version()
+        activated = activation_time()
+        for version in DatasetVersion.objects.filter(
+            timestamp=timestamp, active=False
+        ):
+            drop_version(version)
+
+        archive = (
+            previous is not None
+            and previous.timestamp != timestamp
+            and kept_versions() > 1
+        )
+        swap_shadow_tables(previous.table_prefix if archive else None)
+
+        if archive:
+            previous.active = False
+            previous.save(update_fields=["active"])
+        elif previous is not None:
+            previous.delete()
+
+        DatasetVersion.objects.create(
+            timestamp=timestamp,
+            table_prefix=version_prefix(timestamp),
+            active=True,
+            activated=activated,
+        )
+        drop_expired_versions()
+
+
+def record_delta(timestamp):
+    """
+    Record that the active version was changed in place into the dataset
+    with timestamp, by a delta load.
+    """
+    with transaction.atomic():
+        previous = active_version()
+        activated = activation_time()
+        for version in DatasetVersion.objects.filter(
+            timestamp=timestamp, active=False
+        ):
+            drop_version(version)
+
+        if previous is not None:
+            previous.delete()
+        DatasetVersion.objects.create(
+            timestamp=timestamp,
+            table_prefix=version_prefix(timestamp),
+            active=True,
+            activated=activated,
+        )
+
+
+def activate_version(version):
+    """
+    Make version the active dataset, keeping the active one as an inactive
+    version, by renaming their tables in one transaction.
+    """
+    if version.active:
+        return
+
+    with transaction.atomic():
+        previous = active_version()
+
+        def edit(editor):
+            if previous is not None:
+                rename_tables(editor, "", previous.table_prefix)
+            else:
+                for model in reversed(MODELS):
+                    editor.delete_model(model)
+            rename_tables(editor, version.table_prefix, "")
+
+        edit_schema(edit)
+
+        DatasetVersion.objects.filter(active=True).update(active=False)
+        version.active = True
+        version.activated = activation_time()
+        version.save(update_fields=["active", "activated"])
+
+    # Other processes notice the switch through dataset_version.
+    clear_dataset_caches()
+
+
+def version_as_of(date):
+    """
+    The newest version with a timestamp on or before date, or None if there
+    is no such version.
+    """
+    return DatasetVersion.objects.filter(timestamp__date__lte=date).first()
+
+
+_stand_ins = {}
+_stand_ins_lock = threading.Lock()
+
+
+def stand_in_models(prefix):
+    """
+    Models with the fields of the ratechecker models, by model name, that
+    query their tables named with prefix.
+
+    Each set of stand-ins is registered in its own app registry, so that
+    they do not clash with the ratechecker models or with each other. They
+    raise the DoesNotExist and MultipleObjectsReturned of the models.
+    """
+    with _stand_ins_lock:
+        if prefix not in _stand_ins:
+            apps = Apps()
+            stand_ins = {}
+            for model in MODELS:
+                opts = model._meta
+                attrs = {
+                    field.name: field.clone() for field in opts.local_fields
+                }
+                attrs["__module__"] = model.__module__
+                attrs["Meta"] = type(
+                    "Meta",
+                    (),
+                    {
+                        "app_label": opts.app_label,
+                        "apps": apps,
+                        "db_table": prefix + BASE_TABLES[model],
+                        "managed": False,
+                    },
+                )
+                stand_in = type(opts.object_name, (models.Model,), attrs)
+                stand_in.DoesNotExist = model.DoesNotExist
+                stand_in.MultipleObjectsReturned = (
+                    model.MultipleObjectsReturned
+                )
+                stand_ins[opts.model_name] = stand_in
+            _stand_ins[prefix] = stand_ins
+        return _stand_ins[prefix]
+
+
+@contextmanager
+def querying_dataset(version):
+    """
+    Query version with the ratechecker models in this context, or the
+    active dataset if version is None or active.
+    """
+    if version is None or version.active:
+        yield
+        return
+
+    token = version_models.set(stand_in_models(version.table_prefix))
+    version_token = queried_version.set(version)
+    try:
+        yield
+    finally:
+        queried_version.reset(version_token)
+        version_models.reset(token)
@@ -1,155 +1,620 @@
 from decimal import Decimal
+from functools import wraps
+from inspect import iscoroutinefunction
 
-from django.db.models import Q, Sum
+from django.conf import settings
+from django.db.models import (
+    Case,
+    F,
+    IntegerField,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    When,
+    Window,
+)
+from django.db.models.functions import Abs, Coalesce, RowNumber
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition, require_GET
 
-from rest_framework import status
+from asgiref.sync import sync_to_async
+from rest_framework import serializers, status
 from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
-from ratechecker.models import Adjustment, Rate, Region
-from ratechecker.ratechecker_parameters import ParamsSerializer
+from oahapi import timing
+from oahapi.conditional import (
+    async_condition,
+    cache_for,
+    dataset_etag,
+    seconds_until,
+)
+from ratechecker import vectorized
+from ratechecker.adjustments import (
+    get_adjustment_indexes,
+    sum_adjustments,
+    use_adjustment_index,
+)
+from ratechecker.batch import (
+    SWEEP_PARAMS,
+    get_rates_batch,
+    get_rates_by_state,
+    scaled_adjustments,
+    sweep_params,
+)
+from ratechecker.caches import dataset_version, rate_cache
+from ratechecker.models import Adjustment, Rate
+from ratechecker.products import get_product_table
+from ratechecker.ratechecker_parameters import FastParamsSerializer
+from ratechecker.regions import (
+    aget_region_ids,
+    dataset_timestamp,
+    get_region_ids,
+    using_dataset_version,
+)
+from ratechecker.selection import (
+    MAX_POINTS_DISTANCE,
+    rates_histogram,
+    select_rates,
+    to_scaled,
+    use_integer_rates,
+)
+from ratechecker.snapshot import get_snapshot, use_snapshot
+from ratechecker.vectorized import use_vectorized
+from ratechecker.versions import querying_dataset, version_as_of
+
+
+# The Rate columns read by get_rates.
+RATE_FIELDS = ("product_id", "base_rate", "total_points", "data_timestamp")
+
+# The Rate columns read by get_rates with RATECHECKER_INTEGER_RATES.
+SCALED_RATE_FIELDS = (
+    "product_id",
+    "base_rate_scaled",
+    "total_points_scaled",
+    "data_timestamp",
+)
+
+
+class RateRow(object):
+    """
+    The columns of a Rate read by get_rates, without the overhead of a model
+    instance. base_rate and total_points are adjusted in place.
+    """
+
+    __slots__ = RATE_FIELDS
+
+    def __init__(self, product_id, base_rate, total_points, data_timestamp):
+        self.product_id = product_id
+        self.base_rate = base_rate
+        self.total_points = total_points
+        self.data_timestamp = data_timestamp
 
 
 def get_rates(params_data, data_load_testing=False, return_fees=False):
     """params_data is a method parameter of type RateCheckerParameters."""
 
+    if use_snapshot():
+        with timing.phase("snapshot"):
+            return get_snapshot().get_rates(params_data, data_load_testing)
+
     # the precalculated results are done by favoring negative points over
     # positive ones, and the API does the opposite
     factor = 1
     if data_load_testing:
         factor = -1
 
-    region_ids = list(
-        Region.objects.filter(state_id=params_data.get("state")).values_list(
-            "region_id", flat=True
-        )
-    )
+    with timing.phase("region-lookup") as phase:
+        region_ids = get_region_ids(params_data.get("state"))
+        phase.rows = len(region_ids)
     if not region_ids:
         return {"data": {}, "timestamp": None}
 
-    rates = Rate.objects.filter(
-        region_id__in=region_ids,
-        product__loan_purpose=params_data.get("loan_purpose"),
-        product__pmt_type=params_data.get("rate_structure"),
-        product__loan_type=params_data.get("loan_type"),
-        product__max_ltv__gte=params_data.get("max_ltv"),
-        product__loan_term=params_data.get("loan_term"),
-        product__max_loan_amt__gte=params_data.get("loan_amount"),
-        product__max_fico__gte=params_data.get("maxfico"),
-        product__min_fico__lte=params_data.get("minfico"),
-    )
-
-    if params_data.get("loan_type") != "FHA-HB":
-        rates = rates.filter(
-            product__min_loan_amt__lte=params_data.get("loan_amount")
+    if use_sql_selection():
+        data, data_timestamp = select_in_sql(
+            region_ids, params_data, factor, data_load_testing
+        )
+    else:
+        data, data_timestamp = fetch_and_select_rates(
+            region_ids, params_data, factor, data_load_testing
         )
 
-    if params_data.get("rate_structure") == "ARM":
-        rates = rates.filter(
-            product__int_adj_term=params_data.get("arm_type")[:-2],
-            product__io=bool(params_data.get("io")),
+    with timing.phase("response-build"):
+        # The timestamp recorded for the dataset, which the rows left
+        # unchanged by a delta load do not have.
+        results = {
+            "data": data,
+            "timestamp": dataset_timestamp() or data_timestamp,
+        }
+
+    return results
+
+
+def select_in_sql(region_ids, params_data, factor, data_load_testing):
+    """
+    Select the rate of each matching product nearest to the requested
+    points in SQL, with RATECHECKER_SQL_SELECTION. Returns (data,
+    data_timestamp).
+    """
+    with timing.phase("sql-selection") as phase:
+        product_ids = get_product_table().match(params_data, data_load_testing)
+        available, data_timestamp = select_rates_in_sql(
+            product_ids,
+            region_ids,
+            params_data,
+            factor,
+            data_load_testing,
         )
+        data = rates_histogram(available, data_load_testing)
+        phase.rows = len(available)
+
+    return data, data_timestamp
+
+
+def fetch_and_select_rates(region_ids, params_data, factor, data_load_testing):
+    """
+    Fetch the matching rates and adjustments, and select the rate of each
+    product nearest to the requested points. Returns (data, data_timestamp).
+    """
+    integer_rates = use_integer_rates()
+
+    with timing.phase("rate-fetch") as phase:
+        product_ids = get_product_table().match(params_data, data_load_testing)
+        rates = filter_rates(
+            product_ids, region_ids, params_data, data_load_testing
+        )
+        if integer_rates:
+            all_rates = list(rates.values_list(*SCALED_RATE_FIELDS))
+        else:
+            all_rates = [
+                RateRow(*row) for row in rates.values_list(*RATE_FIELDS)
+            ]
+        phase.rows = len(all_rates)
+
+    with timing.phase("adjustments") as phase:
+        summed_adj_dict = get_adjustments(
+            product_ids, params_data, integer_rates
+        )
+        phase.rows = len(summed_adj_dict)
+
+    with timing.phase("selection") as phase:
+        if integer_rates:
+            data, data_timestamp = select_scaled_rates_data(
+                all_rates,
+                summed_adj_dict,
+                params_data,
+                factor,
+                data_load_testing,
+            )
+        else:
+            data, data_timestamp = select_rates_data(
+                all_rates,
+                summed_adj_dict,
+                params_data,
+                factor,
+                data_load_testing,
+            )
+        phase.rows = len(data)
+
+    return data, data_timestamp
+
+
+async def aget_rates(params_data, data_load_testing=False):
+    """
+    Async version of get_rates, with the same results.
+
+    The queries run one after the other, as in get_rates: the ORM runs them
+    in a single thread per request, so they would not overlap if awaited
+    together.
+    """
+    if use_snapshot():
+        return await sync_to_async(get_rates)(params_data, data_load_testing)
 
+    factor = 1
     if data_load_testing:
-        rates = rates.filter(
-            product__institution=params_data.get("institution"),
-            lock=params_data.get("lock"),
+        factor = -1
+
+    with timing.phase("region-lookup") as phase:
+        region_ids = await aget_region_ids(params_data.get("state"))
+        phase.rows = len(region_ids)
+    if not region_ids:
+        return {"data": {}, "timestamp": None}
+
+    if use_sql_selection():
+        data, data_timestamp = await sync_to_async(select_in_sql)(
+            region_ids, params_data, factor, data_load_testing
         )
+    else:
+        data, data_timestamp = await afetch_and_select_rates(
+            region_ids, params_data, factor, data_load_testing
+        )
+
+    with timing.phase("response-build"):
+        results = {
+            "data": data,
+            "timestamp": await sync_to_async(dataset_timestamp)()
+            or data_timestamp,
+        }
+
+    return results
+
+
+async def afetch_and_select_rates(
+    region_ids, params_data, factor, data_load_testing
+):
+    """Async version of fetch_and_select_rates."""
+    integer_rates = use_integer_rates()
+
+    with timing.phase("rate-fetch") as phase:
+        product_ids = await sync_to_async(match_products)(
+            params_data, data_load_testing
+        )
+        all_rates = await afilter_rates(
+            product_ids,
+            region_ids,
+            params_data,
+            data_load_testing,
+            integer_rates,
+        )
+        phase.rows = len(all_rates)
+
+    with timing.phase("adjustments") as phase:
+        summed_adj_dict = await aget_adjustments(
+            product_ids, params_data, integer_rates
+        )
+        phase.rows = len(summed_adj_dict)
+
+    with timing.phase("selection") as phase:
+        if integer_rates:
+            data, data_timestamp = select_scaled_rates_data(
+                all_rates,
+                summed_adj_dict,
+                params_data,
+                factor,
+                data_load_testing,
+            )
+        else:
+            data, data_timestamp = select_rates_data(
+                all_rates,
+                summed_adj_dict,
+                params_data,
+                factor,
+                data_load_testing,
+            )
+        phase.rows = len(data)
+
+    return data, data_timestamp
+
+
+def match_products(params_data, data_load_testing=False):
+    return get_product_table().match(params_data, data_load_testing)
+
+
+async def afilter_rates(
+    product_ids, region_ids, params_data, data_load_testing, integer_rates
+):
+    """Fetch the rates of filter_rates, as get_rates reads them."""
+    rates = filter_rates(
+        product_ids, region_ids, params_data, data_load_testing
+    )
+    if integer_rates:
+        return [row async for row in rates.values_list(*SCALED_RATE_FIELDS)]
+
+    return [RateRow(*row) async for row in rates.values_list(*RATE_FIELDS)]
+
+
+def get_adjustments(product_ids, params_data, integer_rates=False):
+    """
+    Sum the adjustments of each product that apply to the requested loan, in
+    thousandths if integer_rates is set.
+    """
+    if use_adjustment_index():
+        indexes = get_adjustment_indexes()
+        if integer_rates:
+            return scaled_adjustments(indexes, product_ids, params_data)
+        return sum_adjustments(indexes, product_ids, params_data)
+
+    if integer_rates:
+        return query_adjustments(product_ids, params_data, "adj_value_scaled")
+    return query_adjustments(product_ids, params_data)
+
+
+async def aget_adjustments(product_ids, params_data, integer_rates):
+    """Async version of get_adjustments."""
+    if use_adjustment_index():
+        return await sync_to_async(get_adjustments)(
+            product_ids, params_data, integer_rates
+        )
+
+    value_field = "adj_value_scaled" if integer_rates else "adj_value"
+    return collect_adjustment_sums(
+        [
+            adj
+            async for adj in sum_adjustments_query(
+                product_ids, params_data, value_field
+            )
+        ]
+    )
+
+
+def select_rates_data(
+    all_rates, summed_adj_dict, params_data, factor, data_load_testing
+):
+    """
+    Pick the rate closest to the requested points for each product, and
+    count the products at each rate. Returns (data, data_timestamp).
+    """
+    if use_vectorized():
+        data = vectorized.rates_data(
+            all_rates,
+            summed_adj_dict,
+            params_data.get("points"),
+            factor,
+            data_load_testing,
+        )
+        data_timestamp = all_rates[-1].data_timestamp if all_rates else ""
+    else:
+        available_rates = {}
+        data_timestamp = ""
+        for rate in all_rates:
+            # TODO: check that it the same all the time, and do what if it is
+            # not?
+            data_timestamp = rate.data_timestamp
+            product = summed_adj_dict.get(rate.product_id, {})
+            rate.total_points += product.get("P", Decimal(0)).quantize(
+                rate.total_points
+            )
+            rate.base_rate += product.get("R", Decimal(0)).quantize(
+                rate.base_rate
+            )
+            distance = abs(params_data.get("points") - rate.total_points)
+            if float(distance) > 0.5:
+                continue
+            if rate.product_id not in available_rates:
+                available_rates[rate.product_id] = rate
+            else:
+                current = available_rates[rate.product_id]
+                current_difference = abs(
+                    params_data.get("points") - current.total_points
+                )
+                new_difference = abs(
+                    params_data.get("points") - rate.total_points
+                )
+                if new_difference < current_difference or (
+                    new_difference == current_difference
+                    and factor * current.total_points < 0
+                    and factor * rate.total_points > 0
+                ):
+                    available_rates[rate.product_id] = rate
+
+        data = {}
+        for rate in available_rates:
+            key = str(available_rates[rate].base_rate)
+            current_value = data.get(key, 0)
+            if data_load_testing:
+                data[key] = "%s" % available_rates[rate].total_points
+            else:
+                data[key] = current_value + 1
+
+    return data, data_timestamp
+
+
+def select_scaled_rates_data(
+    all_rates, summed_adj_dict, params_data, factor, data_load_testing
+):
+    """
+    select_rates_data for rates fetched as SCALED_RATE_FIELDS tuples and
+    adjustments summed in thousandths.
+    """
+    if use_vectorized():
+        data = vectorized.scaled_rates_data(
+            all_rates,
+            summed_adj_dict,
+            params_data.get("points"),
+            factor,
+            data_load_testing,
+        )
+    else:
+        data = rates_histogram(
+            select_rates(
+                (rate[:3] for rate in all_rates),
+                summed_adj_dict,
+                params_data.get("points"),
+                factor,
+            ),
+            data_load_testing,
+        )
+
+    data_timestamp = all_rates[-1][3] if all_rates else ""
+    return data, data_timestamp
+
+
+def filter_rates(
+    product_ids, region_ids, params_data, data_load_testing=False
+):
+    """The rates of the given products in the given regions and locks."""
+    rates = Rate.objects.filter(
+        product_id__in=product_ids, region_id__in=region_ids
+    ).order_by("rate_id")
+
+    if data_load_testing:
+        rates = rates.filter(lock=params_data.get("lock"))
     else:
         rates = rates.filter(
             lock__lte=params_data.get("max_lock", 0),
             lock__gt=params_data.get("min_lock", 0),
         )
 
-    all_rates = []
-    products = {}
-    for rate in rates:
-        all_rates.append(rate)
-        products["{}{}".format(rate.product_id, rate.region_id)] = (
-            rate.product_id
-        )
-    product_ids = products.values()
-
-    adjustments = (
-        Adjustment.objects.filter(product__plan_id__in=product_ids)
-        .filter(
-            Q(max_loan_amt__gte=params_data.get("loan_amount"))
-            | Q(max_loan_amt__isnull=True),
-            Q(min_loan_amt__lte=params_data.get("loan_amount"))
-            | Q(min_loan_amt__isnull=True),
-            Q(prop_type=params_data.get("property_type"))
-            | Q(prop_type__isnull=True)
-            | Q(prop_type=""),
-            Q(state=params_data.get("state"))
-            | Q(state__isnull=True)
-            | Q(state=""),
-            Q(max_fico__gte=params_data.get("maxfico"))
-            | Q(max_fico__isnull=True),
-            Q(min_fico__lte=params_data.get("minfico"))
-            | Q(min_fico__isnull=True),
-            Q(min_ltv__lte=params_data.get("min_ltv"))
-            | Q(min_ltv__isnull=True),
-            Q(max_ltv__gte=params_data.get("max_ltv"))
-            | Q(max_ltv__isnull=True),
-        )
+    return rates
+
+
+def query_adjustments(product_ids, params_data, value_field="adj_value"):
+    """
+    Sum the adjustments of each product that apply to the requested loan.
+
+    value_field is "adj_value" to sum Decimals, or "adj_value_scaled" to sum
+    thousandths.
+    """
+    return collect_adjustment_sums(
+        sum_adjustments_query(product_ids, params_data, value_field)
+    )
+
+
+def sum_adjustments_query(product_ids, params_data, value_field):
+    """The summed adjustments of each product and affected rate type."""
+    return (
+        filter_adjustments(product_ids, params_data)
         .values("product_id", "affect_rate_type")
-        .annotate(sum_of_adjvalue=Sum("adj_value"))
+        .annotate(sum_of_adjvalue=Sum(value_field))
     )
+
+
+def collect_adjustment_sums(adjustments):
+    """Map product ids to their sums by rate type."""
     summed_adj_dict = {}
     for adj in adjustments:
         current = summed_adj_dict.get(adj["product_id"], {})
         current[adj["affect_rate_type"]] = adj["sum_of_adjvalue"]
         summed_adj_dict[adj["product_id"]] = current
-    available_rates = {}
+
+    return summed_adj_dict
+
+
+def filter_adjustments(product_ids, params_data):
+    """The adjustments of the given products that apply to the loan."""
+    return Adjustment.objects.filter(product__plan_id__in=product_ids).filter(
+        *adjustment_conditions(params_data)
+    )
+
+
+def adjustment_conditions(params_data):
+    """The conditions of the adjustments that apply to the loan."""
+    return (
+        Q(max_loan_amt__gte=params_data.get("loan_amount"))
+        | Q(max_loan_amt__isnull=True),
+        Q(min_loan_amt__lte=params_data.get("loan_amount"))
+        | Q(min_loan_amt__isnull=True),
+        Q(prop_type=params_data.get("property_type"))
+        | Q(prop_type__isnull=True)
+        | Q(prop_type=""),
+        Q(state=params_data.get("state"))
+        | Q(state__isnull=True)
+        | Q(state=""),
+        Q(max_fico__gte=params_data.get("maxfico")) | Q(max_fico__isnull=True),
+        Q(min_fico__lte=params_data.get("minfico")) | Q(min_fico__isnull=True),
+        Q(min_ltv__lte=params_data.get("min_ltv")) | Q(min_ltv__isnull=True),
+        Q(max_ltv__gte=params_data.get("max_ltv")) | Q(max_ltv__isnull=True),
+    )
+
+
+def use_sql_selection():
+    """Whether get_rates should select rates in the database."""
+    return getattr(settings, "RATECHECKER_SQL_SELECTION", False)
+
+
+def adjustment_sum(rate_type, params_data):
+    """
+    The summed adjustments of one rate type that apply to the loan, in
+    thousandths, for the product of each rate in the outer query.
+    """
+    sums = (
+        Adjustment.objects.filter(
+            *adjustment_conditions(params_data),
+            product_id=OuterRef("product_id"),
+            affect_rate_type=rate_type,
+        )
+        .order_by()
+        .values("product_id")
+        .annotate(total=Sum("adj_value_scaled"))
+        .values("total")
+    )
+    return Coalesce(Subquery(sums, output_field=IntegerField()), 0)
+
+
+def select_rates_in_sql(
+    product_ids, region_ids, params_data, factor, data_load_testing
+):
+    """
+    Database equivalent of the rate selection in get_rates.
+
+    Adjustments are summed and applied, and rates outside of the points
+    window dropped, in SQL. ROW_NUMBER() then picks the rate of each product
+    nearest to the requested points, with the same tie-breaking as
+    selection.select_rates, so only one row per product is fetched. The
+    integer columns are used so that distances compare exactly.
+
+    Returns the selected (base_rate, total_points) of each product, in
+    thousandths and in the order get_rates would pick them, and the
+    timestamp of the last matching rate.
+    """
+    points = to_scaled(params_data.get("points"))
+    rates = filter_rates(
+        product_ids, region_ids, params_data, data_load_testing
+    )
+
+    # At an equal distance, a rate with positive points (after factor) wins
+    # over one with negative points, and otherwise the first rate wins. The
+    # other rate at the same distance from a rate with no points has points
+    # of the sign of the requested points, which decides whether it wins.
+    signed_points = F("adjusted_points") * factor
+    preference = Case(
+        When(Q(signed_points__gt=0), then=0),
+        When(Q(signed_points__lt=0), then=1),
+        default=0 if factor * points > 0 else 1,
+    )
+
+    selected = (
+        rates.annotate(
+            adjusted_rate=F("base_rate_scaled")
+            + adjustment_sum(Adjustment.RATE, params_data),
+            adjusted_points=F("total_points_scaled")
+            + adjustment_sum(Adjustment.POINTS, params_data),
+        )
+        .annotate(
+            distance=Abs(F("adjusted_points") - points),
+            signed_points=signed_points,
+        )
+        .filter(distance__lte=MAX_POINTS_DISTANCE)
+        .annotate(
+            preference=preference,
+            rank=Window(
+                RowNumber(),
+                partition_by=F("product_id"),
+                order_by=(F("distance"), F("preference"), F("rate_id")),
+            ),
+            first_rate_id=Window(Min("rate_id"), partition_by=F("product_id")),
+            last_timestamp=Subquery(
+                rates.order_by("-rate_id").values("data_timestamp")[:1]
+            ),
+        )
+        .filter(rank=1)
+        .order_by("first_rate_id")
+        .values_list(
+            "product_id", "adjusted_rate", "adjusted_points", "last_timestamp"
+        )
+    )
+
+    available = {}
     data_timestamp = ""
-    for rate in all_rates:
-        # TODO: check that it the same all the time, and do what if it is not?
-        data_timestamp = rate.data_timestamp
-        product = summed_adj_dict.get(rate.product_id, {})
-        rate.total_points += product.get("P", Decimal(0)).quantize(
-            rate.total_points
-        )
-        rate.base_rate += product.get("R", Decimal(0)).quantize(rate.base_rate)
-        distance = abs(params_data.get("points") - rate.total_points)
-        if float(distance) > 0.5:
-            continue
-        if rate.product_id not in available_rates:
-            available_rates[rate.product_id] = rate
-        else:
-            current_difference = abs(
-                params_data.get("points")
-                - available_rates[rate.product_id].total_points
-            )
-            new_difference = abs(params_data.get("points") - rate.total_points)
-            if new_difference < current_difference or (
-                new_difference == current_difference
-                and factor * available_rates[rate.product_id].total_points < 0
-                and factor * rate.total_points > 0
-            ):
-                available_rates[rate.product_id] = rate
+    for product_id, base_rate, total_points, data_timestamp in selected:
+        available[product_id] = (base_rate, total_points)
 
-    data = {}
-    for rate in available_rates:
-        key = str(available_rates[rate].base_rate)
-        current_value = data.get(key, 0)
-        if data_load_testing:
-            data[key] = "%s" % available_rates[rate].total_points
-        else:
-            data[key] = current_value + 1
+    return available, data_timestamp
 
-    results = {"data": data, "timestamp": data_timestamp}
-    if not data:
-        obj = Region.objects.first()
-        if obj:
-            results["timestamp"] = obj.data_timestamp
 
-    return results
+# The min_lock and max_lock set for each lock period.
+LOCK_WINDOWS = {30: (0, 30), 45: (31, 45), 60: (46, 60)}
 
 
 def set_lock_max_min(data):
     """Set max and min lock values before serializer validation"""
-    lock_map = {"30": (0, 30), "45": (31, 45), "60": (46, 60)}
+    lock_map = {str(lock): window for lock, window in LOCK_WINDOWS.items()}
     lock = data.get("lock")
     if lock and lock in lock_map:
         data["min_lock"] = lock_map[lock][0]
@@ -159,6 +624,133 @@ def set_lock_max_min(data):
         return data
 
 
+def clean_params(params):
+    """Prepare request parameters for validation by ParamsSerializer."""
+    # Clean the parameters, make sure no leading or trailing spaces,
+    # transform them to upper cases
+    fixed_data = {k: str(v).strip().upper() for k, v in params.items()}
+    return set_lock_max_min(fixed_data)
+
+
+def request_dataset_version(request):
+    """The loaded dataset version, looked up once per request."""
+    if not hasattr(request, "_dataset_version"):
+        request._dataset_version = dataset_version()
+    return request._dataset_version
+
+
+def uses_request_dataset_version(view_func):
+    """
+    View decorator that answers the view from the dataset version looked up
+    for the request, which its ETag and Last-Modified date were computed
+    from, so that the caches it reads and the timestamp it reports do not
+    look the version up again.
+
+    Works on both sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+
+        @wraps(view_func)
+        async def wrapped_view(request, *args, **kwargs):
+            version = await sync_to_async(request_dataset_version)(request)
+            with using_dataset_version(version):
+                return await view_func(request, *args, **kwargs)
+
+    else:
+
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            with using_dataset_version(request_dataset_version(request)):
+                return view_func(request, *args, **kwargs)
+
+    return wrapped_view
+
+
+def requested_version(params):
+    """
+    The dataset version to answer a request from, given its as_of date
+    parameter, or None to answer it from the active dataset.
+
+    Raises ValidationError if as_of is not a date or no dataset loaded on or
+    before it is kept.
+    """
+    as_of = params.get("as_of")
+    if not as_of:
+        return None
+
+    date = serializers.DateField().run_validation(as_of)
+    version = version_as_of(date)
+    if version is None:
+        raise serializers.ValidationError(
+            "No dataset loaded on or before {} is kept.".format(date)
+        )
+    return None if version.active else version
+
+
+def cached_dataset_version(request, version):
+    """
+    The dataset version to key cached results on: that of the active
+    dataset, or that of version, in the same form as dataset_version.
+    """
+    if version is None:
+        return request_dataset_version(request)
+    return version.activated, version.pk, version.timestamp
+
+
+def rates_etag(request, *args, **kwargs):
+    return dataset_etag(request, request_dataset_version(request))
+
+
+def rates_last_modified(request, *args, **kwargs):
+    # When the active dataset was loaded or activated, which only moves
+    # forward, even when an older dataset is activated again.
+    return request_dataset_version(request)[0]
+
+
+def seconds_until_next_load():
+    """
+    Seconds until the next daily load is expected to have finished, or None
+    if RATECHECKER_LOAD_TIME is not set.
+    """
+    load_time = getattr(settings, "RATECHECKER_LOAD_TIME", None)
+    if load_time is None:
+        return None
+
+    return seconds_until(load_time)
+
+
+def get_rates_all_locks(params_data, version=None):
+    """
+    Answer get_rates for params_data, along with the data of each lock
+    period under "locks".
+
+    The lock periods are answered together by get_rates_batch, so the rates
+    of all of them are fetched in one query and split by period in memory.
+    The requested lock period is answered once, as one of them.
+    """
+    windows = [
+        dict(params_data, lock=lock, min_lock=min_lock, max_lock=max_lock)
+        for lock, (min_lock, max_lock) in LOCK_WINDOWS.items()
+    ]
+    if params_data in windows:
+        results = rate_cache.get_many(windows, get_rates_batch, version)
+        rate_results = dict(results[windows.index(params_data)])
+    else:
+        results = rate_cache.get_many(
+            [params_data] + windows, get_rates_batch, version
+        )
+        rate_results = results.pop(0)
+
+    rate_results["locks"] = {
+        str(params["lock"]): result["data"]
+        for params, result in zip(windows, results)
+    }
+    return rate_results
+
+
+@cache_for(seconds_until_next_load)
+@condition(etag_func=rates_etag, last_modified_func=rates_last_modified)
+@uses_request_dataset_version
 @api_view(["GET"])
 def rate_checker(request):
     """
@@ -168,16 +760,29 @@ def rate_checker(request):
     """
 
     if request.method == "GET":
-        # Clean the parameters, make sure no leading or trailing spaces,
-        # transform them to upper cases
-        fixed_data = {
-            k: v.strip().upper() for k, v in request.query_params.items()
-        }  # noqa
-        fixed_data = set_lock_max_min(fixed_data)
-        serializer = ParamsSerializer(data=fixed_data)
+        fixed_data = clean_params(request.query_params)
+        serializer = FastParamsSerializer(data=fixed_data)
 
         if serializer.is_valid():
-            rate_results = get_rates(serializer.validated_data)
+            try:
+                version = requested_version(fixed_data)
+            except serializers.ValidationError as e:
+                return Response(
+                    {"as_of": e.detail}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            with querying_dataset(version):
+                if fixed_data.get("locks") == "ALL":
+                    rate_results = get_rates_all_locks(
+                        serializer.validated_data,
+                        cached_dataset_version(request, version),
+                    )
+                else:
+                    rate_results = rate_cache.get(
+                        serializer.validated_data,
+                        get_rates,
+                        cached_dataset_version(request, version),
+                    )
             rate_results["request"] = serializer.validated_data
             return Response(rate_results)
         else:
@@ -186,11 +791,243 @@ def rate_checker(request):
             )
 
 
+@cache_for(seconds_until_next_load)
+@async_condition(etag_func=rates_etag, last_modified_func=rates_last_modified)
+@uses_request_dataset_version
+@require_GET
+async def rate_checker_async(request):
+    """
+    Async version of rate_checker, for ASGI deployments, with the same
+    responses.
+    """
+    fixed_data = clean_params(request.GET)
+    serializer = FastParamsSerializer(data=fixed_data)
+    if not serializer.is_valid():
+        return HttpResponse(
+            JSONRenderer().render(serializer.errors),
+            content_type="application/json",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        version = await sync_to_async(requested_version)(fixed_data)
+    except serializers.ValidationError as e:
+        return HttpResponse(
+            JSONRenderer().render({"as_of": e.detail}),
+            content_type="application/json",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    with querying_dataset(version):
+        if fixed_data.get("locks") == "ALL":
+            rate_results = await sync_to_async(get_rates_all_locks)(
+                serializer.validated_data,
+                cached_dataset_version(request, version),
+            )
+        elif rate_cache.max_size:
+            rate_results = await sync_to_async(rate_cache.get)(
+                serializer.validated_data,
+                get_rates,
+                cached_dataset_version(request, version),
+            )
+        else:
+            rate_results = await aget_rates(serializer.validated_data)
+
+    rate_results["request"] = serializer.validated_data
+    return HttpResponse(
+        JSONRenderer().render(rate_results), content_type="application/json"
+    )
+
+
+@uses_request_dataset_version
+@api_view(["POST"])
+def rate_checker_batch(request):
+    """
+    Answer several rate_checker requests in one call.
+
+    The request body is a JSON list of objects, each holding the parameters
+    of one rate_checker request. The response holds a list of results in
+    the same order: either the rate_checker response for valid parameters,
+    or the validation errors under "errors".
+    """
+    scenarios = request.data
+    if not isinstance(scenarios, list):
+        return Response(
+            {"detail": "Expected a list of parameter sets."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    max_size = getattr(settings, "RATECHECKER_BATCH_MAX_SIZE", 50)
+    if len(scenarios) > max_size:
+        return Response(
+            {"detail": "At most %d parameter sets are allowed." % max_size},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = [None] * len(scenarios)
+    valid = []
+    for i, params in enumerate(scenarios):
+        if not isinstance(params, dict):
+            results[i] = {
+                "errors": {"non_field_errors": ["Expected an object."]}
+            }
+            continue
+
+        serializer = FastParamsSerializer(data=clean_params(params))
+        if serializer.is_valid():
+            valid.append((i, serializer.validated_data))
+        else:
+            results[i] = {"errors": serializer.errors}
+
+    rate_results = rate_cache.get_many(
+        [params for _, params in valid], get_rates_batch
+    )
+    for (i, params), rate_result in zip(valid, rate_results):
+        rate_result["request"] = params
+        results[i] = rate_result
+
+    return Response({"results": results})
+
+
+@uses_request_dataset_version
+@api_view(["GET"])
+def rate_checker_sweep(request):
+    """
+    Answer rate_checker for a list of values of one parameter.
+
+    Takes the rate_checker parameters, plus "sweep", the varying dimension
+    (points, loan_amount or fico), and "values", a comma-separated list of
+    its values. Rates are fetched once for all values.
+    """
+    dimension = request.query_params.get("sweep", "").strip().lower()
+    if dimension not in SWEEP_PARAMS:
+        return Response(
+            {"sweep": ["Must be one of %s." % ", ".join(SWEEP_PARAMS)]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    values = [
+        value.strip()
+        for value in request.query_params.get("values", "").split(",")
+        if value.strip()
+    ]
+    max_size = getattr(settings, "RATECHECKER_BATCH_MAX_SIZE", 50)
+    if not values or len(values) > max_size:
+        return Response(
+            {"values": ["Expected between 1 and %d values." % max_size]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    fixed_data = clean_params(request.query_params)
+    scenarios = []
+    errors = {}
+    for value in values:
+        serializer = FastParamsSerializer(
+            data=sweep_params(fixed_data, dimension, value)
+        )
+        if serializer.is_valid():
+            scenarios.append(serializer.validated_data)
+        else:
+            errors[value] = serializer.errors
+
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    rate_results = rate_cache.get_many(scenarios, get_rates_batch)
+    for value, params, rate_result in zip(values, scenarios, rate_results):
+        rate_result["value"] = value
+        rate_result["request"] = params
+
+    return Response({"sweep": dimension, "results": rate_results})
+
+
+@uses_request_dataset_version
+@api_view(["GET"])
+def rate_checker_states(request):
+    """
+    Answer rate_checker for the same parameters in several states.
+
+    Takes the rate_checker parameters, with "state" either a comma-separated
+    list of states or ALL. The response maps each state to its rate_checker
+    data and timestamp, and is streamed as each state is computed.
+    """
+    fixed_data = clean_params(request.query_params)
+    requested = fixed_data.get("state", "")
+    if requested == "ALL":
+        states = None
+    else:
+        states = [state.strip() for state in requested.split(",")]
+
+    # Parameters are validated once, with each state checked separately.
+    serializer = FastParamsSerializer(
+        data=dict(fixed_data, state=states[0] if states else "DC")
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    choices = serializer.fields["state"].choices
+    invalid = [state for state in states or () if state not in choices]
+    if invalid:
+        return Response(
+            {"state": ["Invalid states: %s." % ", ".join(invalid)]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    params_data = serializer.validated_data
+    params_data.pop("state")
+    results = get_rates_by_state(params_data, states)
+
+    return StreamingHttpResponse(
+        stream_states(params_data, results, requested),
+        content_type="application/json",
+    )
+
+
+def stream_states(params_data, results, requested):
+    """Render a rate_checker_states response as a stream of JSON chunks."""
+    encoder = JSONEncoder()
+    yield '{"states": {'
+    for i, (state, result) in enumerate(results):
+        yield "%s%s: %s" % (
+            ", " if i else "",
+            encoder.encode(state),
+            encoder.encode(result),
+        )
+    yield '}, "request": %s}' % encoder.encode(
+        dict(params_data, state=requested)
+    )
+
+
+def status_etag(request, *args, **kwargs):
+    # Cache statistics change with every request.
+    if rate_cache.max_size:
+        return None
+    return rates_etag(request)
+
+
+def status_last_modified(request, *args, **kwargs):
+    if rate_cache.max_size:
+        return None
+    return rates_last_modified(request)
+
+
+def status_max_age():
+    if rate_cache.max_size:
+        return None
+    return seconds_until_next_load()
+
+
 class RateCheckerStatus(APIView):
+    @method_decorator(cache_for(status_max_age))
+    @method_decorator(
+        condition(
+            etag_func=status_etag, last_modified_func=status_last_modified
+        )
+    )
+    @method_decorator(uses_request_dataset_version)
     def get(self, request, format=None):
-        try:
-            load_ts = Region.objects.latest("data_timestamp").data_timestamp
-        except Region.DoesNotExist:
-            load_ts = None
+        results = {"load": dataset_timestamp()}
+        if rate_cache.max_size:
+            results["cache"] = rate_cache.stats()
 
-        return Response({"load": load_ts})
+        return Response(results)
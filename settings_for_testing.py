@@ -24,6 +24,7 @@ MIDDLEWARE = (
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "oahapi.timing.ServerTimingMiddleware",
 )
 
 SECRET_KEY = "django_tests_secret_key"
@@ -21,6 +21,11 @@ setup_requires = [
 testing_extras = [
     "coverage>=7.4,<8",
     "model_bakery>=1.17.0,<2",
+    "numpy>=1.24,<3",
+]
+
+numpy_extras = [
+    "numpy>=1.24,<3",
 ]
 
 docs_extras = [
@@ -71,5 +76,9 @@ setup(
     python_requires=">=3.6",
     install_requires=install_requires,
     setup_requires=setup_requires,
-    extras_require={"docs": docs_extras, "testing": testing_extras},
+    extras_require={
+        "docs": docs_extras,
+        "numpy": numpy_extras,
+        "testing": testing_extras,
+    },
 )